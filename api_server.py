@@ -0,0 +1,222 @@
+"""
+API HTTP local de predição do HealthAnalytics.
+
+Serve o mesmo pipeline usado pelas páginas do Streamlit para outros sistemas
+internos. Requisições concorrentes são retidas por alguns milissegundos e
+agrupadas em uma única chamada ao modelo (micro-batching), de modo que a vazão
+sob carga cresce com o tamanho do lote e não com o número de requisições.
+
+Endpoints:
+    GET  /health   Estado do serviço e estatísticas dos lotes.
+    POST /predict  Diagnóstico e probabilidades por classe.
+    POST /explain  Igual ao /predict, mais as contribuições SHAP por variável.
+
+O corpo do POST é um objeto JSON com as 16 features brutas (mesmos códigos da
+base de treino) ou uma lista desses objetos.
+
+Uso:
+    python api_server.py --porta 8502 --espera-ms 5 --lote-maximo 256
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from constants import DICT_RESULTADO_PDF
+from inference import agregar_shap_por_variavel, fatores_por_linha, inferir, validar_lote
+from model_registry import carregar_metadata, obter_explainer, obter_modelo_compacto
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes em uma única chamada a `inferir`.
+
+    Uma thread dedicada espera a primeira requisição da fila e, a partir dela,
+    aguarda até `max_espera_ms` (ou até `max_lote` linhas) por outras antes de
+    rodar o modelo uma única vez sobre todas as linhas acumuladas.
+    """
+
+    def __init__(self, pipeline, explainer=None, max_espera_ms=5.0, max_lote=256):
+        self.pipeline = pipeline
+        self.explainer = explainer
+        self.max_espera = max_espera_ms / 1000
+        self.max_lote = max_lote
+        self.lotes_processados = 0
+        self.linhas_processadas = 0
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submeter(self, dados: pd.DataFrame) -> Future:
+        """Enfileira as linhas de uma requisição e retorna um Future com a lista de respostas."""
+        futuro = Future()
+        self._fila.put((dados, futuro))
+        return futuro
+
+    def _coletar_lote(self):
+        lote = [self._fila.get()]
+        linhas = len(lote[0][0])
+        prazo = time.monotonic() + self.max_espera
+        while linhas < self.max_lote:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            lote.append(item)
+            linhas += len(item[0])
+        return lote
+
+    def _executar(self, lote):
+        dados = pd.concat([d for d, _ in lote], ignore_index=True)
+        respostas = self._formatar(inferir(self.pipeline, dados, explainer=self.explainer))
+
+        self.lotes_processados += 1
+        self.linhas_processadas += len(respostas)
+        inicio = 0
+        for d, futuro in lote:
+            futuro.set_result(respostas[inicio:inicio + len(d)])
+            inicio += len(d)
+
+    def _loop(self):
+        while True:
+            lote = self._coletar_lote()
+            try:
+                self._executar(lote)
+            except Exception:
+                # Uma requisição com erro não pode derrubar as outras do lote:
+                # cada uma roda sozinha e só a que falhar recebe a exceção
+                for item in lote:
+                    try:
+                        self._executar([item])
+                    except Exception as e:
+                        item[1].set_exception(e)
+
+    def _formatar(self, resultado):
+        classes = [str(c) for c in resultado.classes]
+        respostas = [
+            {
+                'diagnostico': str(rotulo),
+                'diagnostico_pt': DICT_RESULTADO_PDF.get(rotulo, rotulo),
+                'probabilidades': dict(zip(classes, probs.round(6).tolist())),
+            }
+            for rotulo, probs in zip(resultado.rotulos, resultado.probabilidades)
+        ]
+        if resultado.shap_values is not None:
+            df_agregado = agregar_shap_por_variavel(resultado.shap_values, resultado.feature_names)
+            riscos, protecoes = fatores_por_linha(df_agregado)
+            contribuicoes = df_agregado.round(6).to_dict('records')
+            for resposta, contrib, risco, protecao in zip(respostas, contribuicoes, riscos, protecoes):
+                resposta['contribuicoes'] = contrib
+                resposta['fatores_risco'] = risco
+                resposta['fatores_protecao'] = protecao
+        return respostas
+
+
+class ServidorPredicao(ThreadingHTTPServer):
+    """ThreadingHTTPServer com fila de conexões maior, para rajadas de clientes concorrentes."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def criar_handler(metadata, batchers, categorias=None, timeout=30):
+    """Cria a classe de handler HTTP ligada aos batchers de /predict e /explain."""
+
+    class PredicaoHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _responder(self, status, corpo):
+            payload = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path != '/health':
+                return self._responder(404, {'erro': 'Rota não encontrada'})
+            self._responder(200, {
+                'status': 'ok',
+                'lotes': {rota: {'chamadas_modelo': b.lotes_processados, 'linhas': b.linhas_processadas}
+                          for rota, b in batchers.items()},
+            })
+
+        def do_POST(self):
+            batcher = batchers.get(self.path)
+            if batcher is None:
+                return self._responder(404, {'erro': 'Rota não encontrada'})
+
+            try:
+                tamanho = int(self.headers.get('Content-Length', 0))
+                corpo = json.loads(self.rfile.read(tamanho) or b'null')
+                registros = corpo if isinstance(corpo, list) else [corpo]
+                if not registros or not all(isinstance(r, dict) for r in registros):
+                    raise ValueError("Envie um objeto JSON (ou lista de objetos) com as features do paciente.")
+                compostas = sorted({col for r in registros for col, v in r.items()
+                                    if col in metadata['features_expected'] and isinstance(v, (dict, list))})
+                if compostas:
+                    raise ValueError(f"Valores devem ser números, textos ou null: {', '.join(compostas)}")
+                dados, validas, status = validar_lote(
+                    pd.DataFrame(registros), metadata['features_expected'], metadata.get('numeric_features'),
+                    categorias
+                )
+                if not validas.all():
+                    raise ValueError("; ".join(f"Linha {i}: {motivo}" for i, motivo in status[~validas].items()))
+            except (ValueError, json.JSONDecodeError) as e:
+                return self._responder(400, {'erro': str(e)})
+
+            try:
+                respostas = batcher.submeter(dados).result(timeout=timeout)
+            except Exception as e:
+                return self._responder(500, {'erro': f"Erro no processamento: {e}"})
+            self._responder(200, respostas if isinstance(corpo, list) else respostas[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredicaoHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="API HTTP local de predição com micro-batching.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8502)
+    parser.add_argument('--espera-ms', type=float, default=5.0,
+                        help="Tempo máximo que uma requisição aguarda por outras para formar um lote")
+    parser.add_argument('--lote-maximo', type=int, default=256, help="Linhas máximas por chamada ao modelo")
+    args = parser.parse_args(argv)
+
+    modelo, metadata = obter_modelo_compacto(), carregar_metadata()
+    if modelo is None or metadata is None:
+        parser.error("Artefatos do modelo não encontrados em saved_model/")
+    explainer = obter_explainer()
+
+    batchers = {
+        '/predict': MicroBatcher(modelo, None, args.espera_ms, args.lote_maximo),
+        '/explain': MicroBatcher(modelo, explainer, args.espera_ms, args.lote_maximo),
+    }
+
+    servidor = ServidorPredicao((args.host, args.porta), criar_handler(metadata, batchers, modelo.categorias))
+    print(f"API de predição ouvindo em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
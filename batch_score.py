@@ -0,0 +1,107 @@
+"""
+Pontuação em lote do HealthAnalytics via linha de comando (sem Streamlit).
+
+Lê o CSV de entrada em blocos de tamanho fixo, pontua cada bloco com o modelo
+salvo (formato compacto, ver `compact_model.py`) e grava as predições assim
+que o bloco termina. A memória usada depende apenas de `--tamanho-bloco`, não
+do tamanho do arquivo.
+
+Uso:
+    python batch_score.py pacientes.csv predicoes.csv
+    python batch_score.py export_noturno.csv - --tamanho-bloco 100000 > predicoes.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from inference import TAMANHO_BLOCO_PADRAO, sem_colunas_resultado, validar_lote, pontuar_lote
+from model_registry import METADATA_PATH, MODEL_PATH, carregar_metadata, obter_explainer, obter_modelo_compacto
+
+
+def pontuar_arquivo(entrada, saida, pipeline, metadata, tamanho_bloco=50_000,
+                    somente_predicoes=False, explainer=None, log=sys.stderr):
+    """
+    Pontua um CSV em streaming, bloco a bloco.
+
+    Args:
+        entrada: Caminho ou buffer do CSV de entrada.
+        saida: Caminho ou buffer de saída (recebe o cabeçalho apenas no primeiro bloco).
+        pipeline: Pipeline treinado ou `ModeloCompacto`.
+        metadata (dict): Conteúdo de `model_metadata.joblib`.
+        tamanho_bloco (int): Linhas lidas e pontuadas por vez.
+        somente_predicoes (bool): Se True, omite as 16 features de entrada na saída
+            (colunas extras, como identificadores, são mantidas).
+        explainer: TreeExplainer opcional para incluir os fatores de risco/proteção.
+        log: Destino das mensagens de progresso.
+
+    Returns:
+        int: Total de linhas processadas.
+    """
+    features = metadata['features_expected']
+    total = 0
+    inicio = time.perf_counter()
+
+    for i, bloco in enumerate(pd.read_csv(entrada, chunksize=tamanho_bloco)):
+        dados, validas, status = validar_lote(
+            bloco, features, metadata.get('numeric_features'), getattr(pipeline, 'categorias', None)
+        )
+        resultado = pontuar_lote(
+            pipeline, dados[validas], explainer=explainer,
+            tamanho_bloco=min(tamanho_bloco, TAMANHO_BLOCO_PADRAO) if explainer else tamanho_bloco
+        )
+
+        base = sem_colunas_resultado(bloco.drop(columns=features) if somente_predicoes else bloco)
+        saida_bloco = base.join(resultado)
+        saida_bloco['Status'] = status
+        saida_bloco.to_csv(saida, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+        total += len(bloco)
+        decorrido = time.perf_counter() - inicio
+        print(f"Bloco {i + 1}: {total} linhas ({total / decorrido:,.0f} linhas/s)", file=log)
+
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pontua um CSV de pacientes com o modelo salvo, em blocos.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('entrada', help="CSV com as colunas de metadata['features_expected'] ('-' para stdin)")
+    parser.add_argument('saida', help="CSV de saída ('-' para stdout)")
+    parser.add_argument('--modelo', default=MODEL_PATH)
+    parser.add_argument('--metadata', default=METADATA_PATH)
+    parser.add_argument('--tamanho-bloco', type=int, default=50_000, help="Linhas por bloco")
+    parser.add_argument('--somente-predicoes', action='store_true',
+                        help="Não repete as features de entrada na saída")
+    parser.add_argument('--fatores', action='store_true',
+                        help="Inclui os principais fatores de risco/proteção (SHAP, bem mais lento)")
+    args = parser.parse_args(argv)
+
+    modelo, metadata = obter_modelo_compacto(args.modelo), carregar_metadata(args.metadata)
+    if modelo is None or metadata is None:
+        parser.error(f"Artefatos do modelo não encontrados: {args.modelo} / {args.metadata}")
+
+    explainer = obter_explainer(args.modelo) if args.fatores else None
+
+    entrada = sys.stdin if args.entrada == '-' else args.entrada
+    saida = sys.stdout if args.saida == '-' else args.saida
+
+    inicio = time.perf_counter()
+    try:
+        total = pontuar_arquivo(entrada, saida, modelo, metadata, args.tamanho_bloco,
+                                args.somente_predicoes, explainer)
+    except BrokenPipeError:
+        # Leitor da saída encerrado antes do fim (ex: `| head`): sai em silêncio, como um filtro.
+        # O stdout aponta para o devnull para o flush final do interpretador não falhar de novo.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    print(f"Concluído: {total} linhas em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Backends de consulta do Dashboard: pandas (frame em memória) x DuckDB (SQL sobre o Parquet).
+
+Replica a base `--replicas` vezes em uma pasta temporária e, para cada
+backend, em um processo novo: abre as consultas (`obter_consultas`) e executa
+`--reruns` vezes as consultas de um rerun do Dashboard com um filtro ativo
+(indicadores, gráficos de contagem, médias do heatmap, correlação e as
+linhas dos gráficos por paciente). Reporta a abertura, a mediana por rerun e
+o RSS e o USS do processo ao final.
+
+Uso:
+    python benchmarks/bench_consultas.py --replicas 500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+BACKENDS = ['pandas', 'duckdb']
+
+CONTAGENS = [
+    ['Nível de Obesidade'], ['Nível de Obesidade', 'Gênero'], ['Histórico Familiar', 'Nível de Obesidade'],
+    ['Consumo Calórico', 'Nível de Obesidade'], ['Nível de Obesidade', 'Atividade Física'],
+]
+HABITOS = ['Consumo Calórico', 'Consumo de Vegetais', 'Refeições por Dia', 'Comer entre Refeições',
+           'Consumo de Água', 'Atividade Física', 'Tempo em Tecnologia', 'Consumo de Álcool', 'Monitora Calorias']
+MAPA_HABITOS = {"Não": 0, "Sim": 1, "Nunca": 0, "Às vezes": 1, "Frequentemente": 2, "Sempre": 3,
+                "Menos de 1L": 1, "Entre 1L e 2L": 2, "Mais de 2L": 3, "Nenhuma": 0, "1 a 2 dias/sem": 1,
+                "3 a 4 dias/sem": 2, "5 ou mais dias/sem": 3, "0 a 2 horas": 0, "3 a 5 horas": 1, "Mais de 5 horas": 2}
+MAPA_CORRELACAO = {**MAPA_HABITOS, "Masculino": 0, "Feminino": 1, "Transporte Público": 0, "Caminhada": 1,
+                   "Carro": 2, "Moto": 3, "Bicicleta": 4}
+
+
+def executar_backend(backend: str, caminho: str, reruns: int):
+    """Processo filho: mede abertura e reruns de um backend e imprime um JSON."""
+    import psutil
+    from constants import ORDEM_OBESIDADE
+    from query_engine import obter_consultas
+
+    inicio = time.perf_counter()
+    consultas = obter_consultas(caminho, backend)
+    abertura = time.perf_counter() - inicio
+
+    filtros = {'Gênero': ['Feminino'], 'Idade': (18, 40)}
+    mapa_obesidade = {k: i for i, k in enumerate(ORDEM_OBESIDADE)}
+    tempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        selecao = consultas.selecionar(filtros)
+        selecao.resumo()
+        for colunas in CONTAGENS:
+            selecao.contagens(colunas)
+        selecao.medias('Nível de Obesidade', HABITOS, MAPA_HABITOS)
+        selecao.correlacao(mapa_obesidade, MAPA_CORRELACAO)
+        linhas = selecao.linhas()
+        tempos.append(time.perf_counter() - inicio)
+
+    memoria = psutil.Process().memory_full_info()
+    print(json.dumps({
+        'abertura': abertura, 'rerun': statistics.median(tempos), 'selecionadas': selecao.total,
+        'linhas': len(linhas), 'rss': memoria.rss, 'uss': memoria.uss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard: backend pandas x DuckDB em bases replicadas.")
+    parser.add_argument('--replicas', type=int, default=100, help="Cópias da base concatenadas")
+    parser.add_argument('--reruns', type=int, default=5, help="Reruns medidos por backend (mediana)")
+    parser.add_argument('--executar', nargs=2, metavar=('BACKEND', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executar:
+        executar_backend(args.executar[0], args.executar[1], args.reruns)
+        return
+
+    from data_store import CSV_PATH, garantir_dataset
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'obesity.csv')
+        pd.concat([pd.read_csv(CSV_PATH)] * args.replicas, ignore_index=True).to_csv(caminho, index=False)
+        garantir_dataset(caminho)  # conversão para Parquet fora da medição
+
+        print(f"{args.replicas}x a base | {'backend':<8}{'abertura':>10}{'rerun':>10}{'linhas':>12}{'RSS':>10}{'USS':>10}")
+        for backend in BACKENDS:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--reruns', str(args.reruns), '--executar', backend, caminho],
+                capture_output=True, text=True, cwd=BASE_DIR
+            )
+            if proc.returncode != 0:
+                print(f"{backend}: falhou\n{proc.stderr[-2000:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{'':<13}{backend:<8}{r['abertura']:>9.2f}s{r['rerun'] * 1000:>8.0f}ms"
+                  f"{r['linhas']:>12,}{r['rss'] / 2 ** 20:>8.0f}MB{r['uss'] / 2 ** 20:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
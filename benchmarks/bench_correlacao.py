@@ -0,0 +1,95 @@
+"""
+Heatmap de correlação do Dashboard: `replace` + `DataFrame.corr` x estatísticas por célula do cubo.
+
+Para cada cenário de filtro, mede o tempo mediano da forma antiga (cópia das
+linhas selecionadas, conversão dos rótulos com `replace` e `corr`) e de
+`SelecaoPandas.correlacao`, que soma as estatísticas guardadas por célula do
+`CuboContagens`. Confere que as duas matrizes coincidem. A base pode ser
+replicada (`--replicas`) em uma pasta temporária.
+
+Uso:
+    python benchmarks/bench_correlacao.py --replicas 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from constants import ORDEM_OBESIDADE  # noqa: E402
+from dashboard_data import sem_categorias  # noqa: E402
+from data_store import CSV_PATH  # noqa: E402
+from query_engine import COLUNA_OBESIDADE, obter_consultas  # noqa: E402
+
+MAPA_OBESIDADE = {k: i for i, k in enumerate(ORDEM_OBESIDADE)}
+MAPA_CONVERSAO = {
+    "Não": 0, "Sim": 1, "Masculino": 0, "Feminino": 1,
+    "Nunca": 0, "Às vezes": 1, "Frequentemente": 2, "Sempre": 3,
+    "Menos de 1L": 1, "Entre 1L e 2L": 2, "Mais de 2L": 3,
+    "Nenhuma": 0, "1 a 2 dias/sem": 1, "3 a 4 dias/sem": 2, "5 ou mais dias/sem": 3,
+    "0 a 2 horas": 0, "3 a 5 horas": 1, "Mais de 5 horas": 2,
+    "Transporte Público": 0, "Caminhada": 1, "Carro": 2, "Moto": 3, "Bicicleta": 4
+}
+
+CENARIOS = [
+    ('sem filtro', {}),
+    ('categóricos', {'Gênero': ['Feminino'], 'Histórico Familiar': ['Sim']}),
+    ('idade 18-30', {'Idade': (18, 30)}),
+    ('categóricos + idade', {'Gênero': ['Feminino'], 'Idade': (18, 30)}),
+]
+
+
+def correlacao_antiga(df_filtered: pd.DataFrame):
+    df_corr = sem_categorias(df_filtered)
+    df_corr[COLUNA_OBESIDADE] = df_corr[COLUNA_OBESIDADE].replace(MAPA_OBESIDADE)
+    df_corr.replace(MAPA_CONVERSAO, inplace=True)
+    df_num = df_corr.select_dtypes(include=['int64', 'float64', 'int32'])
+    return df_num.corr()
+
+
+def _cronometrar(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heatmap de correlação: replace + corr x cubo.")
+    parser.add_argument('--replicas', type=int, default=1, help="Cópias da base concatenadas")
+    parser.add_argument('--repeticoes', type=int, default=7, help="Medições por cenário (mediana)")
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)  # downcasting do replace (forma antiga)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = CSV_PATH
+        if args.replicas > 1:
+            caminho = os.path.join(pasta, 'obesity.csv')
+            pd.concat([pd.read_csv(CSV_PATH)] * args.replicas, ignore_index=True).to_csv(caminho, index=False)
+
+        inicio = time.perf_counter()
+        consultas = obter_consultas(caminho, 'pandas')
+        montagem = time.perf_counter() - inicio
+        print(f"{len(consultas.df):,} linhas | frame, motor e cubo (com as estatísticas): {montagem * 1000:.0f} ms")
+        print(f"{'cenário':<22}{'linhas':>10}{'antes (ms)':>12}{'cubo (ms)':>12}{'diferença máx.':>16}")
+        for nome, filtros in CENARIOS:
+            selecao = consultas.selecionar(filtros)
+            antes, esperado = _cronometrar(lambda: correlacao_antiga(selecao.linhas()), args.repeticoes)
+            depois, obtido = _cronometrar(lambda: selecao.correlacao(MAPA_OBESIDADE, MAPA_CONVERSAO), args.repeticoes)
+            esperado = esperado.reindex(index=obtido.index, columns=obtido.columns)
+            diferenca = np.nanmax(np.abs(obtido.to_numpy() - esperado.to_numpy()))
+            print(f"{nome:<22}{selecao.total:>10,}{antes * 1000:>12.1f}{depois * 1000:>12.1f}{diferenca:>16.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark da etapa de explicação (SHAP) do Diagnóstico Preditivo.
+
+Compara o fluxo antigo (um novo TreeExplainer a cada submit) com o fluxo
+atual (explainer construído uma única vez por modelo e reaproveitado).
+
+Uso:
+    python benchmarks/bench_explainer.py --repeticoes 20
+"""
+import argparse
+import os
+import statistics
+import time
+
+import joblib
+import pandas as pd
+import shap
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, 'saved_model', 'modelo_obesidade.joblib')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'obesity.csv')
+
+
+def medir(func, repeticoes):
+    """Executa `func` N vezes e retorna a lista de latências em milissegundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(MODEL_PATH)
+    model = pipeline.named_steps['classifier']
+    preprocessor = pipeline.named_steps['preprocessor']
+
+    paciente = pd.read_csv(DATA_PATH).drop(columns=['Obesity']).head(1)
+    X_transformed = preprocessor.transform(paciente)
+
+    def explicacao_por_submit():
+        explainer = shap.TreeExplainer(model)
+        explainer(X_transformed, check_additivity=False)
+
+    explainer_cache = shap.TreeExplainer(model)
+
+    def explicacao_com_cache():
+        explainer_cache(X_transformed, check_additivity=False)
+
+    # Aquecimento (imports tardios do shap/numba)
+    explicacao_por_submit()
+
+    antes = medir(explicacao_por_submit, args.repeticoes)
+    depois = medir(explicacao_com_cache, args.repeticoes)
+
+    print(f"{'Cenário':<35}{'mediana (ms)':>15}{'p95 (ms)':>12}")
+    for nome, tempos in [("Explainer novo a cada submit", antes), ("Explainer em cache", depois)]:
+        p95 = sorted(tempos)[max(0, int(len(tempos) * 0.95) - 1)]
+        print(f"{nome:<35}{statistics.median(tempos):>15.1f}{p95:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
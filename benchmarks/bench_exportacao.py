@@ -0,0 +1,87 @@
+"""
+Exportação dos dados brutos do Dashboard: arquivo inteiro em memória x gravação em blocos.
+
+Para uma base replicada `--replicas` vezes (seleção sem filtro), compara:
+- a forma antiga, executada a cada rerun: `to_csv().encode()` e `.xlsx` em um
+  `BytesIO` (`pd.ExcelWriter` + xlsxwriter);
+- `data_export.exportar` com `selecao.blocos()` (CSV, Parquet e Excel em disco).
+Mede o tempo e o pico de memória alocada durante a geração (`tracemalloc`, em uma
+segunda execução).
+
+Uso:
+    python benchmarks/bench_exportacao.py --replicas 20
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from data_export import FORMATOS, LIMITE_LINHAS_EXCEL, exportar  # noqa: E402
+from data_store import CSV_PATH  # noqa: E402
+from query_engine import obter_consultas  # noqa: E402
+
+
+def _medir(funcao):
+    """Tempo de uma execução normal e pico de memória de outra, com o `tracemalloc` ligado."""
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico
+
+
+def _excel_em_memoria(df: pd.DataFrame):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportação: arquivo inteiro em memória x blocos em disco.")
+    parser.add_argument('--replicas', type=int, default=20, help="Cópias da base concatenadas")
+    parser.add_argument('--tamanho-bloco', type=int, default=50_000, help="Linhas por bloco")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = CSV_PATH
+        if args.replicas > 1:
+            caminho = os.path.join(pasta, 'obesity.csv')
+            pd.concat([pd.read_csv(CSV_PATH)] * args.replicas, ignore_index=True).to_csv(caminho, index=False)
+
+        selecao = obter_consultas(caminho, 'pandas').selecionar({})
+        df_filtered = selecao.linhas()
+        print(f"{selecao.total:,} linhas | blocos de {args.tamanho_bloco:,}")
+        print(f"{'forma':<28}{'tempo (s)':>10}{'pico (MB)':>11}{'arquivo (MB)':>14}")
+
+        formas = [
+            ('CSV em memória (antes)', lambda: df_filtered.to_csv(index=False).encode('utf-8'), None),
+            ('Excel em BytesIO (antes)', lambda: _excel_em_memoria(df_filtered), None),
+        ]
+        for formato, (extensao, _) in FORMATOS.items():
+            destino = os.path.join(pasta, 'dados' + extensao)
+            formas.append((f'{formato} em blocos', lambda f=formato, d=destino: exportar(
+                selecao.blocos(args.tamanho_bloco), f, d), destino))
+
+        for nome, funcao, destino in formas:
+            if 'Excel' in nome and selecao.total > LIMITE_LINHAS_EXCEL:
+                print(f"{nome:<28}{'acima do limite do Excel':>35}")
+                continue
+            tempo, pico = _medir(funcao)
+            tamanho = f"{os.path.getsize(destino) / 2 ** 20:>14.1f}" if destino else f"{'-':>14}"
+            print(f"{nome:<28}{tempo:>10.2f}{pico / 2 ** 20:>11.1f}{tamanho}")
+
+
+if __name__ == "__main__":
+    main()
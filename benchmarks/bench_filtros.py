@@ -0,0 +1,70 @@
+"""
+Benchmark dos filtros do Dashboard: `df.query` (17 cláusulas) x MotorFiltros.
+
+Replica a base original até `--linhas` e mede um rerun típico, em que apenas
+um widget (faixa etária) muda de valor.
+
+Uso:
+    python benchmarks/bench_filtros.py --linhas 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from filter_engine import MotorFiltros  # noqa: E402
+
+CATEGORICAS = ['Gender', 'family_history', 'FAVC', 'FCVC', 'NCP', 'CAEC', 'SMOKE',
+               'CH2O', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS', 'Obesity']
+NUMERICAS = ['Age', 'Height', 'Weight']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    base = pd.read_csv(os.path.join(BASE_DIR, 'data', 'obesity.csv'))
+    for col in ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']:
+        base[col] = base[col].round().astype(int)
+    df = base.sample(args.linhas, replace=True, random_state=42).reset_index(drop=True)
+
+    filtros = {col: list(df[col].unique()) for col in CATEGORICAS}
+    filtros['Gender'] = ['Female']
+    filtros['MTRANS'] = ['Public_Transportation', 'Walking']
+
+    def query(idade):
+        clausulas = [f"`{c}` in @filtros['{c}']" for c in CATEGORICAS]
+        clausulas += ["Age >= @idade[0] and Age <= @idade[1]",
+                      "Height >= 1.0 and Height <= 2.5", "Weight >= 30 and Weight <= 200"]
+        return df.query(" & ".join(clausulas), local_dict={"filtros": filtros, "idade": idade})
+
+    inicio = time.perf_counter()
+    motor = MotorFiltros(df, CATEGORICAS, NUMERICAS)
+    construcao = time.perf_counter() - inicio
+
+    def motor_filtra(idade):
+        return df[motor.mascara({**filtros, 'Age': idade, 'Height': (1.0, 2.5), 'Weight': (30, 200)})]
+
+    idades = [(18 + i % 5, 40 + i % 7) for i in range(args.repeticoes)]
+    assert query(idades[0]).index.equals(motor_filtra(idades[0]).index)
+
+    for nome, func in [("df.query", query), ("MotorFiltros", motor_filtra)]:
+        tempos = []
+        for idade in idades:
+            inicio = time.perf_counter()
+            func(idade)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        print(f"{nome:<15} mediana por rerun: {np.median(tempos):8.1f} ms")
+    print(f"Construção do motor (uma vez por base): {construcao * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
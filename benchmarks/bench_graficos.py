@@ -0,0 +1,77 @@
+"""
+Benchmark dos gráficos de contagem do Dashboard: linhas brutas x cubo de contagens.
+
+Replica o frame de exibição até `--linhas` e mede, para os gráficos da aba
+"Visão Geral"/"Fatores de Risco" (pizza, barras por gênero e barras 100%), o
+tempo para montar a figura + serializá-la (o que o Streamlit envia ao
+navegador) e o tamanho do payload JSON.
+
+Uso:
+    python benchmarks/bench_graficos.py --linhas 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.express as px
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from count_cube import CuboContagens  # noqa: E402
+from dashboard_data import COLUNAS_FILTRO_CATEGORICAS, obter_frame_exibicao  # noqa: E402
+
+NIVEL = 'Nível de Obesidade'
+
+
+def figuras_brutas(df):
+    return [
+        px.pie(df, names=NIVEL),
+        px.histogram(df, x=NIVEL, color='Gênero', barmode='group', text_auto=True),
+        px.histogram(df, x='Atividade Física', color=NIVEL, barnorm='percent'),
+    ]
+
+
+def figuras_cubo(cubo, mascara):
+    por_celula = cubo.contagens_celulas(mascara)
+    return [
+        px.pie(cubo.contagens([NIVEL], por_celula=por_celula), names=NIVEL, values='Quantidade'),
+        px.histogram(cubo.contagens([NIVEL, 'Gênero'], por_celula=por_celula),
+                     x=NIVEL, y='Quantidade', histfunc='sum', color='Gênero', barmode='group', text_auto=True),
+        px.histogram(cubo.contagens(['Atividade Física', NIVEL], por_celula=por_celula),
+                     x='Atividade Física', y='Quantidade', histfunc='sum', color=NIVEL, barnorm='percent'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    base = obter_frame_exibicao()
+    df = base.sample(args.linhas, replace=True, random_state=42).reset_index(drop=True)
+    mascara = (df['Idade'] >= 20).to_numpy()
+
+    inicio = time.perf_counter()
+    cubo = CuboContagens(df, COLUNAS_FILTRO_CATEGORICAS)
+    print(f"Construção do cubo ({args.linhas:,} linhas, {cubo.n_celulas:,} células): "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    cenarios = [
+        ("Linhas brutas", lambda: figuras_brutas(df[mascara])),
+        ("Cubo de contagens", lambda: figuras_cubo(cubo, mascara)),
+    ]
+    for nome, gerar in cenarios:
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            payload = sum(len(fig.to_json()) for fig in gerar())
+            tempos.append(time.perf_counter() - inicio)
+        print(f"{nome:<18} mediana {np.median(tempos) * 1000:8.1f} ms | payload {payload / 1024:10.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
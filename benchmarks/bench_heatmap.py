@@ -0,0 +1,136 @@
+"""
+Mapa de Calor Comportamental do Dashboard em uma base sintética grande.
+
+Gera `--linhas` pacientes sorteando cada coluna de forma independente a partir
+da base real. Isso produz muito mais combinações distintas (células do cubo)
+que replicar a base. Para alguns cenários de filtro, compara o tempo mediano de:
+- `frame`: forma original (cópia das linhas, `replace` em todas as células,
+  divisão coluna a coluna e `groupby().mean()`);
+- `9 médias`: uma `media_ponderada` por hábito sobre as contagens do cubo;
+- `medias`: todas as médias em uma passada pelas células (`SelecaoPandas.medias`).
+Com o `duckdb` instalado, mede também `medias` no backend DuckDB (uma varredura com
+GROUPING SETS). Confere que todas as formas produzem o mesmo mapa.
+
+Uso:
+    python benchmarks/bench_heatmap.py --linhas 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from data_store import CSV_PATH  # noqa: E402
+from query_engine import COLUNA_OBESIDADE, duckdb_disponivel, obter_consultas  # noqa: E402
+
+HABITOS = ["Consumo Calórico", "Consumo de Vegetais", "Refeições por Dia", "Comer entre Refeições", "Consumo de Água",
+           "Atividade Física", "Tempo em Tecnologia", "Consumo de Álcool", "Monitora Calorias"]
+LIMITES_MAXIMOS = {
+    "Consumo Calórico": 1, "Monitora Calorias": 1, "Consumo de Vegetais": 3,
+    "Refeições por Dia": 4, "Comer entre Refeições": 3, "Consumo de Água": 3,
+    "Atividade Física": 3, "Tempo em Tecnologia": 2, "Consumo de Álcool": 3
+}
+MAPA_NUMERICO = {
+    "Não": 0, "Sim": 1, "no": 0, "yes": 1,
+    "Nunca": 0, "Às vezes": 1, "Frequentemente": 2, "Sempre": 3, "Always": 3,
+    "Menos de 1L": 1, "Entre 1L e 2L": 2, "Mais de 2L": 3,
+    "Nenhuma": 0, "1 a 2 dias/sem": 1, "3 a 4 dias/sem": 2, "5 ou mais dias/sem": 3,
+    "0 a 2 horas": 0, "3 a 5 horas": 1, "Mais de 5 horas": 2,
+    "Sometimes": 1, "Frequently": 2
+}
+
+CENARIOS = [
+    ('sem filtro', {}),
+    ('gênero', {'Gênero': ['Feminino']}),
+    ('idade 18-30', {'Idade': (18, 30)}),
+]
+
+
+def base_sintetica(linhas: int, semente: int = 0) -> pd.DataFrame:
+    """Cada coluna sorteada (com reposição) da coluna correspondente da base real."""
+    original = pd.read_csv(CSV_PATH)
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({col: original[col].to_numpy()[rng.integers(0, len(original), linhas)] for col in original})
+
+
+def heatmap_frame(df_filtered: pd.DataFrame) -> pd.DataFrame:
+    df_heatmap = df_filtered.copy()
+    df_heatmap.replace(MAPA_NUMERICO, inplace=True)
+    cols_validas = [c for c in HABITOS if pd.api.types.is_numeric_dtype(df_heatmap[c])]
+    for col in cols_validas:
+        df_heatmap[col] = df_heatmap[col] / LIMITES_MAXIMOS.get(col, 1)
+    return df_heatmap.groupby(COLUNA_OBESIDADE, observed=True)[cols_validas].mean()
+
+
+def heatmap_medias_separadas(selecao) -> pd.DataFrame:
+    medias = {}
+    for col in HABITOS:
+        media = selecao.media_ponderada(COLUNA_OBESIDADE, col, MAPA_NUMERICO)
+        if media is not None:
+            medias[col] = media / LIMITES_MAXIMOS.get(col, 1)
+    return pd.DataFrame(medias)
+
+
+def heatmap_medias(selecao) -> pd.DataFrame:
+    medias = selecao.medias(COLUNA_OBESIDADE, HABITOS, MAPA_NUMERICO)
+    return medias / [LIMITES_MAXIMOS.get(col, 1) for col in medias.columns]
+
+
+def _cronometrar(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mapa de calor comportamental: frame x cubo em uma base sintética.")
+    parser.add_argument('--linhas', type=int, default=200_000, help="Pacientes da base sintética")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Medições por forma (mediana)")
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)  # downcasting do replace (forma original)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'obesity.csv')
+        base_sintetica(args.linhas).to_csv(caminho, index=False)
+
+        inicio = time.perf_counter()
+        consultas = obter_consultas(caminho, 'pandas')
+        montagem = time.perf_counter() - inicio
+        print(f"{args.linhas:,} linhas, {consultas.cubo.n_celulas:,} células | frame, motor e cubo: {montagem:.1f} s")
+
+        duckdb = obter_consultas(caminho, 'duckdb') if duckdb_disponivel() else None
+        print(f"{'cenário':<14}{'linhas':>10}{'frame':>10}{'9 médias':>10}{'medias':>10}{'duckdb':>10}  (ms)")
+        for nome, filtros in CENARIOS:
+            selecao = consultas.selecionar(filtros)
+            t_frame, esperado = _cronometrar(lambda: heatmap_frame(selecao.linhas()), args.repeticoes)
+            t_separadas, separadas = _cronometrar(lambda: heatmap_medias_separadas(selecao), args.repeticoes)
+            t_medias, obtido = _cronometrar(lambda: heatmap_medias(selecao), args.repeticoes)
+            resultados = [separadas, obtido]
+            t_duckdb = float('nan')
+            if duckdb is not None:
+                selecao_duckdb = duckdb.selecionar(filtros)
+                t_duckdb, obtido_duckdb = _cronometrar(lambda: heatmap_medias(selecao_duckdb), args.repeticoes)
+                resultados.append(obtido_duckdb)
+
+            iguais = all(
+                np.allclose(r.reindex(index=esperado.index, columns=esperado.columns).to_numpy(float),
+                            esperado.to_numpy(float), equal_nan=True)
+                for r in resultados
+            )
+            print(f"{nome:<14}{selecao.total:>10,}{t_frame * 1000:>10.1f}{t_separadas * 1000:>10.1f}"
+                  f"{t_medias * 1000:>10.1f}{t_duckdb * 1000:>10.1f}  {'iguais' if iguais else 'DIFERENTES'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Perfil de importações (`python -X importtime`) da primeira execução de cada página.
+
+Cada página roda em um processo novo pelo `streamlit.testing` (AppTest), como
+na primeira visita a um container recém-iniciado. O Streamlit e o AppTest são
+importados antes da marcação; o que aparece depois dela é o custo da página:
+soma do tempo cumulativo das importações de primeiro nível e as bibliotecas
+mais pesadas. Na página de Diagnóstico, o envio do formulário é medido à
+parte (é quando o SHAP é carregado).
+
+Cada página roda `--repeticoes` vezes; os tempos são medianas. Com
+`--aquecer`, o `warmup.aquecer()` roda no processo antes da marcação, como no
+container iniciado pelo `warmup.py`.
+
+Uso:
+    python benchmarks/bench_importacoes.py --repeticoes 5
+    python benchmarks/bench_importacoes.py --aquecer
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGINAS = [
+    'HealthAnalytics.py',
+    'pages/1_Diagnostico_Preditivo.py',
+    'pages/2_Dashboard_Analitico.py',
+    'pages/3_Performance_do_Modelo.py',
+]
+
+# Botão clicado depois da primeira execução (mede o caminho que só roda após uma ação)
+ACOES = {'pages/1_Diagnostico_Preditivo.py': 'Diagn'}
+
+MARCA = '#### etapa:'
+
+
+def executar_pagina(pagina: str, aquecido: bool = False):
+    """Processo filho: roda a página (e a ação, se houver) marcando cada etapa no stderr."""
+    sys.path.insert(0, BASE_DIR)
+    os.chdir(BASE_DIR)
+    from streamlit.testing.v1 import AppTest
+    import streamlit.delta_generator as dg
+    # `page_link` depende do roteamento do servidor, ausente no AppTest
+    dg.DeltaGenerator.page_link = lambda *args, **kwargs: None
+
+    if aquecido:
+        from warmup import aquecer
+        with open(os.devnull, 'w') as nulo:
+            aquecer(log=nulo)
+
+    app = AppTest.from_file(pagina, default_timeout=600)
+    print(f"{MARCA}abertura", file=sys.stderr, flush=True)
+    inicio = time.perf_counter()
+    app.run()
+    print(f"abertura {time.perf_counter() - inicio:.2f}", flush=True)
+
+    if pagina in ACOES:
+        botao = next(b for b in app.button if ACOES[pagina] in str(b.label))
+        print(f"{MARCA}acao", file=sys.stderr, flush=True)
+        inicio = time.perf_counter()
+        botao.click().run()
+        print(f"acao {time.perf_counter() - inicio:.2f}", flush=True)
+
+    if app.exception:
+        raise RuntimeError([e.value for e in app.exception])
+
+
+def resumir_importacoes(stderr: str) -> dict:
+    """Tempo total (ms) e maiores importações de primeiro nível de cada etapa."""
+    etapas, atual = {}, None
+    for linha in stderr.splitlines():
+        if linha.startswith(MARCA):
+            atual = etapas.setdefault(linha[len(MARCA):], [])
+        elif atual is not None and linha.startswith('import time:') and 'self [us]' not in linha:
+            _, cumulativo, pacote = linha.split('|', 2)
+            if not pacote.startswith('  '):  # indentação = importação aninhada
+                atual.append((int(cumulativo) / 1000, pacote.strip()))
+    return {
+        etapa: (sum(ms for ms, _ in itens), sorted(itens, reverse=True)[:4])
+        for etapa, itens in etapas.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil -X importtime da primeira execução de cada página.")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Processos por página (mediana)")
+    parser.add_argument('--aquecer', action='store_true', help="Executa o warmup.aquecer() antes de cada página")
+    parser.add_argument('--executar', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executar:
+        executar_pagina(args.executar, args.aquecer)
+        return
+
+    print(f"{'página / etapa':<45}{'execução':>10}{'imports':>10}  maiores importações")
+    for pagina in PAGINAS:
+        execucoes = []
+        for _ in range(args.repeticoes):
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--executar', pagina,
+                 *(['--aquecer'] if args.aquecer else [])],
+                capture_output=True, text=True, cwd=BASE_DIR
+            )
+            if proc.returncode != 0:
+                print(f"{pagina}: falhou\n{proc.stderr[-2000:]}")
+                break
+            tempos = {etapa: float(s) for etapa, s in (linha.split() for linha in proc.stdout.splitlines()
+                                                        if linha.split()[0] in ('abertura', 'acao'))}
+            execucoes.append((tempos, resumir_importacoes(proc.stderr)))
+        if len(execucoes) < args.repeticoes:
+            continue
+
+        for etapa, (_, maiores) in execucoes[0][1].items():
+            execucao = statistics.median(tempos[etapa] for tempos, _ in execucoes)
+            importacoes = statistics.median(resumo[etapa][0] for _, resumo in execucoes)
+            detalhes = ', '.join(f"{nome} {ms:.0f}" for ms, nome in maiores)
+            print(f"{pagina + ' / ' + etapa:<45}{execucao:>9.2f}s{importacoes:>8.0f}ms  {detalhes}")
+
+
+if __name__ == "__main__":
+    main()
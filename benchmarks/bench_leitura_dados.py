@@ -0,0 +1,70 @@
+"""
+Leitura da base de pacientes: CSV (`pd.read_csv` + normalização) x Parquet (`data_store`).
+
+Mede o tempo mediano de cada forma de leitura e a memória do frame
+resultante (`memory_usage(deep=True)`). Para o Parquet, mede a base inteira
+e uma leitura podada a poucas colunas. O CSV pode ser replicado
+(`--replicas`) para simular bases maiores; a cópia vai para uma pasta
+temporária, junto com o Parquet derivado dela.
+
+Uso:
+    python benchmarks/bench_leitura_dados.py --replicas 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from data_store import CSV_PATH, ler_dados, normalizar_colunas  # noqa: E402
+
+COLUNAS_PODADAS = ['Age', 'Weight', 'Obesity']
+
+
+def _cronometrar(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo e memória: leitura do CSV x Parquet.")
+    parser.add_argument('--replicas', type=int, default=1, help="Cópias da base concatenadas")
+    parser.add_argument('--repeticoes', type=int, default=7, help="Leituras por forma (mediana)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_csv = CSV_PATH
+        if args.replicas > 1:
+            caminho_csv = os.path.join(pasta, 'obesity.csv')
+            pd.concat([pd.read_csv(CSV_PATH)] * args.replicas, ignore_index=True).to_csv(caminho_csv, index=False)
+
+        inicio = time.perf_counter()
+        ler_dados(caminho_csv=caminho_csv)  # ingestão (uma vez por versão do CSV)
+        ingestao = time.perf_counter() - inicio
+
+        formas = [
+            ('CSV + normalização', lambda: normalizar_colunas(pd.read_csv(caminho_csv))),
+            ('CSV (object)', lambda: pd.read_csv(caminho_csv)),
+            ('Parquet', lambda: ler_dados(caminho_csv=caminho_csv)),
+            (f'Parquet ({len(COLUNAS_PODADAS)} colunas)', lambda: ler_dados(COLUNAS_PODADAS, caminho_csv)),
+        ]
+
+        print(f"{os.path.getsize(caminho_csv) / 1024:,.0f} KB de CSV | ingestão/primeira leitura: {ingestao * 1000:.0f} ms")
+        print(f"{'leitura':<24}{'linhas':>10}{'tempo (ms)':>12}{'memória (KB)':>14}")
+        for nome, funcao in formas:
+            tempo, df = _cronometrar(funcao, args.repeticoes)
+            print(f"{nome:<24}{len(df):>10,}{tempo * 1000:>12.1f}{df.memory_usage(deep=True).sum() / 1024:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
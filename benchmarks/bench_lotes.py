@@ -0,0 +1,81 @@
+"""
+Atualização do Dashboard ao anexar lotes: incremental x reconstrução completa.
+
+Copia a base (replicada `--replicas` vezes) para uma pasta temporária, monta
+o frame de exibição, o motor de filtros e o cubo de contagens e anexa
+`--lotes` lotes de `--linhas` registros (amostras da base com a idade
+perturbada). Para cada lote mede `obter_dados_dashboard` com as estruturas
+estendidas só com as linhas novas; ao final, mede a reconstrução completa da
+mesma versão e confere que o resultado é igual.
+
+Uso:
+    python benchmarks/bench_lotes.py --replicas 50 --lotes 5 --linhas 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import dashboard_data  # noqa: E402
+from data_store import CSV_PATH, anexar_lote  # noqa: E402
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard: atualização incremental por lote x reconstrução.")
+    parser.add_argument('--replicas', type=int, default=50, help="Cópias da base concatenadas")
+    parser.add_argument('--lotes', type=int, default=5, help="Lotes anexados")
+    parser.add_argument('--linhas', type=int, default=500, help="Registros por lote")
+    args = parser.parse_args()
+
+    original = pd.read_csv(CSV_PATH)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'obesity.csv')
+        pd.concat([original] * args.replicas, ignore_index=True).to_csv(caminho, index=False)
+
+        tempo, (df, _, _) = _cronometrar(lambda: dashboard_data.obter_dados_dashboard(caminho))
+        print(f"base: {len(df):,} linhas, primeira carga (com a conversão para Parquet) {tempo * 1000:.0f} ms")
+
+        incrementais = []
+        for _ in range(args.lotes):
+            lote = original.sample(args.linhas, random_state=int(rng.integers(1 << 31))).reset_index(drop=True)
+            lote['Age'] += rng.normal(0, 1, len(lote))
+            anexar_lote(lote, caminho)
+            tempo, (df, motor, cubo) = _cronometrar(lambda: dashboard_data.obter_dados_dashboard(caminho))
+            incrementais.append(tempo)
+
+        dashboard_data._estado.update(caminho=None, versao=None)
+        completo, (df_completo, motor_completo, cubo_completo) = _cronometrar(
+            lambda: dashboard_data.obter_dados_dashboard(caminho)
+        )
+        iguais = (
+            df.astype(object).equals(df_completo.astype(object))
+            and np.array_equal(cubo.contagens_celulas(), cubo_completo.contagens_celulas())
+            and all(np.array_equal(motor.mascara({col: (20, 30)}), motor_completo.mascara({col: (20, 30)}))
+                    for col in dashboard_data.COLUNAS_FILTRO_NUMERICAS)
+            and np.allclose(cubo.correlacao(list(df.columns), {}), cubo_completo.correlacao(list(df.columns), {}),
+                            equal_nan=True)
+        )
+
+    print(f"{args.lotes} lotes de {args.linhas} linhas -> {len(df):,} linhas")
+    print(f"incremental (mediana por lote): {statistics.median(incrementais) * 1000:.0f} ms")
+    print(f"reconstrução completa:          {completo * 1000:.0f} ms")
+    print(f"resultado igual à reconstrução: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Memória por processo do modelo: `.joblib` (cópia privada) x modelo compacto em mmap.
+
+Sobe `--processos` processos (como réplicas do app no mesmo host), cada um
+carrega o modelo e pontua a base inteira. O modo `explainer` soma ao compacto
+o que a etapa `explainer` do `warmup.py` carrega: o `shap`, o `TreeExplainer`
+(montado a partir do modelo compacto) e uma inferência com SHAP. Com todos prontos, mede de fora
+RSS, USS (memória exclusiva do processo) e PSS (páginas compartilhadas
+divididas entre os processos que as usam). O "modelo" é a diferença entre a
+medida depois da carga + predição e a medida logo antes (com numpy, pandas
+e o `model_registry` já importados).
+
+Uso:
+    python benchmarks/bench_memoria_modelo.py --processos 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+
+import psutil
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+MODOS = ['joblib', 'compacto', 'explainer']
+
+
+def _memoria(processo: psutil.Process) -> dict:
+    info = processo.memory_full_info()
+    return {'rss': info.rss, 'uss': info.uss, 'pss': getattr(info, 'pss', float('nan'))}
+
+
+def _replica(modo, pronto, sair):
+    sys.path.insert(0, BASE_DIR)
+    import pandas as pd
+    from inference import inferir
+    from model_registry import carregar_ativos, obter_explainer, obter_modelo_compacto
+
+    dados = pd.read_csv(os.path.join(BASE_DIR, 'data', 'obesity.csv')).drop(columns=['Obesity'])
+    antes = _memoria(psutil.Process())
+
+    if modo == 'joblib':
+        pipeline, _ = carregar_ativos()
+        pipeline.predict_proba(dados)
+    else:
+        modelo = obter_modelo_compacto()
+        modelo.predict_proba(dados)
+        if modo == 'explainer':
+            inferir(modelo, dados.head(1), explainer=obter_explainer())
+
+    pronto.put(antes)
+    sair.wait()
+
+
+def medir(modo: str, processos: int) -> list:
+    """Sobe as réplicas de um modo e retorna (antes, depois) de cada uma, em bytes."""
+    contexto = mp.get_context('spawn')
+    pronto, sair = contexto.Queue(), contexto.Event()
+    replicas = [contexto.Process(target=_replica, args=(modo, pronto, sair)) for _ in range(processos)]
+    for replica in replicas:
+        replica.start()
+
+    antes = [pronto.get(timeout=300) for _ in replicas]
+    depois = [_memoria(psutil.Process(replica.pid)) for replica in replicas]
+
+    sair.set()
+    for replica in replicas:
+        replica.join()
+    return list(zip(antes, depois))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/USS/PSS por processo: modelo .joblib x compacto (mmap) x compacto + explainer.")
+    parser.add_argument('--processos', type=int, default=4, help="Réplicas simultâneas")
+    args = parser.parse_args()
+
+    # Garante a exportação antes das réplicas (senão a primeira a chegar exporta)
+    from model_registry import obter_modelo_compacto
+    obter_modelo_compacto()
+
+    mb = 1024 * 1024
+    print(f"{args.processos} processos | valores médios por processo (MB)")
+    print(f"{'modo':<10}{'RSS':>9}{'USS':>9}{'PSS':>9}{'modelo RSS':>13}{'modelo USS':>13}{'modelo PSS':>13}")
+    for modo in MODOS:
+        medidas = medir(modo, args.processos)
+        media = lambda chave, delta: sum(  # noqa: E731
+            d[chave] - (a[chave] if delta else 0) for a, d in medidas
+        ) / len(medidas) / mb
+        print(f"{modo:<10}{media('rss', False):>9.1f}{media('uss', False):>9.1f}{media('pss', False):>9.1f}"
+              f"{media('rss', True):>13.1f}{media('uss', True):>13.1f}{media('pss', True):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Agregação das contribuições SHAP por variável original: `groupby` x matriz de agregação.
+
+Usa os nomes das colunas transformadas do modelo salvo e contribuições
+sorteadas com `--linhas` pacientes. Compara o tempo mediano de:
+- `groupby`: forma original (nome amigável de cada coluna a cada chamada,
+  DataFrame transposto e `groupby(level=0).sum()`);
+- `matriz`: `inference.agregar_shap_por_variavel`, um produto pela matriz 0/1
+  coluna -> variável, calculada uma vez por modelo (`mapa_variaveis`).
+Mede também a tabela de fatores de um paciente no Diagnóstico (agregação,
+ordenação e listas de risco/proteção), antes com `apply` + `groupby` + `iterrows`.
+Confere que as duas formas produzem os mesmos valores.
+
+Uso:
+    python benchmarks/bench_shap_agregacao.py --linhas 1 1000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from inference import agregar_shap_por_variavel, nome_amigavel, nomes_features  # noqa: E402
+from model_registry import carregar_ativos  # noqa: E402
+
+
+def agregar_groupby(shap_values: np.ndarray, feature_names) -> pd.DataFrame:
+    df_shap = pd.DataFrame(shap_values, columns=[nome_amigavel(f) for f in feature_names])
+    return df_shap.T.groupby(level=0, sort=False).sum().T
+
+
+def fatores_antes(shap_values_class: np.ndarray, feature_names):
+    df_shap = pd.DataFrame({'Feature': feature_names, 'Impacto': shap_values_class})
+    df_shap['Nome Amigável'] = df_shap['Feature'].apply(nome_amigavel)
+    df_shap_grouped = df_shap.groupby('Nome Amigável')['Impacto'].sum().reset_index()
+    df_shap_grouped['Abs_Impacto'] = df_shap_grouped['Impacto'].abs()
+    df_shap_grouped = df_shap_grouped.sort_values('Abs_Impacto', ascending=False)
+    top_riscos = df_shap_grouped[df_shap_grouped['Impacto'] > 0].head(5)
+    top_protecoes = df_shap_grouped[df_shap_grouped['Impacto'] < 0].head(5)
+    return ([f"{row['Nome Amigável']} (+{row['Impacto']:.1%})" for _, row in top_riscos.iterrows()],
+            [f"{row['Nome Amigável']} ({row['Impacto']:.1%})" for _, row in top_protecoes.iterrows()])
+
+
+def fatores_depois(shap_values: np.ndarray, feature_names):
+    impactos = agregar_shap_por_variavel(shap_values[:1], feature_names).iloc[0]
+    df_shap_grouped = impactos.sort_index().rename_axis('Nome Amigável').reset_index(name='Impacto')
+    df_shap_grouped['Abs_Impacto'] = df_shap_grouped['Impacto'].abs()
+    df_shap_grouped = df_shap_grouped.sort_values('Abs_Impacto', ascending=False)
+    top_riscos = df_shap_grouped[df_shap_grouped['Impacto'] > 0].head(5)
+    top_protecoes = df_shap_grouped[df_shap_grouped['Impacto'] < 0].head(5)
+    return ([f"{nome} (+{impacto:.1%})" for nome, impacto in zip(top_riscos['Nome Amigável'], top_riscos['Impacto'])],
+            [f"{nome} ({impacto:.1%})" for nome, impacto in zip(top_protecoes['Nome Amigável'], top_protecoes['Impacto'])])
+
+
+def _cronometrar(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregação SHAP por variável: groupby x matriz de agregação.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1, 1000, 100_000], help="Pacientes por lote")
+    parser.add_argument('--repeticoes', type=int, default=9, help="Medições por forma (mediana)")
+    args = parser.parse_args()
+
+    pipeline, _ = carregar_ativos()
+    feature_names = nomes_features(pipeline.named_steps['preprocessor'])
+    rng = np.random.default_rng(0)
+    print(f"{len(feature_names)} colunas transformadas -> "
+          f"{len(agregar_shap_por_variavel(np.zeros((1, len(feature_names))), feature_names).columns)} variáveis")
+
+    print(f"{'forma':<22}{'linhas':>10}{'antes (ms)':>12}{'depois (ms)':>13}")
+    for linhas in args.linhas:
+        shap_values = rng.normal(0, 0.05, (linhas, len(feature_names)))
+        antes, esperado = _cronometrar(lambda: agregar_groupby(shap_values, feature_names), args.repeticoes)
+        depois, obtido = _cronometrar(lambda: agregar_shap_por_variavel(shap_values, feature_names), args.repeticoes)
+        iguais = list(obtido.columns) == list(esperado.columns) and np.allclose(obtido.to_numpy(), esperado.to_numpy())
+        print(f"{'agregação':<22}{linhas:>10,}{antes * 1000:>12.2f}{depois * 1000:>13.2f}  "
+              f"{'iguais' if iguais else 'DIFERENTES'}")
+
+    shap_values = rng.normal(0, 0.05, (1, len(feature_names)))
+    antes, esperado = _cronometrar(lambda: fatores_antes(shap_values[0], feature_names), args.repeticoes)
+    depois, obtido = _cronometrar(lambda: fatores_depois(shap_values, feature_names), args.repeticoes)
+    print(f"{'fatores (Diagnóstico)':<22}{1:>10,}{antes * 1000:>12.2f}{depois * 1000:>13.2f}  "
+          f"{'iguais' if obtido == esperado else 'DIFERENTES'}")
+
+
+if __name__ == "__main__":
+    main()
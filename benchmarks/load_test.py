@@ -0,0 +1,84 @@
+"""
+Teste de carga da API local de predição (api_server.py).
+
+Dispara requisições concorrentes de um paciente cada contra o localhost e
+reporta vazão, latência e o tamanho médio dos lotes formados pelo servidor.
+
+Uso:
+    python api_server.py &
+    python benchmarks/load_test.py --clientes 32 --requisicoes 50 --rota /predict
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.request
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'obesity.csv')
+
+
+def requisitar(url, corpo=None):
+    """Envia um GET (ou POST JSON, se houver corpo) e retorna a resposta decodificada."""
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+    req = urllib.request.Request(url, data=dados, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8502')
+    parser.add_argument('--rota', default='/predict', choices=['/predict', '/explain'])
+    parser.add_argument('--clientes', type=int, default=32, help="Threads disparando em paralelo")
+    parser.add_argument('--requisicoes', type=int, default=50, help="Requisições por cliente")
+    args = parser.parse_args()
+
+    pacientes = pd.read_csv(DATA_PATH).drop(columns=['Obesity']).to_dict(orient='records')
+    estatisticas_antes = requisitar(args.url + '/health')['lotes'][args.rota]
+
+    latencias = []
+    erros = []
+    trava = threading.Lock()
+
+    def cliente(id_cliente):
+        for i in range(args.requisicoes):
+            paciente = pacientes[(id_cliente * args.requisicoes + i) % len(pacientes)]
+            inicio = time.perf_counter()
+            try:
+                requisitar(args.url + args.rota, paciente)
+            except Exception as e:
+                with trava:
+                    erros.append(str(e))
+                continue
+            with trava:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+    threads = [threading.Thread(target=cliente, args=(c,)) for c in range(args.clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    estatisticas = requisitar(args.url + '/health')['lotes'][args.rota]
+    chamadas = estatisticas['chamadas_modelo'] - estatisticas_antes['chamadas_modelo']
+    linhas = estatisticas['linhas'] - estatisticas_antes['linhas']
+
+    latencias.sort()
+    print(f"Rota: {args.rota} | clientes: {args.clientes} | requisições: {len(latencias)} ok, {len(erros)} erros")
+    print(f"Vazão: {len(latencias) / duracao:,.0f} req/s")
+    if latencias:
+        print(f"Latência: mediana {statistics.median(latencias):.1f} ms | "
+              f"p95 {latencias[int(len(latencias) * 0.95) - 1]:.1f} ms")
+    if chamadas:
+        print(f"Chamadas ao modelo: {chamadas} | lote médio: {linhas / chamadas:.1f} linhas")
+
+
+if __name__ == "__main__":
+    main()
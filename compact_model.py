@@ -0,0 +1,482 @@
+"""
+Modelo compacto para inferência (sem sklearn no caminho de predição).
+
+Exporta o `preprocessor` (imputação, StandardScaler, OneHotEncoder,
+OrdinalEncoder) e a Random Forest do pipeline treinado para arrays NumPy
+(constantes de escala e os nós de todas as árvores concatenados), um `.npy`
+por array, mais um `manifesto.json` com classes, colunas e mapas de
+categorias. O `ModeloCompacto` reproduz `predict_proba` do pipeline bit a
+bit: as mesmas operações em float64 no pré-processamento, a conversão para
+float32 antes de percorrer as árvores (como o sklearn faz) e a soma das
+probabilidades árvore a árvore, na ordem de `estimators_`, seguida da
+divisão pelo número de árvores. A mesma floresta alimenta o
+`shap.TreeExplainer` (`ModeloCompacto.arvores_shap`), sem o `.joblib`.
+
+Os `.npy` são abertos com `mmap_mode='r'`: várias réplicas do app no mesmo
+host compartilham as páginas dos arquivos pelo page cache do sistema, em vez
+de cada processo manter a própria cópia da floresta. Por isso os arquivos
+nunca são reescritos no lugar: a exportação grava em uma pasta temporária e
+a renomeia de uma vez (ver `model_registry.obter_modelo_compacto`, que usa
+uma pasta por versão do `.joblib`).
+
+Uso:
+    python compact_model.py                      # exporta e verifica a paridade (ver `casos_paridade`)
+    python compact_model.py --saida /tmp/modelo_compacto
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from inference import nomes_features
+
+MANIFESTO = 'manifesto.json'
+
+# Linhas percorridas por vez (limita o array intermediário árvores x linhas x classes)
+TAMANHO_BLOCO = 4096
+
+
+def diretorio_versao(raiz: str, hash_modelo: str) -> str:
+    """Pasta do modelo compacto de uma versão do `.joblib` (prefixo do SHA-256)."""
+    return os.path.join(raiz, hash_modelo[:16])
+
+
+def remover_versoes_antigas(raiz: str, manter: str):
+    """
+    Remove as pastas de outras versões em `raiz`, exceto `manter`.
+
+    Processos que ainda mapeiam os arquivos antigos continuam lendo normalmente (Linux);
+    onde a remoção falhar (ex: Windows com o arquivo aberto), a pasta fica para a próxima vez.
+    """
+    for nome in os.listdir(raiz):
+        caminho = os.path.join(raiz, nome)
+        if os.path.isdir(caminho) and caminho != os.path.abspath(manter) and '.tmp-' not in nome:
+            shutil.rmtree(caminho, ignore_errors=True)
+
+
+# ==============================================================================
+# EXPORTAÇÃO
+# ==============================================================================
+def _etapa(transformador, nome):
+    """Passo `nome` de um sub-pipeline do ColumnTransformer."""
+    return transformador.named_steps[nome]
+
+
+def exportar_modelo(pipeline, diretorio: str, hash_modelo: Optional[str] = None) -> str:
+    """
+    Converte o pipeline treinado em arrays NumPy e grava em `diretorio`.
+
+    Suporta a estrutura de `construir_pipeline()`: ColumnTransformer com 'num'
+    (SimpleImputer + StandardScaler), 'cat_onehot' (SimpleImputer + OneHotEncoder) e
+    'cat_ordinal' (SimpleImputer + OrdinalEncoder), seguido de RandomForestClassifier.
+
+    Args:
+        pipeline: Pipeline treinado.
+        diretorio (str): Pasta de destino (não pode existir).
+        hash_modelo (str, optional): SHA-256 do `.joblib` de origem, gravado no manifesto.
+
+    Returns:
+        str: Pasta gravada.
+
+    Raises:
+        ValueError: Se o pipeline tiver uma estrutura diferente da suportada.
+        FileExistsError: Se a pasta de destino já existir (ex: outro processo exportou antes).
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    forest = pipeline.named_steps['classifier']
+
+    transformadores = {nome: (trans, list(cols)) for nome, trans, cols in preprocessor.transformers_}
+    resto = transformadores.pop('remainder', None)
+    if resto is not None and len(resto[1]) > 0 and resto[0] != 'drop':
+        raise ValueError("Colunas em 'remainder' não são suportadas pelo modelo compacto.")
+    if list(transformadores) != ['num', 'cat_onehot', 'cat_ordinal']:
+        raise ValueError(f"Transformadores inesperados: {list(transformadores)}")
+
+    arrays = {}
+    manifesto = {
+        'hash_modelo': hash_modelo,
+        'classes': forest.classes_.tolist(),
+        'n_arvores': len(forest.estimators_),
+        'nomes_features': nomes_features(preprocessor),
+    }
+
+    # Numéricas: mediana (imputação) + média/escala
+    num, colunas_num = transformadores['num']
+    scaler = _etapa(num, 'scaler')
+    manifesto['numericas'] = colunas_num
+    manifesto['scaler'] = {'with_mean': bool(scaler.with_mean), 'with_std': bool(scaler.with_std)}
+    arrays['num_mediana'] = _etapa(num, 'imputer').statistics_.astype(np.float64)
+    arrays['num_media'] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays['num_escala'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    # One-hot: moda (imputação) + categorias de cada coluna
+    onehot, colunas_oh = transformadores['cat_onehot']
+    encoder = _etapa(onehot, 'onehot')
+    if encoder.drop is not None or encoder.handle_unknown != 'ignore':
+        raise ValueError("OneHotEncoder precisa de drop=None e handle_unknown='ignore'.")
+    manifesto['onehot'] = {
+        'colunas': colunas_oh,
+        'modas': [str(m) for m in _etapa(onehot, 'imputer').statistics_],
+        'categorias': [[str(c) for c in cats] for cats in encoder.categories_],
+    }
+
+    # Ordinais: moda + ordem das categorias (desconhecidas -> unknown_value)
+    ordinal, colunas_ord = transformadores['cat_ordinal']
+    encoder = _etapa(ordinal, 'ordinal_encoder')
+    manifesto['ordinais'] = {
+        'colunas': colunas_ord,
+        'modas': [str(m) for m in _etapa(ordinal, 'imputer').statistics_],
+        'categorias': [[str(c) for c in cats] for cats in encoder.categories_],
+        'desconhecido': float(encoder.unknown_value),
+    }
+
+    # Floresta: nós de todas as árvores concatenados, filhos com índices globais
+    n_classes = len(forest.classes_)
+    raizes, feature, threshold, filhos, folhas, probabilidades, coberturas = [], [], [], [], [], [], []
+    deslocamento = 0
+    for arvore in forest.estimators_:
+        t = arvore.tree_
+        folha = t.children_left == -1
+        raizes.append(deslocamento)
+        feature.append(np.where(folha, 0, t.feature).astype(np.int32))
+        threshold.append(t.threshold.astype(np.float64))
+        # Filhos intercalados (esquerdo, direito): o próximo nó é filhos[2 * nó + (x > limiar)]
+        filhos.append(np.column_stack([
+            np.where(folha, -1, t.children_left + deslocamento),
+            np.where(folha, -1, t.children_right + deslocamento),
+        ]).astype(np.int64).ravel())
+        folhas.append(folha)
+
+        proba = t.value[:, 0, :n_classes].astype(np.float64)
+        soma = proba.sum(axis=1)
+        if not np.allclose(soma, 1.0):
+            # Versões antigas do sklearn guardam contagens e normalizam na predição
+            soma[soma == 0.0] = 1.0
+            proba /= soma[:, np.newaxis]
+        probabilidades.append(proba)
+        # Peso das amostras de treino em cada nó: só o SHAP usa (ver `ModeloCompacto.arvores_shap`)
+        coberturas.append(t.weighted_n_node_samples.astype(np.float64))
+        deslocamento += t.node_count
+
+    arrays['arv_raizes'] = np.asarray(raizes, dtype=np.int64)
+    arrays['arv_feature'] = np.concatenate(feature)
+    arrays['arv_threshold'] = np.concatenate(threshold)
+    arrays['arv_filhos'] = np.concatenate(filhos)
+    arrays['arv_folha'] = np.concatenate(folhas)
+    arrays['arv_proba'] = np.concatenate(probabilidades)
+    arrays['arv_cobertura'] = np.concatenate(coberturas)
+    arrays['importancias'] = np.asarray(forest.feature_importances_, dtype=np.float64)
+    manifesto['arrays'] = sorted(arrays)
+
+    # Grava tudo em uma pasta temporária e renomeia: leitores nunca veem uma exportação pela metade
+    diretorio = os.path.abspath(diretorio)
+    if os.path.exists(diretorio):
+        raise FileExistsError(diretorio)
+    temporario = f"{diretorio}.tmp-{os.getpid()}"
+    os.makedirs(temporario)
+    try:
+        for nome, array in arrays.items():
+            np.save(os.path.join(temporario, f'{nome}.npy'), array, allow_pickle=False)
+        with open(os.path.join(temporario, MANIFESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False)
+        os.rename(temporario, diretorio)
+    except OSError:
+        shutil.rmtree(temporario, ignore_errors=True)
+        if os.path.isdir(diretorio):
+            raise FileExistsError(diretorio)
+        raise
+    return diretorio
+
+
+# ==============================================================================
+# AVALIADOR
+# ==============================================================================
+class ModeloCompacto:
+    """
+    Avaliador NumPy do pipeline exportado por `exportar_modelo`.
+
+    Args:
+        diretorio (str): Pasta gerada por `exportar_modelo`.
+        mmap (bool): Abre os arrays com `mmap_mode='r'` (somente leitura, compartilhados
+            entre processos). Com False, os arrays são copiados para a memória do processo.
+    """
+
+    def __init__(self, diretorio: str, mmap: bool = True):
+        with open(os.path.join(diretorio, MANIFESTO), encoding='utf-8') as f:
+            manifesto = json.load(f)
+
+        arrays = {}
+        for nome in manifesto['arrays']:
+            array = np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r' if mmap else None,
+                            allow_pickle=False)
+            # view como ndarray comum: evita o overhead da subclasse np.memmap nas operações
+            arrays[nome] = array.view(np.ndarray)
+
+        self.diretorio = diretorio
+        self.hash_modelo = manifesto.get('hash_modelo')
+        self.classes_ = np.asarray(manifesto['classes'], dtype=object)
+        self.n_arvores = manifesto['n_arvores']
+        self.nomes_features = manifesto['nomes_features']
+        self.importancias = arrays['importancias']
+
+        self._numericas = manifesto['numericas']
+        self._scaler = manifesto['scaler']
+        self._onehot = manifesto['onehot']
+        self._ordinais = manifesto['ordinais']
+        self._posicoes_ordinais = [
+            {c: float(i) for i, c in enumerate(categorias)} for categorias in self._ordinais['categorias']
+        ]
+        # Categorias aprendidas por coluna categórica (validação de lotes, ver `inference.validar_lote`)
+        self.categorias = {
+            col: categorias
+            for grupo in (self._onehot, self._ordinais)
+            for col, categorias in zip(grupo['colunas'], grupo['categorias'])
+        }
+
+        self._num_mediana = arrays['num_mediana']
+        self._num_media = arrays['num_media']
+        self._num_escala = arrays['num_escala']
+
+        self._raizes = arrays['arv_raizes']
+        self._feature = arrays['arv_feature']
+        self._threshold = arrays['arv_threshold']
+        self._filhos = arrays['arv_filhos']
+        self._folha = arrays['arv_folha']
+        self._proba = arrays['arv_proba']
+        # Ausente em exportações anteriores ao explainer compacto
+        self._cobertura = arrays.get('arv_cobertura')
+
+    @property
+    def feature_names_in_(self):
+        return self._numericas + self._onehot['colunas'] + self._ordinais['colunas']
+
+    # ------------------------------------------------------------------
+    # Pré-processamento
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _categorias(serie: pd.Series, moda: str) -> np.ndarray:
+        valores = serie.to_numpy(dtype=object).copy()
+        valores[pd.isna(valores)] = moda
+        return valores
+
+    def transformar(self, dados: pd.DataFrame) -> np.ndarray:
+        """Equivalente a `preprocessor.transform` (float64, mesma ordem de colunas)."""
+        blocos = []
+
+        X_num = dados[self._numericas].to_numpy(dtype=np.float64, copy=True)
+        faltantes = np.isnan(X_num)
+        if faltantes.any():
+            X_num[faltantes] = np.take(self._num_mediana, np.nonzero(faltantes)[1])
+        if self._scaler['with_mean']:
+            X_num -= self._num_media
+        if self._scaler['with_std']:
+            X_num /= self._num_escala
+        blocos.append(X_num)
+
+        for col, moda, categorias in zip(self._onehot['colunas'], self._onehot['modas'], self._onehot['categorias']):
+            valores = self._categorias(dados[col], moda)
+            blocos.append((valores[:, np.newaxis] == np.asarray(categorias, dtype=object)).astype(np.float64))
+
+        desconhecido = self._ordinais['desconhecido']
+        for col, moda, posicao in zip(self._ordinais['colunas'], self._ordinais['modas'], self._posicoes_ordinais):
+            valores = self._categorias(dados[col], moda)
+            codigos = [posicao.get(v, desconhecido) for v in valores]
+            blocos.append(np.asarray(codigos, dtype=np.float64)[:, np.newaxis])
+
+        return np.hstack(blocos)
+
+    # ------------------------------------------------------------------
+    # Floresta
+    # ------------------------------------------------------------------
+    def _folhas(self, X32: np.ndarray) -> np.ndarray:
+        """Nó folha de cada (árvore, linha), percorrendo todas as árvores em paralelo."""
+        n, n_features = X32.shape
+        nos = np.repeat(self._raizes, n)            # (árvores * linhas,) achatado
+        base_linhas = np.tile(np.arange(n, dtype=np.int64) * n_features, len(self._raizes))
+        X_plano = X32.ravel()
+        ativos = np.flatnonzero(~np.take(self._folha, nos))
+        while len(ativos):
+            atuais = np.take(nos, ativos)
+            valores = np.take(X_plano, np.take(base_linhas, ativos) + np.take(self._feature, atuais))
+            # float32 comparado com limiar float64, como no Cython do sklearn (direita se maior)
+            direcao = valores > np.take(self._threshold, atuais)
+            proximos = np.take(self._filhos, 2 * atuais + direcao)
+            nos[ativos] = proximos
+            ativos = ativos[~np.take(self._folha, proximos)]
+        return nos.reshape(len(self._raizes), n)
+
+    def _predict_proba_bloco(self, X32: np.ndarray) -> np.ndarray:
+        por_arvore = np.take(self._proba, self._folhas(X32), axis=0)  # (árvores, linhas, classes)
+        # cumsum acumula na ordem das árvores, como o `out += prediction` do sklearn
+        total = np.cumsum(por_arvore, axis=0)[-1]
+        total /= self.n_arvores
+        return total
+
+    def predict_proba_transformado(self, X_transformado: np.ndarray) -> np.ndarray:
+        """Probabilidades a partir da matriz de `transformar` (como `classifier.predict_proba`)."""
+        X32 = np.asarray(X_transformado, dtype=np.float32)
+        if len(X32) <= TAMANHO_BLOCO:
+            return self._predict_proba_bloco(X32)
+        return np.vstack([
+            self._predict_proba_bloco(X32[inicio:inicio + TAMANHO_BLOCO])
+            for inicio in range(0, len(X32), TAMANHO_BLOCO)
+        ])
+
+    def predict_proba(self, dados: pd.DataFrame) -> np.ndarray:
+        """Probabilidades por classe (mesma ordem de `classes_`), idênticas às do pipeline sklearn."""
+        return self.predict_proba_transformado(self.transformar(dados))
+
+    def predict(self, dados: pd.DataFrame) -> np.ndarray:
+        """Classe de maior probabilidade (desempate pela primeira classe, como o sklearn)."""
+        return self.classes_.take(np.argmax(self.predict_proba(dados), axis=1))
+
+    # ------------------------------------------------------------------
+    # SHAP
+    # ------------------------------------------------------------------
+    def arvores_shap(self) -> Optional[dict]:
+        """
+        Floresta no formato de dicionário aceito por `shap.TreeExplainer`.
+
+        Reproduz o que o `shap` extrai de um `RandomForestClassifier`: valores dos nós
+        normalizados e divididos pelo número de árvores, saída em probabilidade e entrada
+        em float32. O explainer sai dos arrays compartilhados, sem carregar o `.joblib`.
+
+        Returns:
+            dict | None: None se a exportação não tiver os pesos dos nós (exportações antigas).
+        """
+        if self._cobertura is None:
+            return None
+        fins = np.append(self._raizes[1:], len(self._folha))
+        arvores = []
+        for inicio, fim in zip(self._raizes, fins):
+            folha = self._folha[inicio:fim]
+            filhos = self._filhos[2 * inicio:2 * fim].reshape(-1, 2) - inicio
+            esquerdo = np.where(folha, -1, filhos[:, 0])
+            valores = self._proba[inicio:fim]
+            arvores.append({
+                'children_left': esquerdo,
+                'children_right': np.where(folha, -1, filhos[:, 1]),
+                'children_default': esquerdo,  # a entrada já vem imputada: sem valores ausentes
+                'features': np.where(folha, -2, self._feature[inicio:fim]),
+                'thresholds': np.array(self._threshold[inicio:fim]),
+                'values': (valores.T / valores.sum(axis=1)).T * (1.0 / self.n_arvores),
+                'node_sample_weight': np.array(self._cobertura[inicio:fim]),
+            })
+        return {
+            'trees': arvores,
+            'tree_output': 'probability',
+            'objective': 'binary_crossentropy',
+            'input_dtype': np.float32,
+            'internal_dtype': np.float64,
+        }
+
+
+# ==============================================================================
+# PARIDADE
+# ==============================================================================
+CATEGORIA_DESCONHECIDA = '__categoria_desconhecida__'
+
+
+def casos_paridade(dados: pd.DataFrame, modelo: ModeloCompacto, linhas: int = 50) -> pd.DataFrame:
+    """
+    Linhas para `verificar_paridade`: as de `dados` e os casos de borda do pré-processamento.
+
+    Acrescenta, sobre as primeiras `linhas` linhas, uma cópia com cada feature ausente
+    (imputação), uma cópia com cada categórica em uma categoria não vista no treino
+    (one-hot zerado e código ordinal de desconhecido) e uma linha com todas as features ausentes.
+
+    Args:
+        dados (pd.DataFrame): Features brutas, com as colunas de `modelo.feature_names_in_`.
+        modelo (ModeloCompacto): Modelo verificado (define as colunas categóricas).
+        linhas (int): Linhas copiadas em cada caso de borda.
+
+    Returns:
+        pd.DataFrame: Linhas de `dados` seguidas dos casos de borda, com as categóricas em `object`.
+    """
+    base = dados[modelo.feature_names_in_].astype({col: object for col in modelo.categorias})
+    amostra = base.head(linhas)
+    blocos = [base]
+    for col in modelo.feature_names_in_:
+        blocos.append(amostra.assign(**{col: np.nan}))
+    for col in modelo.categorias:
+        blocos.append(amostra.assign(**{col: CATEGORIA_DESCONHECIDA}))
+    blocos.append(amostra.head(1).assign(**{col: np.nan for col in modelo.feature_names_in_}))
+    return pd.concat(blocos, ignore_index=True)
+
+
+def verificar_paridade(pipeline, modelo: ModeloCompacto, dados: pd.DataFrame) -> Optional[str]:
+    """
+    Compara o modelo compacto com o pipeline sklearn nas mesmas linhas.
+
+    Returns:
+        str | None: Descrição da primeira divergência, ou None se as probabilidades
+        forem idênticas bit a bit (e as classes previstas iguais).
+    """
+    if list(modelo.classes_) != list(pipeline.classes_):
+        return "Classes em ordem diferente."
+
+    esperado = pipeline.predict_proba(dados)
+    obtido = modelo.predict_proba(dados)
+    if esperado.shape != obtido.shape:
+        return f"Formato diferente: {esperado.shape} x {obtido.shape}"
+
+    divergentes = np.flatnonzero((esperado != obtido).any(axis=1))
+    if len(divergentes):
+        i = divergentes[0]
+        return (f"{len(divergentes)} linhas divergentes; primeira (linha {i}): "
+                f"diferença máxima {np.abs(esperado[i] - obtido[i]).max():.3e}")
+
+    if not np.array_equal(pipeline.predict(dados), modelo.predict(dados)):
+        return "Classes previstas diferentes."
+    return None
+
+
+def main(argv=None):
+    from model_registry import MODEL_PATH, carregar_ativos, hash_arquivo, obter_modelo_compacto
+
+    parser = argparse.ArgumentParser(
+        description="Exporta o pipeline para o formato compacto e verifica a paridade com o sklearn.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--modelo', default=MODEL_PATH)
+    parser.add_argument('--saida', help="Pasta de destino (padrão: saved_model/modelo_compacto/<versão>)")
+    parser.add_argument('--dados', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'obesity.csv'),
+                        help="CSV usado na verificação de paridade")
+    args = parser.parse_args(argv)
+
+    pipeline, _ = carregar_ativos(args.modelo)
+    if pipeline is None:
+        parser.error(f"Modelo não encontrado: {args.modelo}")
+
+    inicio = time.perf_counter()
+    if args.saida:
+        try:
+            exportar_modelo(pipeline, args.saida, hash_arquivo(args.modelo))
+        except FileExistsError:
+            parser.error(f"A pasta de destino já existe: {args.saida}")
+        modelo = ModeloCompacto(args.saida)
+    else:
+        modelo = obter_modelo_compacto(args.modelo)
+    tamanho = sum(os.path.getsize(os.path.join(modelo.diretorio, f)) for f in os.listdir(modelo.diretorio))
+    print(f"Modelo compacto em: {modelo.diretorio} ({tamanho / 1024:,.0f} KB; "
+          f"joblib: {os.path.getsize(args.modelo) / 1024:,.0f} KB; {(time.perf_counter() - inicio) * 1000:.0f} ms)")
+
+    from data_store import arredondar_escalas, ler_dados
+    dados = casos_paridade(arredondar_escalas(ler_dados(list(pipeline.feature_names_in_), args.dados)), modelo)
+
+    erro = verificar_paridade(pipeline, modelo, dados)
+    if erro:
+        print(f"Paridade FALHOU: {erro}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Paridade OK: predict_proba idêntico bit a bit em {len(dados)} linhas "
+          f"(incluindo valores ausentes e categorias desconhecidas).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Cubo de contagens pré-agregado para os gráficos do Dashboard.
+
+Os gráficos de contagem/proporção (pizza, barras agrupadas, barras 100% e o
+mapa de calor) só precisam do número de pacientes por combinação de
+categorias. O cubo agrupa a base uma única vez em células (combinações
+observadas das dimensões categóricas) e guarda a célula de cada linha. Com um
+filtro ativo, basta contar as linhas selecionadas por célula e somar as
+células da combinação pedida pelo gráfico: o Plotly recebe uma tabela com
+uma linha por categoria, e não a base inteira. Filtros só nas dimensões
+nem precisam das linhas (`contagens_filtros`): cada célula entra ou sai
+inteira.
+
+O mesmo vale para a matriz de correlação: as colunas categóricas são
+constantes dentro de uma célula e, para as colunas numéricas (`medidas`), o
+cubo guarda por célula as estatísticas suficientes do coeficiente de Pearson
+(contagens, somas, somas dos quadrados e produtos cruzados). A matriz de uma
+seleção é a soma dessas estatísticas nas células selecionadas; só as células
+cortadas por um filtro de intervalo precisam das suas linhas.
+
+Quando a base cresce (lotes anexados), `anexar` cria um cubo novo a partir
+das células já existentes e das linhas novas, sem reagrupar a base inteira.
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+COLUNA_CONTAGEM = 'Quantidade'
+
+
+def _matriz(colunas: List[np.ndarray], n_linhas: int) -> np.ndarray:
+    return np.column_stack(colunas) if colunas else np.empty((n_linhas, 0), dtype=np.int64)
+
+
+def _agrupar_celulas(matriz: np.ndarray, tamanhos: List[int]):
+    """
+    Combinações distintas de códigos (linhas de `matriz`) e a combinação de cada linha.
+
+    Returns:
+        Tuple: (células ordenadas, uma por linha; índice da célula de cada linha de `matriz`).
+    """
+    if np.prod(tamanhos, dtype=float) < 2 ** 62:
+        # Cada linha vira um inteiro (base mista) e as células são os valores distintos
+        chave = np.zeros(len(matriz), dtype=np.int64)
+        for i, tamanho in enumerate(tamanhos):
+            chave = chave * tamanho + matriz[:, i]
+        chaves_celula, celula_da_linha = np.unique(chave, return_inverse=True)
+        celulas = np.column_stack(np.unravel_index(chaves_celula, tamanhos)) if tamanhos \
+            else np.empty((len(chaves_celula), 0), dtype=np.int64)
+    else:
+        celulas, celula_da_linha = np.unique(matriz, axis=0, return_inverse=True)
+    return celulas, celula_da_linha.ravel()
+
+
+def _momentos(celula_da_linha: np.ndarray, valores: np.ndarray, n_celulas: int) -> np.ndarray:
+    """
+    Estatísticas suficientes de Pearson por célula, com pares completos (como `DataFrame.corr`).
+
+    Returns:
+        np.ndarray: Forma (n_celulas, 4, m, m). Para as medidas k e l, somando só as linhas em
+        que as duas são válidas: [0] número de linhas, [1] soma de k, [2] soma de k² e
+        [3] soma de k * l.
+    """
+    m = valores.shape[1]
+    validos = ~np.isnan(valores)
+    x = np.where(validos, valores, 0.0)
+    v = validos.astype(float)
+    momentos = np.empty((n_celulas, 4, m, m))
+    for k in range(m):
+        for l in range(m):
+            momentos[:, 1, k, l] = np.bincount(celula_da_linha, weights=x[:, k] * v[:, l], minlength=n_celulas)
+            momentos[:, 2, k, l] = np.bincount(celula_da_linha, weights=x[:, k] ** 2 * v[:, l], minlength=n_celulas)
+            if l < k:  # contagem e produto cruzado são simétricos
+                momentos[:, [0, 3], k, l] = momentos[:, [0, 3], l, k]
+                continue
+            momentos[:, 0, k, l] = np.bincount(celula_da_linha, weights=v[:, k] * v[:, l], minlength=n_celulas)
+            momentos[:, 3, k, l] = np.bincount(celula_da_linha, weights=x[:, k] * x[:, l], minlength=n_celulas)
+    return momentos
+
+
+def _numero(valor) -> bool:
+    return isinstance(valor, (int, float, np.number)) and not isinstance(valor, (bool, np.bool_))
+
+
+class CuboContagens:
+    """
+    Contagens por combinação de categorias, recalculáveis para qualquer máscara de linhas.
+
+    Args:
+        df (pd.DataFrame): Base de dados (não deve ser alterada depois da criação do cubo).
+        dimensoes (Iterable[str]): Colunas categóricas disponíveis para agregação.
+        medidas (Iterable[str]): Colunas numéricas fora das dimensões que entram na correlação.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensoes: Iterable[str], medidas: Iterable[str] = ()):
+        self.dimensoes = list(dimensoes)
+        self.medidas = list(medidas)
+        self.n_linhas = len(df)
+        # Dimensões de tipo numérico (não categórico): entram na correlação mesmo sem linhas
+        self._dimensoes_numericas = {
+            col for col in self.dimensoes
+            if pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype)
+        }
+        self._categorias = {}
+        codigos = []
+        for col in self.dimensoes:
+            # Ordem de aparição, a mesma que o Plotly usaria com as linhas brutas
+            cod, categorias = pd.factorize(df[col], sort=False)
+            self._categorias[col] = np.asarray(categorias, dtype=object)
+            # Valores ausentes viram uma categoria extra, descartada nas consultas
+            codigos.append(np.where(cod == -1, len(categorias), cod))
+
+        tamanhos = [len(self._categorias[col]) + 1 for col in self.dimensoes]
+        celulas, self._celula_da_linha = _agrupar_celulas(_matriz(codigos, self.n_linhas), tamanhos)
+        self._definir_celulas(celulas)
+
+        # Medidas centradas na média da base: a correlação não muda e as somas perdem menos precisão
+        valores = df[self.medidas].to_numpy(dtype=float).reshape(self.n_linhas, len(self.medidas))
+        self._referencias = np.nan_to_num(df[self.medidas].mean().to_numpy(dtype=float))
+        self._valores = valores - self._referencias
+        self._momentos = _momentos(self._celula_da_linha, self._valores, self.n_celulas)
+
+    def _definir_celulas(self, celulas: np.ndarray):
+        self._codigos_celula = {col: celulas[:, i] for i, col in enumerate(self.dimensoes)}
+        self.n_celulas = len(celulas)
+        self._contagens_totais = np.bincount(self._celula_da_linha, minlength=self.n_celulas)
+        # Combinação (grupo, coluna) de cada célula, guardada na primeira chamada de `medias`
+        self._chaves_pares = {}
+
+    def anexar(self, df_novo: pd.DataFrame) -> 'CuboContagens':
+        """
+        Novo cubo com as linhas de `df_novo` acrescentadas ao fim da base (este cubo não muda).
+
+        Só as linhas novas são codificadas: as categorias novas entram no fim da lista de
+        cada dimensão e as células são reagrupadas a partir das células existentes (poucas)
+        mais as linhas novas. O resultado é o mesmo de um cubo criado sobre a base concatenada.
+
+        Args:
+            df_novo (pd.DataFrame): Linhas novas, com as mesmas colunas do frame original.
+
+        Returns:
+            CuboContagens: Cubo para `n_linhas + len(df_novo)` linhas.
+        """
+        novo = object.__new__(CuboContagens)
+        novo.dimensoes = self.dimensoes
+        novo.medidas = self.medidas
+        novo._dimensoes_numericas = self._dimensoes_numericas
+        novo.n_linhas = self.n_linhas + len(df_novo)
+        novo._categorias = {}
+        codigos_celulas, codigos_linhas = [], []
+        for col in self.dimensoes:
+            antigas = self._categorias[col]
+            cod, categorias_lote = pd.factorize(df_novo[col], sort=False)
+            categorias_lote = np.asarray(categorias_lote, dtype=object)
+            extras = categorias_lote[pd.Index(antigas).get_indexer(categorias_lote) == -1]
+            categorias = np.concatenate([antigas, extras])
+            novo._categorias[col] = categorias
+
+            # O código de "ausente" é o tamanho da lista: acompanha as categorias novas
+            celulas_col = self._codigos_celula[col]
+            codigos_celulas.append(np.where(celulas_col == len(antigas), len(categorias), celulas_col))
+            posicoes = np.append(pd.Index(categorias).get_indexer(categorias_lote), len(categorias))
+            codigos_linhas.append(posicoes[cod])
+
+        tamanhos = [len(novo._categorias[col]) + 1 for col in self.dimensoes]
+        matriz = np.vstack([_matriz(codigos_celulas, self.n_celulas), _matriz(codigos_linhas, len(df_novo))])
+        celulas, celula = _agrupar_celulas(matriz, tamanhos)
+        novo._celula_da_linha = np.concatenate([celula[:self.n_celulas][self._celula_da_linha],
+                                                celula[self.n_celulas:]])
+        novo._definir_celulas(celulas)
+
+        # Cada célula antiga vira uma célula distinta do cubo novo: basta somar as linhas novas
+        valores_novos = df_novo[self.medidas].to_numpy(dtype=float).reshape(len(df_novo), len(self.medidas))
+        novo._referencias = self._referencias
+        novo._valores = np.vstack([self._valores, valores_novos - self._referencias])
+        novo._momentos = _momentos(celula[self.n_celulas:], novo._valores[self.n_linhas:], novo.n_celulas)
+        novo._momentos[celula[:self.n_celulas]] += self._momentos
+        return novo
+
+    def contagens_celulas(self, mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """Número de linhas selecionadas em cada célula do cubo (todas, se `mascara` for None)."""
+        if mascara is None or mascara.all():
+            return self._contagens_totais
+        return np.bincount(self._celula_da_linha[mascara], minlength=self.n_celulas)
+
+    def contagens_filtros(self, filtros: Dict[str, Iterable]) -> np.ndarray:
+        """
+        Número de linhas selecionadas em cada célula por filtros de lista de valores nas dimensões.
+
+        Uma dimensão é constante dentro da célula, então a célula inteira entra ou sai:
+        o custo depende do número de células, e não do número de linhas. Valores
+        ausentes nunca são selecionados (como no `MotorFiltros`).
+
+        Args:
+            filtros (dict): Dimensão -> valores selecionados.
+
+        Returns:
+            np.ndarray: Contagens por célula, como em `contagens_celulas`.
+        """
+        selecionadas = np.ones(self.n_celulas, dtype=bool)
+        for col, valores in filtros.items():
+            # Tabela de consulta: a última posição é "ausente"
+            tabela = np.append(pd.Index(self._categorias[col]).isin(list(valores)), False)
+            selecionadas &= tabela[self._codigos_celula[col]]
+        if selecionadas.all():
+            return self._contagens_totais
+        return np.where(selecionadas, self._contagens_totais, 0)
+
+    def contagens(self, colunas: List[str], mascara: Optional[np.ndarray] = None,
+                  por_celula: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Agrega o cubo nas dimensões pedidas.
+
+        Args:
+            colunas (list): Dimensões do resultado (ex: ['Histórico Familiar', 'Nível de Obesidade']).
+            mascara (np.ndarray): Linhas selecionadas pelos filtros. Ignorada se `por_celula` for informado.
+            por_celula (np.ndarray): Resultado de `contagens_celulas`, para reaproveitar entre gráficos.
+
+        Returns:
+            pd.DataFrame: Uma linha por combinação com contagem positiva, com as colunas pedidas
+            e a coluna 'Quantidade', na ordem de aparição das categorias.
+        """
+        if por_celula is None:
+            por_celula = self.contagens_celulas(mascara)
+
+        tamanhos = [len(self._categorias[col]) + 1 for col in colunas]
+        chave = np.zeros(self.n_celulas, dtype=np.int64)
+        for col, tamanho in zip(colunas, tamanhos):
+            chave = chave * tamanho + self._codigos_celula[col]
+
+        somas = np.bincount(chave, weights=por_celula, minlength=int(np.prod(tamanhos)))
+        combinacoes = np.flatnonzero(somas)
+        posicoes = np.unravel_index(combinacoes, tamanhos)
+
+        validas = np.ones(len(combinacoes), dtype=bool)
+        resultado = {}
+        for col, pos in zip(colunas, posicoes):
+            categorias = self._categorias[col]
+            validas &= pos < len(categorias)
+            resultado[col] = categorias[np.minimum(pos, len(categorias) - 1)] if len(categorias) else pos
+
+        df_contagens = pd.DataFrame(resultado)
+        df_contagens[COLUNA_CONTAGEM] = somas[combinacoes].astype(np.int64)
+        return df_contagens[validas].reset_index(drop=True)
+
+    def media_ponderada(self, grupo: str, coluna: str, valores: dict,
+                        mascara: Optional[np.ndarray] = None,
+                        por_celula: Optional[np.ndarray] = None) -> Optional[pd.Series]:
+        """
+        Média de `coluna` por categoria de `grupo`, após converter as categorias com `valores`.
+
+        Categorias ausentes de `valores` são mantidas como estão (como em `replace`); se alguma
+        categoria presente na seleção não for numérica (ou se a seleção estiver vazia), retorna None.
+
+        Returns:
+            pd.Series | None: Médias indexadas pelas categorias de `grupo`.
+        """
+        return media_ponderada_contagens(self.contagens([grupo, coluna], mascara, por_celula), grupo, coluna, valores)
+
+    def medias(self, grupo: str, colunas: List[str], valores: dict,
+               mascara: Optional[np.ndarray] = None,
+               por_celula: Optional[np.ndarray] = None) -> Optional[pd.DataFrame]:
+        """
+        Médias de várias colunas por categoria de `grupo`, numa única passada pelas células.
+
+        Cada coluna segue as regras de `media_ponderada`: as categorias são convertidas com
+        `valores` uma vez (o valor é constante na célula) e a coluna é descartada se alguma
+        categoria presente na seleção não for numérica.
+
+        Returns:
+            pd.DataFrame | None: Uma linha por categoria de `grupo` presente e uma coluna por
+            coluna mantida, ou None se nenhuma coluna for mantida.
+        """
+        if por_celula is None:
+            por_celula = self.contagens_celulas(mascara)
+        categorias_grupo = self._categorias[grupo]
+        codigo_grupo = self._codigos_celula[grupo]
+        n_grupos = len(categorias_grupo) + 1  # a última posição é "ausente"
+
+        mantidas, somas, quantidades = [], [], []
+        for col in colunas:
+            categorias = self._categorias[col]
+            # Seleção contada por (grupo, categoria): as médias saem desta tabela pequena
+            chave = self._chaves_pares.get((grupo, col))
+            if chave is None:
+                chave = self._chaves_pares[(grupo, col)] = \
+                    codigo_grupo * (len(categorias) + 1) + self._codigos_celula[col]
+            tabela = np.bincount(chave, weights=por_celula, minlength=n_grupos * (len(categorias) + 1))
+            tabela = tabela.reshape(n_grupos, len(categorias) + 1)[:-1, :-1]
+            presentes = tabela.sum(axis=0) > 0
+            numeros = np.zeros(len(categorias))
+            for i, categoria in enumerate(categorias):
+                numero = valores.get(categoria, categoria)
+                if _numero(numero):
+                    numeros[i] = numero
+                elif presentes[i]:
+                    break
+            else:
+                if presentes.any():
+                    mantidas.append(col)
+                    somas.append(tabela @ numeros)
+                    quantidades.append(tabela.sum(axis=1))
+        if not mantidas:
+            return None
+
+        somas, quantidades = np.column_stack(somas), np.column_stack(quantidades)
+        linhas = quantidades.any(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resultado = np.where(quantidades > 0, somas / quantidades, np.nan)
+        return pd.DataFrame(resultado[linhas], index=pd.Index(categorias_grupo[linhas], name=grupo), columns=mantidas)
+
+    def _momentos_selecao(self, medidas: List[int], mascara: Optional[np.ndarray],
+                          por_celula: np.ndarray) -> np.ndarray:
+        """
+        Estatísticas das medidas (posições em `self.medidas`) na seleção, por célula.
+
+        As células inteiramente selecionadas usam as estatísticas guardadas; só as linhas
+        selecionadas das células cortadas pela máscara são lidas.
+        """
+        momentos = self._momentos[:, :, medidas][:, :, :, medidas]
+        cheias = por_celula == self._contagens_totais
+        if not medidas or cheias.all():
+            return momentos
+        momentos = np.where(cheias[:, None, None, None], momentos, 0.0)
+        parciais = (por_celula > 0) & ~cheias
+        if parciais.any():
+            if mascara is None:
+                raise ValueError("Células parcialmente selecionadas exigem a máscara de linhas.")
+            linhas = np.flatnonzero(mascara & parciais[self._celula_da_linha])
+            momentos += _momentos(self._celula_da_linha[linhas], self._valores[np.ix_(linhas, medidas)],
+                                  self.n_celulas)
+        return momentos
+
+    def medias_medidas(self, colunas: List[str], mascara: Optional[np.ndarray] = None,
+                       por_celula: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Média de cada medida na seleção, ignorando valores ausentes (como `Series.mean`).
+
+        Args:
+            colunas (list): Medidas (colunas de `self.medidas`).
+            mascara (np.ndarray): Linhas selecionadas (None = todas, ou a seleção de `por_celula`
+                quando ela não corta nenhuma célula).
+            por_celula (np.ndarray): Resultado de `contagens_celulas`/`contagens_filtros`.
+
+        Returns:
+            pd.Series: Médias indexadas pelas colunas (NaN sem valores válidos).
+        """
+        if por_celula is None:
+            por_celula = self.contagens_celulas(mascara)
+        medidas = [self.medidas.index(col) for col in colunas]
+        diagonal = np.arange(len(medidas))
+        momentos = self._momentos_selecao(medidas, mascara, por_celula).sum(axis=0)
+        quantidades, somas = momentos[0][diagonal, diagonal], momentos[1][diagonal, diagonal]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            medias = np.where(quantidades > 0, somas / quantidades, np.nan) + self._referencias[medidas]
+        return pd.Series(medias, index=colunas)
+
+    def correlacao(self, colunas: List[str], valores: Dict[str, dict],
+                   mascara: Optional[np.ndarray] = None,
+                   por_celula: Optional[np.ndarray] = None) -> Optional[pd.DataFrame]:
+        """
+        Correlação de Pearson entre as colunas, somando as estatísticas das células selecionadas.
+
+        Equivale a `DataFrame.corr` sobre as linhas selecionadas depois de converter as
+        categorias com `valores` (como em `replace`). Uma dimensão só entra se todas as suas
+        categorias presentes na seleção virarem números; as medidas entram sempre. As
+        células inteiramente selecionadas usam as estatísticas guardadas; só as linhas
+        selecionadas das células cortadas pela máscara são lidas.
+
+        Args:
+            colunas (list): Dimensões e medidas candidatas, na ordem da matriz.
+            valores (dict): Conversão categoria -> número de cada dimensão (ausente = identidade).
+            mascara (np.ndarray): Linhas selecionadas pelos filtros (None = todas, ou a seleção
+                de `por_celula` quando ela não corta nenhuma célula).
+            por_celula (np.ndarray): Resultado de `contagens_celulas`/`contagens_filtros`, para reaproveitar.
+
+        Returns:
+            pd.DataFrame | None: Matriz de correlação, ou None com menos de duas colunas numéricas.
+        """
+        if por_celula is None:
+            por_celula = self.contagens_celulas(mascara)
+        pesos = por_celula.astype(float)
+
+        nomes, posicoes_medidas, medidas, posicoes_dimensoes, constantes = [], [], [], [], []
+        for col in colunas:
+            if col in self.medidas:
+                posicoes_medidas.append(len(nomes))
+                medidas.append(self.medidas.index(col))
+                nomes.append(col)
+                continue
+
+            categorias = self._categorias[col]
+            conversao = valores.get(col, {})
+            presentes = np.bincount(self._codigos_celula[col], weights=pesos, minlength=len(categorias) + 1) > 0
+            numeros = np.full(len(categorias) + 1, np.nan)  # a última posição é "ausente"
+            for i, categoria in enumerate(categorias):
+                numero = conversao.get(categoria, categoria)
+                if _numero(numero):
+                    numeros[i] = numero
+                elif presentes[i]:
+                    break
+            else:
+                if presentes[:-1].any() or col in self._dimensoes_numericas:
+                    posicoes_dimensoes.append(len(nomes))
+                    constantes.append(numeros[self._codigos_celula[col]])
+                    nomes.append(col)
+        if len(nomes) < 2:
+            return None
+
+        momentos = self._momentos_selecao(medidas, mascara, por_celula)
+
+        # N: linhas com as duas colunas válidas; S: soma de i; Q: soma de i²; P: soma de i * j
+        n, s, q, p = (np.zeros((len(nomes), len(nomes))) for _ in range(4))
+        pm, pdim = np.array(posicoes_medidas, dtype=int), np.array(posicoes_dimensoes, dtype=int)
+        for matriz, total in zip((n, s, q, p), momentos.sum(axis=0)):
+            matriz[np.ix_(pm, pm)] = total
+
+        d = np.column_stack(constantes) if constantes else np.empty((self.n_celulas, 0))
+        dv = (~np.isnan(d)).astype(float)
+        d0 = np.nan_to_num(d)
+        ponderadas = pesos[:, None] * dv
+        n[np.ix_(pdim, pdim)] = dv.T @ ponderadas
+        s[np.ix_(pdim, pdim)] = d0.T @ ponderadas
+        q[np.ix_(pdim, pdim)] = (d0 ** 2).T @ ponderadas
+        p[np.ix_(pdim, pdim)] = d0.T @ (pesos[:, None] * d0)
+
+        # Medida x dimensão: a dimensão é constante na célula
+        diagonal = np.arange(len(medidas))
+        nk, sk, qk = (momentos[:, i][:, diagonal, diagonal] for i in range(3))
+        n[np.ix_(pm, pdim)] = nk.T @ dv
+        s[np.ix_(pm, pdim)] = sk.T @ dv
+        q[np.ix_(pm, pdim)] = qk.T @ dv
+        p[np.ix_(pm, pdim)] = sk.T @ d0
+        n[np.ix_(pdim, pm)] = dv.T @ nk
+        s[np.ix_(pdim, pm)] = d0.T @ nk
+        q[np.ix_(pdim, pm)] = (d0 ** 2).T @ nk
+        p[np.ix_(pdim, pm)] = d0.T @ sk
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variancia = n * q - s ** 2
+            corr = (n * p - s * s.T) / np.sqrt(variancia * variancia.T)
+        corr[(variancia <= 0) | (variancia.T <= 0)] = np.nan
+        corr = np.clip(corr, -1, 1)
+        np.fill_diagonal(corr, np.where(np.diag(variancia) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=nomes, columns=nomes)
+
+
+def media_ponderada_contagens(tabela: pd.DataFrame, grupo: str, coluna: str, valores: dict) -> Optional[pd.Series]:
+    """
+    Média de `coluna` por categoria de `grupo` a partir de uma tabela de contagens
+    (colunas `grupo`, `coluna` e 'Quantidade'). Ver `CuboContagens.media_ponderada`.
+    """
+    numericos = pd.to_numeric(tabela[coluna].map(lambda v: valores.get(v, v)), errors='coerce')
+    if numericos.empty or numericos.isna().any():
+        return None
+
+    pesos = tabela[COLUNA_CONTAGEM]
+    soma = (numericos * pesos).groupby(tabela[grupo], sort=False).sum()
+    return soma / pesos.groupby(tabela[grupo], sort=False).sum()
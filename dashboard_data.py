@@ -0,0 +1,188 @@
+"""
+Camada de dados do Dashboard Analítico.
+
+O frame de exibição (valores arredondados, traduzidos para PT e colunas
+renomeadas) não depende dos filtros, então é construído uma única vez por
+versão do dataset e compartilhado entre todas as sessões. A versão é o hash
+do CSV fonte mais a lista de lotes anexados (ver `data_store`). Quando só
+chegam lotes novos, apenas eles são lidos e traduzidos, e o frame, o motor de
+filtros e o cubo de contagens são estendidos com as linhas novas; o resto da
+base não é reprocessado. As colunas de texto são guardadas como
+`Categorical`, o que reduz memória e acelera groupbys e filtros.
+
+O frame retornado é compartilhado: trate-o como somente leitura.
+"""
+import threading
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+
+from constants import (
+    DICT_FCVC_TEXT, DICT_CH2O_TEXT, DICT_FAF_TEXT, DICT_TUE_TEXT,
+    DICT_TRADUCAO_GERAL, DICT_COLUNAS_PT, ORDEM_OBESIDADE
+)
+from count_cube import CuboContagens
+from data_store import CSV_PATH, ler_dados, ler_lotes, versao_dataset
+from filter_engine import MotorFiltros
+
+DATA_PATH = CSV_PATH
+
+COLUNAS_FILTRO_NUMERICAS = ['Idade', 'Altura', 'Peso']
+COLUNAS_FILTRO_CATEGORICAS = [
+    'Nível de Obesidade', 'Gênero', 'Histórico Familiar', 'Consumo Calórico', 'Consumo de Vegetais',
+    'Refeições por Dia', 'Comer entre Refeições', 'Consumo de Água', 'Monitora Calorias',
+    'Consumo de Álcool', 'Fumante', 'Atividade Física', 'Tempo em Tecnologia', 'Transporte'
+]
+
+# Ordem lógica das categorias ordinais (as demais seguem a ordem de aparição)
+ORDEM_CATEGORIAS = {
+    'Nível de Obesidade': ORDEM_OBESIDADE,
+    'Consumo de Vegetais': list(DICT_FCVC_TEXT.values()),
+    'Consumo de Água': list(DICT_CH2O_TEXT.values()),
+    'Atividade Física': list(DICT_FAF_TEXT.values()),
+    'Tempo em Tecnologia': list(DICT_TUE_TEXT.values()),
+}
+
+_trava = threading.Lock()
+
+# Versão do dataset em memória e as estruturas construídas para ela (motor e cubo sob demanda)
+_estado = {'caminho': None, 'versao': None, 'frame': None, 'motor': None, 'cubo': None}
+
+
+def carregar_dados_brutos(caminho: str = DATA_PATH, lotes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Lê a base (Parquet derivado do CSV + lotes; todos se `lotes` for None), com a coluna alvo como 'Obesity'."""
+    return ler_dados(caminho_csv=caminho, lotes=lotes)
+
+
+def preparar_frame_exibicao(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arredonda as escalas, traduz os valores para PT e renomeia as colunas.
+
+    Args:
+        df_raw (pd.DataFrame): Dados brutos (códigos em inglês).
+
+    Returns:
+        pd.DataFrame: Frame de exibição com colunas de texto em `Categorical`.
+    """
+    df = df_raw.copy()
+
+    if 'NCP' in df.columns:
+        df['NCP'] = pd.to_numeric(df['NCP'], errors='coerce').fillna(1).round().astype(int)
+
+    for col in ['FCVC', 'CH2O', 'FAF', 'TUE']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round().astype(int)
+
+    if 'FCVC' in df.columns: df['FCVC'] = df['FCVC'].map(DICT_FCVC_TEXT).fillna(df['FCVC'])
+    if 'CH2O' in df.columns: df['CH2O'] = df['CH2O'].map(DICT_CH2O_TEXT).fillna(df['CH2O'])
+    if 'FAF' in df.columns:  df['FAF']  = df['FAF'].map(DICT_FAF_TEXT).fillna(df['FAF'])
+    if 'TUE' in df.columns:  df['TUE']  = df['TUE'].map(DICT_TUE_TEXT).fillna(df['TUE'])
+
+    df.rename(columns=DICT_COLUNAS_PT, inplace=True)
+
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        # Tradução feita sobre as categorias (poucos valores), não sobre cada linha
+        categorico = df[col].astype('category')
+        categorico = categorico.cat.rename_categories(
+            lambda valor: DICT_TRADUCAO_GERAL.get(valor, valor)
+        )
+        df[col] = categorico.cat.reorder_categories(_ordenar_categorias(col, categorico.cat.categories))
+
+    return df
+
+
+def _ordenar_categorias(col: str, categorias) -> list:
+    """Categorias ordinais na ordem lógica (`ORDEM_CATEGORIAS`), seguidas das demais."""
+    categorias = list(categorias)
+    if col not in ORDEM_CATEGORIAS:
+        return categorias
+    ordem = [c for c in ORDEM_CATEGORIAS[col] if c in categorias]
+    return ordem + [c for c in categorias if c not in ordem]
+
+
+def concatenar_frames(df: pd.DataFrame, df_novo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta linhas de exibição ao fim de um frame, unindo as categorias das colunas `Categorical`.
+
+    As categorias do frame atual mantêm a ordem; as que só existem nas linhas novas entram
+    no fim (nas colunas ordinais, todas seguem `ORDEM_CATEGORIAS`).
+    """
+    df, df_novo = df.copy(deep=False), df_novo.copy(deep=False)
+    for col in df.select_dtypes(include='category').columns:
+        atuais = df[col].cat.categories
+        novas = df_novo[col].astype('category').cat.categories
+        categorias = _ordenar_categorias(col, atuais.append(novas.difference(atuais, sort=False)))
+        if categorias != list(atuais):
+            df[col] = df[col].cat.set_categories(categorias)
+        df_novo[col] = pd.Categorical(df_novo[col], categories=categorias)
+    return pd.concat([df, df_novo], ignore_index=True)
+
+
+def sem_categorias(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia com as colunas `Categorical` convertidas de volta ao tipo dos valores (para `replace`/`corr`)."""
+    tipos = {col: df[col].cat.categories.dtype for col in df.select_dtypes(include='category').columns}
+    return df.astype(tipos)
+
+
+def _atualizar(caminho: str):
+    """Deixa `_estado` na versão atual do dataset (chamar com `_trava`)."""
+    versao = versao_dataset(caminho)
+    if _estado['caminho'] == caminho and _estado['versao'] == versao:
+        return
+
+    hash_dados, lotes = versao
+    anterior = _estado['versao'] if _estado['caminho'] == caminho else None
+    if anterior and anterior[0] == hash_dados and lotes[:len(anterior[1])] == anterior[1]:
+        # Só chegaram lotes: traduz as linhas novas e estende as estruturas existentes
+        df_novo = preparar_frame_exibicao(ler_lotes(lotes[len(anterior[1]):], caminho_csv=caminho))
+        _estado['frame'] = concatenar_frames(_estado['frame'], df_novo)
+        if _estado['motor'] is not None:
+            _estado['motor'] = _estado['motor'].anexar(df_novo)
+        if _estado['cubo'] is not None:
+            _estado['cubo'] = _estado['cubo'].anexar(df_novo)
+    else:
+        _estado.update(frame=preparar_frame_exibicao(carregar_dados_brutos(caminho, lotes)), motor=None, cubo=None)
+    _estado.update(caminho=caminho, versao=versao)
+
+
+def obter_dados_dashboard(caminho: str = DATA_PATH) -> Tuple[pd.DataFrame, MotorFiltros, CuboContagens]:
+    """
+    Frame de exibição, motor de filtros e cubo de contagens da mesma versão do dataset.
+
+    Use esta função quando precisar dos três juntos: chamadas separadas podem pegar
+    versões diferentes se um lote for anexado entre elas.
+
+    Raises:
+        FileNotFoundError: Se o arquivo de dados não existir.
+    """
+    with _trava:
+        _atualizar(caminho)
+        if _estado['motor'] is None:
+            _estado['motor'] = MotorFiltros(_estado['frame'], COLUNAS_FILTRO_CATEGORICAS, COLUNAS_FILTRO_NUMERICAS)
+        if _estado['cubo'] is None:
+            _estado['cubo'] = CuboContagens(
+                _estado['frame'], COLUNAS_FILTRO_CATEGORICAS, COLUNAS_FILTRO_NUMERICAS
+            )
+        return _estado['frame'], _estado['motor'], _estado['cubo']
+
+
+def obter_frame_exibicao(caminho: str = DATA_PATH) -> pd.DataFrame:
+    """
+    Frame de exibição do Dashboard, em cache pela versão do dataset.
+
+    Raises:
+        FileNotFoundError: Se o arquivo de dados não existir.
+    """
+    with _trava:
+        _atualizar(caminho)
+        return _estado['frame']
+
+
+def obter_motor_filtros(caminho: str = DATA_PATH) -> MotorFiltros:
+    """Motor de filtros ligado ao frame de exibição da mesma versão do dataset."""
+    return obter_dados_dashboard(caminho)[1]
+
+
+def obter_cubo_contagens(caminho: str = DATA_PATH) -> CuboContagens:
+    """Cubo de contagens (dimensões categóricas e medidas numéricas) do frame de exibição da mesma versão do dataset."""
+    return obter_dados_dashboard(caminho)[2]
@@ -0,0 +1,126 @@
+"""
+Exportação das linhas selecionadas no Dashboard (CSV, Parquet ou Excel).
+
+O arquivo é gravado em disco bloco a bloco, a partir de um iterador de
+DataFrames (`Selecao.blocos()` do `query_engine`): a memória usada depende do
+tamanho do bloco, não do tamanho da seleção. A página só gera o arquivo quando
+o usuário pede, e não a cada rerun.
+
+- CSV: o cabeçalho vai só no primeiro bloco; o resultado é igual ao
+  `to_csv(index=False)` da seleção inteira.
+- Parquet: um row group por bloco (`pyarrow.parquet.ParquetWriter`); os
+  rótulos categóricos são gravados como texto.
+- Excel: `xlsxwriter` em modo `constant_memory` (cada linha vai para o disco
+  assim que é escrita). Limitado a `LIMITE_LINHAS_EXCEL` linhas.
+"""
+import os
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+FORMATOS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+# Linhas de uma planilha do Excel, descontado o cabeçalho
+LIMITE_LINHAS_EXCEL = 1_048_575
+
+
+def _escrever_csv(blocos: Iterable[pd.DataFrame], destino: str) -> int:
+    total = 0
+    with open(destino, 'w', encoding='utf-8', newline='') as arquivo:
+        for i, bloco in enumerate(blocos):
+            bloco.to_csv(arquivo, index=False, header=i == 0)
+            total += len(bloco)
+    return total
+
+
+def _esquema_parquet(bloco: pd.DataFrame):
+    import pyarrow as pa
+
+    campos = []
+    for col, dtype in bloco.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            tipo = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            tipo = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            tipo = pa.float64()
+        else:
+            tipo = pa.string()  # texto e categorias
+        campos.append(pa.field(col, tipo))
+    return pa.schema(campos)
+
+
+def _escrever_parquet(blocos: Iterable[pd.DataFrame], destino: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total, escritor = 0, None
+    try:
+        for bloco in blocos:
+            if escritor is None:
+                # Esquema fixado no primeiro bloco: os blocos seguintes são convertidos para ele
+                esquema = _esquema_parquet(bloco)
+                escritor = pq.ParquetWriter(destino, esquema)
+            texto = {col: bloco[col].astype(object) for col in bloco.columns
+                     if isinstance(bloco[col].dtype, pd.CategoricalDtype)}
+            tabela = pa.Table.from_pandas(bloco.assign(**texto), schema=esquema, preserve_index=False)
+            escritor.write_table(tabela)
+            total += len(bloco)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        pd.DataFrame().to_parquet(destino)
+    return total
+
+
+def _escrever_excel(blocos: Iterable[pd.DataFrame], destino: str) -> int:
+    import xlsxwriter
+
+    total = 0
+    with xlsxwriter.Workbook(destino, {'constant_memory': True, 'nan_inf_to_errors': True}) as livro:
+        planilha = livro.add_worksheet()
+        for i, bloco in enumerate(blocos):
+            if i == 0:
+                planilha.write_row(0, 0, list(bloco.columns), livro.add_format({'bold': True}))
+            if total + len(bloco) > LIMITE_LINHAS_EXCEL:
+                raise ValueError(f"O Excel comporta até {LIMITE_LINHAS_EXCEL:,} linhas. Use CSV ou Parquet.")
+            # Ausentes viram células vazias (como o `na_rep=''` do pandas)
+            valores = bloco.astype(object).where(bloco.notna(), None).to_numpy()
+            for j, linha in enumerate(valores, start=total + 1):
+                planilha.write_row(j, 0, [v.item() if isinstance(v, np.generic) else v for v in linha])
+            total += len(bloco)
+    return total
+
+
+_ESCRITORES = {'CSV': _escrever_csv, 'Parquet': _escrever_parquet, 'Excel': _escrever_excel}
+
+
+def exportar(blocos: Iterable[pd.DataFrame], formato: str, destino: str) -> int:
+    """
+    Grava os blocos em `destino`, um de cada vez.
+
+    Args:
+        blocos (Iterable[pd.DataFrame]): Blocos de linhas com as mesmas colunas (ex: `selecao.blocos()`).
+        formato (str): 'CSV', 'Parquet' ou 'Excel' (ver `FORMATOS`).
+        destino (str): Caminho do arquivo. Um arquivo incompleto é removido se a gravação falhar.
+
+    Returns:
+        int: Número de linhas gravadas.
+
+    Raises:
+        ValueError: Formato desconhecido ou seleção acima de `LIMITE_LINHAS_EXCEL` no Excel.
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}. Use {', '.join(FORMATOS)}.")
+    try:
+        return _ESCRITORES[formato](blocos, destino)
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
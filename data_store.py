@@ -0,0 +1,337 @@
+"""
+Base de pacientes em formato colunar (Parquet).
+
+O CSV `data/obesity.csv` continua sendo a fonte dos dados. Na primeira
+leitura, e sempre que o SHA-256 dele mudar, ele é convertido uma única vez
+para `data/obesity_parquet/base.parquet`:
+
+- nome da coluna alvo normalizado ('NObeyesdad' -> 'Obesity');
+- colunas numéricas em float64;
+- colunas de texto como `category` (dicionário no Parquet: cada valor
+  distinto é gravado uma vez).
+
+Registros novos entram por `anexar_lote` como partições somente-anexo
+(`lote-000001-<hash>.parquet`, ...), validadas contra as listas de features
+do `train.Config`. Um lote gravado nunca é reescrito: a base e os lotes são
+lidos sempre na mesma ordem, então a posição de cada linha não muda quando a
+base cresce.
+
+O Dashboard, a avaliação e o treino leem por `ler_dados(colunas=...)`, que
+carrega do disco apenas as colunas pedidas. As linhas ficam na ordem do CSV
+seguida dos lotes (o índice é a posição da linha), que é a referência de
+`test_indices` nos metadados do modelo.
+
+Uso (anexar um lote):
+    python data_store.py novos_pacientes.csv
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from model_registry import assinatura_arquivo, hash_arquivo
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(BASE_DIR, 'data', 'obesity.csv')
+
+COLUNA_ALVO = 'Obesity'
+RENOMEAR_COLUNAS = {'NObeyesdad': COLUNA_ALVO}
+
+# Escalas ordinais com ruído decimal no CSV (arredondadas no treino e na avaliação)
+COLUNAS_ESCALA = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
+
+ARQUIVO_BASE = 'base.parquet'
+PADRAO_LOTE = re.compile(r'^lote-(\d{6})-([0-9a-f]{16})\.parquet$')
+CHAVE_FONTE = b'healthanalytics.fonte_sha256'
+
+_trava = threading.Lock()
+
+
+def diretorio_dataset(caminho_csv: str = CSV_PATH) -> str:
+    """Pasta Parquet derivada de um CSV (ex: data/obesity.csv -> data/obesity_parquet)."""
+    pasta, nome = os.path.split(os.path.abspath(caminho_csv))
+    return os.path.join(pasta, f"{os.path.splitext(nome)[0]}_parquet")
+
+
+def normalizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Padroniza nomes e tipos de um frame lido do CSV.
+
+    Args:
+        df (pd.DataFrame): Dados como vieram do CSV.
+
+    Returns:
+        pd.DataFrame: Coluna alvo como 'Obesity', numéricas em float64 e textos em `category`.
+    """
+    df = df.rename(columns=RENOMEAR_COLUNAS)
+    tipos = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            tipos[col] = 'float64'
+        else:
+            tipos[col] = 'category'
+    return df.astype(tipos)
+
+
+def ingerir_csv(caminho_csv: str = CSV_PATH, diretorio: Optional[str] = None) -> str:
+    """
+    Converte o CSV para `base.parquet` e registra o SHA-256 do CSV nos metadados do arquivo.
+
+    Returns:
+        str: Caminho do Parquet gravado.
+
+    Raises:
+        FileNotFoundError: Se o CSV não existir.
+    """
+    hash_fonte = hash_arquivo(caminho_csv)
+    if hash_fonte is None:
+        raise FileNotFoundError(caminho_csv)
+
+    diretorio = diretorio or diretorio_dataset(caminho_csv)
+    os.makedirs(diretorio, exist_ok=True)
+    destino = os.path.join(diretorio, ARQUIVO_BASE)
+
+    tabela = pa.Table.from_pandas(normalizar_colunas(pd.read_csv(caminho_csv)), preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, CHAVE_FONTE: hash_fonte.encode()})
+
+    # Grava em arquivo temporário e troca de uma vez (leitores nunca veem um arquivo pela metade)
+    temporario = f"{destino}.tmp-{os.getpid()}"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, destino)
+    return destino
+
+
+@lru_cache(maxsize=8)
+def _hash_fonte(caminho_parquet, assinatura):
+    metadados = pq.read_schema(caminho_parquet).metadata or {}
+    valor = metadados.get(CHAVE_FONTE)
+    return valor.decode() if valor else None
+
+
+def garantir_dataset(caminho_csv: str = CSV_PATH) -> str:
+    """
+    Pasta Parquet atualizada com o CSV, (re)ingerindo apenas se o CSV mudou.
+
+    Returns:
+        str: Pasta do dataset.
+
+    Raises:
+        FileNotFoundError: Se o CSV não existir.
+    """
+    hash_fonte = hash_arquivo(caminho_csv)
+    if hash_fonte is None:
+        raise FileNotFoundError(caminho_csv)
+
+    diretorio = diretorio_dataset(caminho_csv)
+    base = os.path.join(diretorio, ARQUIVO_BASE)
+    with _trava:
+        assinatura = assinatura_arquivo(base)
+        if assinatura is None or _hash_fonte(base, assinatura) != hash_fonte:
+            ingerir_csv(caminho_csv, diretorio)
+    return diretorio
+
+
+def listar_lotes(caminho_csv: str = CSV_PATH) -> Tuple[str, ...]:
+    """Nomes dos lotes anexados ao dataset, na ordem de anexação."""
+    diretorio = diretorio_dataset(caminho_csv)
+    if not os.path.isdir(diretorio):
+        return ()
+    return tuple(sorted(nome for nome in os.listdir(diretorio) if PADRAO_LOTE.match(nome)))
+
+
+def versao_dataset(caminho_csv: str = CSV_PATH) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Versão do dataset: (SHA-256 do CSV, lotes anexados).
+
+    Como os lotes só são acrescentados, uma versão cujos lotes começam pelos
+    lotes de outra contém as mesmas linhas, nas mesmas posições, e mais algumas.
+
+    Raises:
+        FileNotFoundError: Se o CSV não existir.
+    """
+    hash_fonte = hash_arquivo(caminho_csv)
+    if hash_fonte is None:
+        raise FileNotFoundError(caminho_csv)
+    return hash_fonte, listar_lotes(caminho_csv)
+
+
+def fingerprint_dataset(versao: Tuple[str, Tuple[str, ...]]) -> str:
+    """
+    Identificador único de uma versão do dataset (ver `versao_dataset`).
+
+    Sem lotes, é o próprio SHA-256 do CSV (o mesmo gravado pelos modelos antigos). Com lotes,
+    é o SHA-256 do hash do CSV e dos nomes dos lotes, que já carregam o hash do conteúdo.
+    """
+    hash_fonte, lotes = versao
+    if not lotes:
+        return hash_fonte
+    return hashlib.sha256("\n".join([hash_fonte, *lotes]).encode('utf-8')).hexdigest()
+
+
+def _ler_arquivos(arquivos: Sequence[str], colunas: Optional[List[str]]) -> pd.DataFrame:
+    # Tabelas concatenadas na ordem dada; o Arrow unifica os dicionários das categorias na conversão
+    tabelas = [pq.read_table(arquivo, columns=colunas).replace_schema_metadata() for arquivo in arquivos]
+    return pa.concat_tables(tabelas).to_pandas()
+
+
+def ler_dados(colunas: Optional[List[str]] = None, caminho_csv: str = CSV_PATH,
+              lotes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Lê a base de pacientes (CSV convertido + lotes anexados), carregando apenas as colunas pedidas.
+
+    Args:
+        colunas (List[str], optional): Colunas desejadas (nomes normalizados). None = todas.
+        caminho_csv (str): CSV de origem do dataset.
+        lotes (Sequence[str], optional): Lotes lidos depois da base (ex: os de `versao_dataset`).
+            None = todos os lotes anexados até agora.
+
+    Returns:
+        pd.DataFrame: Dados com textos em `category` e índice igual à posição da linha
+        (linhas do CSV primeiro, depois os lotes na ordem de anexação).
+
+    Raises:
+        FileNotFoundError: Se o CSV não existir.
+    """
+    diretorio = garantir_dataset(caminho_csv)
+    arquivos = [ARQUIVO_BASE, *(listar_lotes(caminho_csv) if lotes is None else lotes)]
+    return _ler_arquivos([os.path.join(diretorio, nome) for nome in arquivos], colunas)
+
+
+def ler_lotes(lotes: Sequence[str], colunas: Optional[List[str]] = None,
+              caminho_csv: str = CSV_PATH) -> pd.DataFrame:
+    """Lê apenas os lotes indicados (ao menos um, nomes de `listar_lotes`), na ordem dada e com índice a partir de 0."""
+    diretorio = diretorio_dataset(caminho_csv)
+    return _ler_arquivos([os.path.join(diretorio, nome) for nome in lotes], colunas)
+
+
+def validar_lote(df: pd.DataFrame) -> List[str]:
+    """
+    Confere um lote já normalizado contra o esquema do modelo (`train.Config`).
+
+    Args:
+        df (pd.DataFrame): Lote após `normalizar_colunas`.
+
+    Returns:
+        List[str]: Problemas encontrados (vazia se o lote for válido).
+    """
+    from train import Config  # só no caminho de ingestão (importa o sklearn)
+
+    features = Config.NUMERIC_FEATURES + Config.ONE_HOT_FEATURES + Config.ORDINAL_FEATURES
+    esperadas = features + [Config.TARGET_COL]
+    problemas = []
+    if df.empty:
+        problemas.append("o lote não tem linhas")
+
+    faltando = [col for col in esperadas if col not in df.columns]
+    extras = [col for col in df.columns if col not in esperadas]
+    if faltando:
+        problemas.append(f"colunas ausentes: {', '.join(faltando)}")
+    if extras:
+        problemas.append(f"colunas fora do esquema: {', '.join(extras)}")
+
+    for col in Config.NUMERIC_FEATURES:
+        if col in df.columns and not pd.api.types.is_float_dtype(df[col]):
+            problemas.append(f"'{col}' deveria ser numérica")
+    for col in Config.ONE_HOT_FEATURES + Config.ORDINAL_FEATURES + [Config.TARGET_COL]:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            problemas.append(f"'{col}' deveria ser texto")
+
+    ordens = {'CAEC': Config.ORDER_CAEC, 'CALC': Config.ORDER_CALC}
+    dominios = {**{col: ordens[col] for col in Config.ORDINAL_FEATURES}, Config.TARGET_COL: Config.CLASSES}
+    for col, permitidos in dominios.items():
+        if col in df.columns:
+            invalidos = sorted(set(df[col].dropna().astype(str)) - set(permitidos))
+            if invalidos:
+                problemas.append(f"valores desconhecidos em '{col}': {', '.join(invalidos)}")
+    if Config.TARGET_COL in df.columns and df[Config.TARGET_COL].isna().any():
+        problemas.append(f"'{Config.TARGET_COL}' tem linhas sem classe")
+    return problemas
+
+
+def anexar_lote(dados: pd.DataFrame, caminho_csv: str = CSV_PATH) -> str:
+    """
+    Valida um lote de registros novos e o grava como uma nova partição do dataset.
+
+    O nome da partição leva o número de sequência e o hash do conteúdo. Um lote
+    com o mesmo conteúdo de um já anexado é recusado (evita duplicar registros ao
+    repetir uma carga).
+
+    Args:
+        dados (pd.DataFrame): Registros novos, com as colunas do CSV original.
+        caminho_csv (str): CSV de origem do dataset.
+
+    Returns:
+        str: Caminho da partição gravada.
+
+    Raises:
+        ValueError: Se o lote não seguir o esquema (mensagem com todos os problemas).
+        FileExistsError: Se o mesmo conteúdo já tiver sido anexado.
+        FileNotFoundError: Se o CSV de origem não existir.
+    """
+    df = normalizar_colunas(pd.DataFrame(dados).reset_index(drop=True))
+    problemas = validar_lote(df)
+    if problemas:
+        raise ValueError("Lote inválido: " + "; ".join(problemas))
+
+    # Mesma ordem de colunas e mesmos tipos da base
+    diretorio = garantir_dataset(caminho_csv)
+    esquema_base = pq.read_schema(os.path.join(diretorio, ARQUIVO_BASE))
+    df = df[esquema_base.names]
+
+    hash_lote = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.cast(esquema_base.remove_metadata()).replace_schema_metadata(tabela.schema.metadata)
+    temporario = os.path.join(diretorio, f".lote-{hash_lote}.tmp-{os.getpid()}")
+    pq.write_table(tabela, temporario)
+    try:
+        with _trava:
+            while True:
+                lotes = listar_lotes(caminho_csv)
+                if any(PADRAO_LOTE.match(nome).group(2) == hash_lote for nome in lotes):
+                    raise FileExistsError(f"Lote já anexado (conteúdo {hash_lote})")
+                sequencia = int(PADRAO_LOTE.match(lotes[-1]).group(1)) + 1 if lotes else 1
+                destino = os.path.join(diretorio, f"lote-{sequencia:06d}-{hash_lote}.parquet")
+                try:
+                    # link não sobrescreve: se outro processo pegou a sequência, tenta a próxima
+                    os.link(temporario, destino)
+                    return destino
+                except FileExistsError:
+                    continue
+    finally:
+        os.remove(temporario)
+
+
+def arredondar_escalas(df: pd.DataFrame) -> pd.DataFrame:
+    """Arredonda as escalas ordinais (`COLUNAS_ESCALA`) para inteiros, como no treinamento."""
+    df = df.copy()
+    for col in COLUNAS_ESCALA:
+        if col in df.columns:
+            df[col] = df[col].round().astype(int)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Anexa um lote de registros novos (CSV ou Parquet) ao dataset.")
+    parser.add_argument('lote', help="Arquivo com as colunas do CSV original")
+    parser.add_argument('--dados', default=CSV_PATH, help="CSV de origem do dataset")
+    args = parser.parse_args(argv)
+
+    leitor = pd.read_parquet if args.lote.endswith('.parquet') else pd.read_csv
+    try:
+        destino = anexar_lote(leitor(args.lote), args.dados)
+    except (ValueError, FileExistsError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(f"Lote anexado: {destino} ({len(listar_lotes(args.dados))} lotes no dataset)")
+
+
+if __name__ == "__main__":
+    main()
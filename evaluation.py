@@ -0,0 +1,200 @@
+"""
+Relatório de avaliação do modelo (página "Performance do Modelo").
+
+As métricas do conjunto de teste só mudam quando o modelo ou a base mudam.
+O relatório é calculado uma vez por versão do modelo, dos metadados e da base,
+salvo em `saved_model/evaluation_report.joblib` e, a partir daí, apenas lido
+do disco: abrir a página não depende mais do tamanho do conjunto de teste.
+
+O conjunto de teste é o salvo pelo treinamento em `model_metadata.joblib`
+('test_indices'), sobre a versão da base lida no treino: o mesmo CSV e os
+lotes gravados em 'dataset_batches'. Lotes anexados depois do treino não
+entram na avaliação (as linhas novas não são de teste nem mudam as
+posições das antigas). Sem esses metadados (modelos antigos) ou com o CSV
+substituído, não há conjunto de teste reproduzível: refazer o split sobre
+outra base misturaria linhas de treino no teste e inflaria as métricas, então
+o relatório sai sem métricas (`ORIGEM_INDISPONIVEL`).
+"""
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import joblib
+import pandas as pd
+
+from data_store import CSV_PATH, arredondar_escalas, fingerprint_dataset, ler_dados, versao_dataset
+from model_registry import (
+    METADATA_PATH, MODEL_DIR, MODEL_PATH, assinatura_arquivo, carregar_metadata, hash_arquivo,
+    obter_modelo_compacto
+)
+
+DATA_PATH = CSV_PATH
+RELATORIO_PATH = os.path.join(MODEL_DIR, 'evaluation_report.joblib')
+
+LABELS_ORDENADAS = [
+    'Insufficient_Weight', 'Normal_Weight',
+    'Overweight_Level_I', 'Overweight_Level_II',
+    'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
+]
+
+ORIGEM_INDICES = 'indices'
+ORIGEM_INDISPONIVEL = 'indisponivel'
+
+_trava = threading.Lock()
+
+
+def carregar_dados_avaliacao(caminho: str = DATA_PATH, colunas: Optional[List[str]] = None,
+                             lotes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Lê a base (pelo Parquet, só as `colunas` e `lotes` pedidos) com as escalas arredondadas, como no treino."""
+    return arredondar_escalas(ler_dados(colunas, caminho, lotes))
+
+
+def lotes_treino(metadata: Optional[dict], versao: Tuple[str, Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """
+    Lotes da versão da base usada no treino, se ela ainda puder ser lida a partir da versão atual.
+
+    A versão do treino é reproduzível quando o CSV é o mesmo e os lotes gravados nos metadados
+    ('dataset_batches') são os primeiros lotes atuais (lotes só são acrescentados). Metadados
+    sem a lista de lotes (anteriores a ela) valem para a base sem lotes ou com os lotes atuais.
+
+    Args:
+        metadata (dict): Metadados do modelo.
+        versao (Tuple): Versão atual do dataset (`data_store.versao_dataset`).
+
+    Returns:
+        Tuple | None: Lotes a ler com `ler_dados`, ou None se o fingerprint salvo não for
+        reproduzível (ou se os metadados não trouxerem o conjunto de teste).
+    """
+    metadata = metadata or {}
+    if metadata.get('test_indices') is None or 'dataset_fingerprint' not in metadata:
+        return None
+    hash_csv, lotes_atuais = versao
+    lotes = metadata.get('dataset_batches')
+    candidatos = [(), lotes_atuais] if lotes is None else [tuple(lotes)]
+    for lotes in candidatos:
+        if lotes_atuais[:len(lotes)] == lotes and \
+                fingerprint_dataset((hash_csv, lotes)) == metadata['dataset_fingerprint']:
+            return lotes
+    return None
+
+
+def selecionar_teste(df: pd.DataFrame, metadata: Optional[dict]):
+    """
+    Conjunto de teste do modelo: as linhas gravadas no treinamento ('test_indices').
+
+    Args:
+        df (pd.DataFrame): Versão da base usada no treino (ver `lotes_treino`), com o índice
+            igual à posição da linha (como em `ler_dados`).
+        metadata (dict): Metadados do modelo.
+
+    Returns:
+        Tuple | None: (X_test, y_test), ou None se as linhas de teste não estiverem em `df`.
+    """
+    indices = (metadata or {}).get('test_indices')
+    if indices is None or not df.index.is_unique or df.index.isin(indices).sum() != len(indices):
+        return None
+    return df.drop('Obesity', axis=1).loc[indices], df['Obesity'].loc[indices]
+
+
+def calcular_relatorio(pipeline, X_test: pd.DataFrame, y_test: pd.Series) -> dict:
+    """
+    Avalia o pipeline no conjunto de teste.
+
+    Args:
+        pipeline: Pipeline treinado ou `ModeloCompacto` (mesmas predições).
+        X_test (pd.DataFrame): Features do conjunto de teste.
+        y_test (pd.Series): Classes reais.
+
+    Returns:
+        dict: Métricas globais ponderadas, matriz de confusão (ordem de `LABELS_ORDENADAS`)
+        e o `classification_report` em formato de dicionário.
+    """
+    # sklearn só é importado quando o relatório precisa ser recalculado
+    from sklearn.metrics import (
+        accuracy_score, classification_report, confusion_matrix, f1_score, precision_score, recall_score
+    )
+
+    y_pred = pipeline.predict(X_test)
+
+    return {
+        'n_teste': len(y_test),
+        'metricas': {
+            'acuracia': accuracy_score(y_test, y_pred),
+            'precisao': precision_score(y_test, y_pred, average='weighted'),
+            'recall': recall_score(y_test, y_pred, average='weighted'),
+            'f1': f1_score(y_test, y_pred, average='weighted'),
+        },
+        'labels': LABELS_ORDENADAS,
+        'matriz_confusao': confusion_matrix(y_test, y_pred, labels=LABELS_ORDENADAS),
+        'classification_report': classification_report(y_test, y_pred, output_dict=True),
+    }
+
+
+@lru_cache(maxsize=1)
+def _ler_relatorio(caminho_relatorio, assinatura_relatorio):
+    return joblib.load(caminho_relatorio)
+
+
+def obter_relatorio(caminho_modelo: str = MODEL_PATH, caminho_dados: str = DATA_PATH,
+                    caminho_relatorio: str = RELATORIO_PATH, recalcular: bool = False,
+                    caminho_metadata: str = METADATA_PATH) -> Optional[dict]:
+    """
+    Devolve o relatório de avaliação salvo, recalculando-o apenas quando necessário.
+
+    A avaliação lê a versão da base usada no treino (`lotes_treino`), de modo que lotes
+    anexados depois não mudam o conjunto de teste. O relatório em disco é reaproveitado
+    se foi gerado com o mesmo modelo, os mesmos metadados e a mesma versão avaliada
+    (`fingerprint_dataset`); caso contrário, ou com `recalcular=True`, a avaliação é
+    refeita e o arquivo é sobrescrito.
+
+    Returns:
+        dict | None: Relatório (ver `calcular_relatorio`) acrescido de 'hash_modelo',
+        'hash_metadata', 'hash_dados', 'origem_teste' e 'gerado_em'; sem conjunto de teste
+        reproduzível, só essas chaves, 'n_teste' = 0 e 'origem_teste' = `ORIGEM_INDISPONIVEL`
+        (sem métricas). None se o modelo não existir.
+
+    Raises:
+        FileNotFoundError: Se a base de dados não existir.
+    """
+    hash_modelo = hash_arquivo(caminho_modelo)
+    if hash_modelo is None:
+        return None
+    hash_metadata = hash_arquivo(caminho_metadata)
+    metadata = carregar_metadata(caminho_metadata)
+    # Versão do treino (CSV + lotes gravados); sem ela, a versão atual inteira
+    versao = versao_dataset(caminho_dados)
+    lotes = lotes_treino(metadata, versao)
+    if lotes is not None:
+        versao = (versao[0], lotes)
+    hash_dados = fingerprint_dataset(versao)
+    chave = {'hash_modelo': hash_modelo, 'hash_metadata': hash_metadata, 'hash_dados': hash_dados}
+
+    with _trava:
+        assinatura = assinatura_arquivo(caminho_relatorio)
+        if assinatura is not None and not recalcular:
+            try:
+                relatorio = _ler_relatorio(caminho_relatorio, assinatura)
+            except Exception:
+                relatorio = None  # Arquivo corrompido ou de outra versão: recalcula
+            if relatorio and all(relatorio.get(k) == v for k, v in chave.items()):
+                return relatorio
+
+        teste = None
+        if lotes is not None:
+            colunas = metadata['features_expected'] + ['Obesity']
+            teste = selecionar_teste(carregar_dados_avaliacao(caminho_dados, colunas, lotes), metadata)
+        if teste is None:
+            relatorio = {'n_teste': 0, 'origem_teste': ORIGEM_INDISPONIVEL}
+        else:
+            relatorio = calcular_relatorio(obter_modelo_compacto(caminho_modelo), *teste)
+            relatorio['origem_teste'] = ORIGEM_INDICES
+        relatorio.update(chave)
+        relatorio['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+
+        # Grava em arquivo temporário e troca de uma vez (leitores nunca veem um arquivo pela metade)
+        temporario = f"{caminho_relatorio}.tmp"
+        joblib.dump(relatorio, temporario)
+        os.replace(temporario, caminho_relatorio)
+        return relatorio
@@ -0,0 +1,179 @@
+"""
+Motor de filtros pré-compilado do Dashboard.
+
+Substitui o `df.query` montado a cada rerun: as colunas categóricas são
+codificadas uma única vez (códigos inteiros + categorias) e as numéricas são
+ordenadas uma única vez. Cada filtro vira uma máscara booleana obtida por
+tabela de consulta (categóricas) ou busca binária (intervalos), e a máscara
+de cada cláusula fica em cache, de modo que um rerun recalcula apenas os
+filtros cujo valor mudou.
+
+Quando a base cresce (lotes anexados), `anexar` cria um motor novo que
+reaproveita a codificação e a ordenação das linhas já existentes e processa
+apenas as linhas novas.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Máscaras guardadas por coluna (valores recentes de cada widget)
+MASCARAS_POR_COLUNA = 4
+
+
+def _ordenar(serie: pd.Series):
+    """Valores em float e posições dos valores válidos em ordem crescente (estável)."""
+    valores = serie.to_numpy(dtype=float)
+    validos = np.flatnonzero(~np.isnan(valores))
+    return valores, validos[np.argsort(valores[validos], kind='stable')]
+
+
+class MotorFiltros:
+    """
+    Filtra um DataFrame fixo combinando máscaras booleanas em cache.
+
+    Args:
+        df (pd.DataFrame): Base de dados (não deve ser alterada depois da criação do motor).
+        colunas_categoricas (Iterable[str]): Colunas filtradas por lista de valores (`in`).
+        colunas_numericas (Iterable[str]): Colunas filtradas por intervalo fechado [min, max].
+    """
+
+    def __init__(self, df: pd.DataFrame, colunas_categoricas: Iterable[str], colunas_numericas: Iterable[str]):
+        self.n_linhas = len(df)
+        self._categorias = {}
+        self._codigos = {}
+        self._completas = {}
+        for col in colunas_categoricas:
+            codigos, categorias = pd.factorize(df[col], sort=False)
+            self._codigos[col] = codigos
+            self._categorias[col] = categorias
+            # Sem valores ausentes, selecionar todas as categorias equivale a não filtrar
+            self._completas[col] = not (codigos == -1).any()
+
+        self._valores_ordenados = {}
+        self._posicoes_ordenadas = {}
+        for col in colunas_numericas:
+            valores, ordem = _ordenar(df[col])
+            self._valores_ordenados[col] = valores[ordem]
+            self._posicoes_ordenadas[col] = ordem
+
+        self._cache = {col: OrderedDict() for col in [*self._codigos, *self._valores_ordenados]}
+        self._trava = threading.Lock()
+
+    def anexar(self, df_novo: pd.DataFrame) -> 'MotorFiltros':
+        """
+        Novo motor com as linhas de `df_novo` acrescentadas ao fim da base (este motor não muda).
+
+        Só as linhas novas são codificadas e ordenadas: as categorias novas entram no fim
+        da lista e os valores numéricos novos são intercalados nos já ordenados. O
+        resultado é o mesmo de um motor criado sobre a base concatenada.
+
+        Args:
+            df_novo (pd.DataFrame): Linhas novas, com as mesmas colunas do frame original.
+
+        Returns:
+            MotorFiltros: Motor para `n_linhas + len(df_novo)` linhas, com cache de máscaras vazio.
+        """
+        novo = object.__new__(MotorFiltros)
+        novo.n_linhas = self.n_linhas + len(df_novo)
+        novo._categorias, novo._codigos, novo._completas = {}, {}, {}
+        for col, categorias in self._categorias.items():
+            codigos, categorias_lote = pd.factorize(df_novo[col], sort=False)
+            categorias_lote = pd.Index(np.asarray(categorias_lote, dtype=object))
+            antigas = pd.Index(np.asarray(categorias, dtype=object))
+            categorias = antigas.append(categorias_lote[antigas.get_indexer(categorias_lote) == -1])
+            # Posição extra no fim mantém o código -1 (valores ausentes)
+            posicoes = np.append(categorias.get_indexer(categorias_lote), -1)
+            novo._codigos[col] = np.concatenate([self._codigos[col], posicoes[codigos]])
+            novo._categorias[col] = categorias
+            novo._completas[col] = self._completas[col] and not (codigos == -1).any()
+
+        novo._valores_ordenados, novo._posicoes_ordenadas = {}, {}
+        for col, valores_ordenados in self._valores_ordenados.items():
+            valores, ordem = _ordenar(df_novo[col])
+            # Empates: linhas antigas antes das novas, como na ordenação estável da base inteira
+            insercao = np.searchsorted(valores_ordenados, valores[ordem], side='right')
+            novo._valores_ordenados[col] = np.insert(valores_ordenados, insercao, valores[ordem])
+            novo._posicoes_ordenadas[col] = np.insert(self._posicoes_ordenadas[col], insercao,
+                                                      ordem + self.n_linhas)
+
+        novo._cache = {col: OrderedDict() for col in self._cache}
+        novo._trava = threading.Lock()
+        return novo
+
+    # ------------------------------------------------------------------
+    # Máscaras individuais
+    # ------------------------------------------------------------------
+    def _mascara_categorica(self, col, valores) -> np.ndarray:
+        categorias = self._categorias[col]
+        # Tabela de consulta: posição extra no fim para o código -1 (valores ausentes)
+        selecionadas = np.append(categorias.isin(list(valores)), False)
+        return selecionadas[self._codigos[col]]
+
+    def _mascara_intervalo(self, col, minimo, maximo) -> np.ndarray:
+        valores = self._valores_ordenados[col]
+        inicio = np.searchsorted(valores, minimo, side='left')
+        fim = np.searchsorted(valores, maximo, side='right')
+        mascara = np.zeros(self.n_linhas, dtype=bool)
+        mascara[self._posicoes_ordenadas[col][inicio:fim]] = True
+        return mascara
+
+    def _filtro_inativo(self, col, chave) -> bool:
+        """True quando o filtro seleciona todas as linhas válidas (ex: valores padrão do widget)."""
+        if col in self._categorias:
+            return self._completas[col] and self._categorias[col].isin(chave).all()
+        valores = self._valores_ordenados[col]
+        return len(valores) == self.n_linhas and (
+            len(valores) == 0 or (chave[0] <= valores[0] and chave[1] >= valores[-1])
+        )
+
+    def mascara_coluna(self, col, valor):
+        """
+        Máscara de um único filtro, reaproveitando o cache quando o valor não mudou.
+
+        Returns:
+            np.ndarray | None: Máscara booleana, ou None se o filtro não remove nenhuma linha.
+        """
+        chave = frozenset(valor) if col in self._categorias else tuple(valor)
+        if self._filtro_inativo(col, chave):
+            return None
+
+        with self._trava:
+            cache = self._cache[col]
+            if chave in cache:
+                cache.move_to_end(chave)
+                return cache[chave]
+
+        if col in self._categorias:
+            mascara = self._mascara_categorica(col, chave)
+        else:
+            mascara = self._mascara_intervalo(col, *chave)
+        mascara.flags.writeable = False
+
+        with self._trava:
+            cache[chave] = mascara
+            if len(cache) > MASCARAS_POR_COLUNA:
+                cache.popitem(last=False)
+        return mascara
+
+    # ------------------------------------------------------------------
+    # Combinação
+    # ------------------------------------------------------------------
+    def mascara(self, filtros: Dict[str, Tuple]) -> np.ndarray:
+        """
+        Combina os filtros (AND) em uma única máscara booleana.
+
+        Args:
+            filtros (dict): Coluna -> lista de valores (categóricas) ou (min, max) (numéricas).
+
+        Returns:
+            np.ndarray: Máscara com `n_linhas` posições.
+        """
+        resultado = np.ones(self.n_linhas, dtype=bool)
+        for col, valor in filtros.items():
+            mascara = self.mascara_coluna(col, valor)
+            if mascara is not None:
+                resultado &= mascara
+        return resultado
@@ -0,0 +1,306 @@
+"""
+Serviço de inferência do HealthAnalytics.
+
+Centraliza a predição do pipeline salvo: o pré-processamento roda uma única vez,
+o rótulo é obtido pelo argmax das probabilidades (mesma regra do
+`RandomForestClassifier.predict`) e as contribuições SHAP são calculadas sobre a
+mesma matriz transformada.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from constants import DICT_COLUNAS_PT, DICT_RESULTADO_PDF, DICT_TRADUCAO_GERAL
+
+# Tamanho padrão dos blocos na pontuação em lote (linhas por chamada ao pipeline)
+TAMANHO_BLOCO_PADRAO = 1000
+
+
+@dataclass
+class ResultadoInferencia:
+    """Resultado de uma passada de inferência (uma linha por paciente)."""
+
+    classes: np.ndarray                # (n_classes,) rótulos na ordem do modelo
+    rotulos: np.ndarray                # (n,) classe prevista de cada paciente
+    indices_classe: np.ndarray         # (n,) posição da classe prevista em `classes`
+    probabilidades: np.ndarray         # (n, n_classes)
+    feature_names: Sequence[str]       # nomes das colunas após o pré-processamento
+    shap_values: Optional[np.ndarray] = None  # (n, n_features) da classe prevista
+
+    def __len__(self):
+        return len(self.rotulos)
+
+
+def nomes_features(preprocessor) -> List[str]:
+    """
+    Reconstrói os nomes das colunas geradas pelo ColumnTransformer.
+
+    Args:
+        preprocessor: ColumnTransformer já treinado.
+
+    Returns:
+        List[str]: Nomes na mesma ordem da matriz transformada.
+    """
+    feature_names = []
+    if hasattr(preprocessor, 'transformers_'):
+        for trans in preprocessor.transformers_:
+            if trans[0] != 'remainder':
+                if hasattr(trans[1], 'get_feature_names_out'):
+                    feature_names.extend(trans[1].get_feature_names_out(trans[2]))
+                else:
+                    feature_names.extend(trans[2])
+    return [str(f) for f in feature_names]
+
+
+@lru_cache(maxsize=4)
+def _nomes_features_modelo(preprocessor) -> Tuple[str, ...]:
+    # Os nomes são fixos por modelo: `get_feature_names_out` roda uma vez por preprocessor
+    return tuple(nomes_features(preprocessor))
+
+
+def inferir(pipeline, dados: pd.DataFrame, explainer=None) -> ResultadoInferencia:
+    """
+    Executa pré-processamento, probabilidades, rótulo e (opcionalmente) SHAP em uma única passada.
+
+    Args:
+        pipeline: Pipeline treinado com os passos 'preprocessor' e 'classifier', ou o
+            `ModeloCompacto` equivalente (mesma matriz transformada e mesmas probabilidades).
+        dados (pd.DataFrame): Features brutas, já na ordem de `features_expected`.
+        explainer: shap.TreeExplainer do classificador. Se None, o SHAP não é calculado.
+
+    Returns:
+        ResultadoInferencia: Rótulos, probabilidades e contribuições SHAP.
+    """
+    if hasattr(pipeline, 'named_steps'):
+        preprocessor = pipeline.named_steps['preprocessor']
+        model = pipeline.named_steps['classifier']
+        X_transformed = preprocessor.transform(dados)
+        probabilidades = model.predict_proba(X_transformed)
+        classes, feature_names = model.classes_, _nomes_features_modelo(preprocessor)
+    else:
+        X_transformed = pipeline.transformar(dados)
+        probabilidades = pipeline.predict_proba_transformado(X_transformed)
+        classes, feature_names = pipeline.classes_, pipeline.nomes_features
+
+    indices_classe = probabilidades.argmax(axis=1)
+    rotulos = classes.take(indices_classe)
+
+    shap_values = None
+    if explainer is not None:
+        valores = explainer(X_transformed, check_additivity=False).values
+        if valores.ndim == 3:
+            # (n, features, classes) -> contribuição para a classe prevista de cada linha
+            shap_values = valores[np.arange(len(indices_classe)), :, indices_classe]
+        else:
+            shap_values = valores
+
+    return ResultadoInferencia(
+        classes=classes,
+        rotulos=rotulos,
+        indices_classe=indices_classe,
+        probabilidades=probabilidades,
+        feature_names=feature_names,
+        shap_values=shap_values,
+    )
+
+
+# ============================================================================
+# PÓS-PROCESSAMENTO DO SHAP
+# ============================================================================
+def nome_amigavel(nome_tecnico: str) -> str:
+    """Mapeia uma coluna transformada (ex: 'MTRANS_Bike') para o nome da variável original em PT."""
+    for col_code, col_name in DICT_COLUNAS_PT.items():
+        if col_code in nome_tecnico:
+            return col_name
+    return nome_tecnico
+
+
+def traduzir_nome_feature(nome_raw: str) -> str:
+    """
+    Traduz uma coluna transformada mantendo a categoria do one-hot.
+    Ex: 'MTRANS_Bike' -> 'Transporte (Bicicleta)'.
+    """
+    nome_limpo = nome_raw.split("__")[-1] if "__" in nome_raw else nome_raw
+
+    if nome_limpo in DICT_COLUNAS_PT:
+        return DICT_COLUNAS_PT[nome_limpo]
+
+    for col_eng, col_pt in DICT_COLUNAS_PT.items():
+        if col_eng in nome_limpo:
+            sufixo = nome_limpo.replace(col_eng, "").replace("_", " ").strip()
+            if sufixo:
+                sufixo_trad = DICT_TRADUCAO_GERAL.get(sufixo.strip(), sufixo)
+                return f"{col_pt} ({sufixo_trad})"
+            return col_pt
+
+    return nome_limpo
+
+
+@lru_cache(maxsize=8)
+def _mapa_variaveis(feature_names: Tuple[str, ...]) -> Tuple[List[str], np.ndarray]:
+    nomes_por_coluna = [nome_amigavel(f) for f in feature_names]
+    variaveis = list(dict.fromkeys(nomes_por_coluna))  # ordem da primeira aparição
+    indices = np.array([variaveis.index(nome) for nome in nomes_por_coluna], dtype=np.intp)
+    agregacao = np.zeros((len(feature_names), len(variaveis)))
+    agregacao[np.arange(len(feature_names)), indices] = 1.0
+    agregacao.flags.writeable = False  # compartilhada entre chamadas
+    return variaveis, agregacao
+
+
+def mapa_variaveis(feature_names: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Variável original de cada coluna transformada, calculada uma única vez por modelo.
+
+    Args:
+        feature_names (Sequence[str]): Nomes das colunas transformadas (`ResultadoInferencia.feature_names`).
+
+    Returns:
+        Tuple[List[str], np.ndarray]: Nomes amigáveis das variáveis (ordem da primeira aparição) e a
+        matriz (n_features_transformadas, n_variaveis) de 0/1 que soma as colunas de cada variável.
+    """
+    return _mapa_variaveis(tuple(feature_names))
+
+
+def agregar_shap_por_variavel(shap_values: np.ndarray, feature_names: Sequence[str]) -> pd.DataFrame:
+    """
+    Soma as contribuições SHAP das colunas one-hot de volta para a variável original.
+
+    Args:
+        shap_values (np.ndarray): Matriz (n, n_features_transformadas).
+        feature_names (Sequence[str]): Nomes das colunas transformadas.
+
+    Returns:
+        pd.DataFrame: Uma linha por paciente e uma coluna por variável (nome amigável).
+    """
+    variaveis, agregacao = mapa_variaveis(feature_names)
+    return pd.DataFrame(np.asarray(shap_values) @ agregacao, columns=variaveis)
+
+
+def fatores_por_linha(df_agregado: pd.DataFrame, top_n: int = 3) -> Tuple[List[str], List[str]]:
+    """
+    Lista os principais fatores de risco e de proteção de cada paciente.
+
+    Returns:
+        Tuple[List[str], List[str]]: Textos de risco e de proteção por linha, separados por '; '.
+    """
+    nomes = df_agregado.columns.to_numpy()
+    valores = df_agregado.to_numpy()
+    ordem = np.argsort(-np.abs(valores), axis=1, kind='stable')
+
+    riscos, protecoes = [], []
+    for linha, indices in zip(valores, ordem):
+        positivos = [i for i in indices if linha[i] > 0][:top_n]
+        negativos = [i for i in indices if linha[i] < 0][:top_n]
+        riscos.append("; ".join(f"{nomes[i]} (+{linha[i]:.1%})" for i in positivos))
+        protecoes.append("; ".join(f"{nomes[i]} ({linha[i]:.1%})" for i in negativos))
+    return riscos, protecoes
+
+
+# ============================================================================
+# PONTUAÇÃO EM LOTE
+# ============================================================================
+def validar_lote(df: pd.DataFrame, features_expected: List[str],
+                 numeric_features: Optional[List[str]] = None,
+                 categorias: Optional[Dict[str, Sequence[str]]] = None) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """
+    Valida um lote de pacientes contra as colunas esperadas pelo modelo.
+
+    Células vazias são aceitas (o pipeline possui imputadores). Textos em colunas
+    numéricas e categorias que o modelo não conhece tornam a linha inválida: o
+    OneHotEncoder as transformaria em zeros sem nenhum erro.
+
+    Args:
+        df (pd.DataFrame): Dados brutos enviados pelo usuário.
+        features_expected (List[str]): Colunas na ordem do treino (`metadata['features_expected']`).
+        numeric_features (List[str], optional): Colunas que devem ser numéricas.
+        categorias (Dict[str, Sequence[str]], optional): Categorias aceitas por coluna
+            categórica (`ModeloCompacto.categorias`).
+
+    Returns:
+        Tuple[pd.DataFrame, pd.Series, pd.Series]: Dados reordenados/convertidos, máscara de
+        linhas válidas e o status de cada linha ('OK' ou o motivo da rejeição).
+
+    Raises:
+        ValueError: Se alguma coluna esperada não estiver presente.
+    """
+    faltantes = [c for c in features_expected if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes nos dados: {', '.join(faltantes)}")
+
+    dados = df[features_expected].copy()
+    problemas = {}
+    for col in numeric_features or []:
+        if col in dados.columns:
+            convertida = pd.to_numeric(dados[col], errors='coerce')
+            problemas[f"valor não numérico em {col}"] = (convertida.isna() & dados[col].notna()).to_numpy()
+            dados[col] = convertida
+    for col, aceitas in (categorias or {}).items():
+        if col in dados.columns:
+            problemas[f"categoria desconhecida em {col}"] = (dados[col].notna() & ~dados[col].isin(aceitas)).to_numpy()
+
+    falhas = np.column_stack(list(problemas.values())) if problemas else np.zeros((len(dados), 0), dtype=bool)
+    validas = ~falhas.any(axis=1)
+    motivos = np.array(list(problemas), dtype=object)
+    status = np.full(len(dados), 'OK', dtype=object)
+    for i in np.flatnonzero(~validas):
+        status[i] = "Inválido: " + "; ".join(motivos[falhas[i]])
+    return dados, pd.Series(validas, index=dados.index), pd.Series(status, index=dados.index)
+
+
+def sem_colunas_resultado(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove as colunas geradas por `pontuar_lote` (e o `Status`) de um lote de entrada.
+
+    Permite pontuar de novo um arquivo de saída (ex: `diagnosticos_lote.csv`): o `join` com o
+    novo resultado não encontra colunas repetidas.
+    """
+    fixas = {'Diagnostico', 'Diagnostico_PT', 'Confianca', 'Fatores_Risco', 'Fatores_Protecao', 'Status'}
+    return df.drop(columns=[c for c in df.columns if c in fixas or str(c).startswith('Prob_')])
+
+
+def pontuar_lote(pipeline, dados: pd.DataFrame, explainer=None, top_n: int = 3,
+                 tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                 progresso: Optional[Callable[[float], None]] = None) -> pd.DataFrame:
+    """
+    Pontua um lote de pacientes em blocos vetorizados.
+
+    Args:
+        pipeline: Pipeline treinado.
+        dados (pd.DataFrame): Features já validadas (ver `validar_lote`).
+        explainer: TreeExplainer do classificador. Se None, os fatores SHAP não são calculados.
+        top_n (int): Quantidade de fatores de risco/proteção por paciente.
+        tamanho_bloco (int): Linhas por chamada ao pipeline.
+        progresso (Callable, optional): Recebe a fração concluída (0 a 1) após cada bloco.
+
+    Returns:
+        pd.DataFrame: Diagnóstico, confiança, probabilidades por classe e fatores, com o mesmo índice de `dados`.
+    """
+    blocos = []
+    total = len(dados)
+    for inicio in range(0, total, tamanho_bloco):
+        bloco = dados.iloc[inicio:inicio + tamanho_bloco]
+        resultado = inferir(pipeline, bloco, explainer=explainer)
+
+        df_bloco = pd.DataFrame(index=bloco.index)
+        df_bloco['Diagnostico'] = resultado.rotulos
+        df_bloco['Diagnostico_PT'] = [DICT_RESULTADO_PDF.get(r, r) for r in resultado.rotulos]
+        df_bloco['Confianca'] = resultado.probabilidades.max(axis=1)
+        for i, classe in enumerate(resultado.classes):
+            df_bloco[f'Prob_{classe}'] = resultado.probabilidades[:, i]
+
+        if resultado.shap_values is not None:
+            df_agregado = agregar_shap_por_variavel(resultado.shap_values, resultado.feature_names)
+            riscos, protecoes = fatores_por_linha(df_agregado, top_n=top_n)
+            df_bloco['Fatores_Risco'] = riscos
+            df_bloco['Fatores_Protecao'] = protecoes
+
+        blocos.append(df_bloco)
+        if progresso:
+            progresso(min(1.0, (inicio + len(bloco)) / total))
+
+    if not blocos:
+        return pd.DataFrame(index=dados.index)
+    return pd.concat(blocos)
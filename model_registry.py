@@ -0,0 +1,183 @@
+"""
+Registro compartilhado dos artefatos do modelo.
+
+Todas as páginas (e os scripts de linha de comando) obtêm o pipeline, os
+metadados, o TreeExplainer e a tabela de importância das variáveis por aqui.
+Cada artefato é mantido em cache no nível do processo, chaveado pela
+assinatura do arquivo em disco (mtime + tamanho): enquanto o `.joblib` não
+mudar, existe exatamente uma cópia da floresta na memória; quando ele é
+substituído, a próxima chamada recarrega tudo e a cópia antiga é descartada.
+
+As predições e o TreeExplainer usam o modelo compacto (`obter_modelo_compacto`),
+cujos arrays são mapeados em memória (`mmap`) e compartilhados entre os
+processos do host. O pipeline sklearn só é carregado para gerar o modelo
+compacto de uma versão nova.
+"""
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compact_model import MANIFESTO, ModeloCompacto, diretorio_versao, exportar_modelo, remover_versoes_antigas
+from inference import traduzir_nome_feature
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, 'saved_model')
+MODEL_PATH = os.path.join(MODEL_DIR, 'modelo_obesidade.joblib')
+METADATA_PATH = os.path.join(MODEL_DIR, 'model_metadata.joblib')
+COMPACT_DIR = os.path.join(MODEL_DIR, 'modelo_compacto')
+
+# RLock: os caches derivados (explainer, importâncias) chamam `obter_modelo_compacto` por dentro
+_trava = threading.RLock()
+
+
+def assinatura_arquivo(caminho: str) -> Optional[Tuple[int, int]]:
+    """Retorna (mtime_ns, tamanho) do arquivo, ou None se ele não existir."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+@lru_cache(maxsize=8)
+def _hash_arquivo(caminho: str, assinatura: Tuple[int, int]) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def hash_arquivo(caminho: str) -> Optional[str]:
+    """SHA-256 do arquivo; recalculado apenas quando a assinatura (mtime/tamanho) muda."""
+    assinatura = assinatura_arquivo(caminho)
+    if assinatura is None:
+        return None
+    return _hash_arquivo(caminho, assinatura)
+
+
+@lru_cache(maxsize=1)
+def _carregar_metadata(caminho_metadata, assinatura_metadata):
+    if assinatura_metadata is None:
+        return None
+    return joblib.load(caminho_metadata)
+
+
+def carregar_metadata(caminho_metadata: str = METADATA_PATH) -> Optional[dict]:
+    """Metadados do modelo (`model_metadata.joblib`), ou None se o arquivo não existir."""
+    with _trava:
+        return _carregar_metadata(caminho_metadata, assinatura_arquivo(caminho_metadata))
+
+
+@lru_cache(maxsize=1)
+def _carregar_ativos(caminho_modelo, assinatura_modelo):
+    if assinatura_modelo is None:
+        return None
+    return joblib.load(caminho_modelo)
+
+
+def carregar_ativos(caminho_modelo: str = MODEL_PATH, caminho_metadata: str = METADATA_PATH):
+    """
+    Carrega (ou devolve do cache) o pipeline e os metadados do modelo.
+
+    Returns:
+        Tuple: (pipeline, metadata). O pipeline é None se o arquivo não existir;
+        os metadados são None se apenas o `model_metadata.joblib` estiver ausente.
+    """
+    with _trava:
+        model = _carregar_ativos(caminho_modelo, assinatura_arquivo(caminho_modelo))
+        if model is None:
+            return None, None
+        return model, carregar_metadata(caminho_metadata)
+
+
+@lru_cache(maxsize=1)
+def _abrir_modelo_compacto(diretorio):
+    return ModeloCompacto(diretorio)
+
+
+def obter_modelo_compacto(caminho_modelo: str = MODEL_PATH, raiz: str = COMPACT_DIR) -> Optional[ModeloCompacto]:
+    """
+    Modelo compacto (arrays em `mmap`, ver `compact_model.py`) da versão atual do `.joblib`.
+
+    Cada versão fica em `raiz/<prefixo do SHA-256 do .joblib>`. Se a pasta ainda não
+    existir (modelo treinado antes do formato compacto ou copiado sem ela), o pipeline
+    é carregado uma vez para exportá-la e as versões antigas são removidas.
+
+    Returns:
+        ModeloCompacto | None: None se o `.joblib` não existir.
+    """
+    with _trava:
+        hash_modelo = hash_arquivo(caminho_modelo)
+        if hash_modelo is None:
+            return None
+        diretorio = diretorio_versao(raiz, hash_modelo)
+        if not os.path.exists(os.path.join(diretorio, MANIFESTO)):
+            pipeline, _ = carregar_ativos(caminho_modelo)
+            try:
+                exportar_modelo(pipeline, diretorio, hash_modelo)
+            except FileExistsError:
+                pass  # Outro processo exportou a mesma versão primeiro
+            remover_versoes_antigas(raiz, manter=diretorio)
+        return _abrir_modelo_compacto(diretorio)
+
+
+@lru_cache(maxsize=1)
+def _construir_explainer(caminho_modelo, assinatura_modelo):
+    import shap
+
+    modelo = obter_modelo_compacto(caminho_modelo)
+    if modelo is None:
+        return None
+    arvores = modelo.arvores_shap()
+    if arvores is not None:
+        return shap.TreeExplainer(arvores)
+    # Exportação anterior aos pesos dos nós: o explainer sai do pipeline
+    model, _ = carregar_ativos(caminho_modelo)
+    return shap.TreeExplainer(model.named_steps['classifier'])
+
+
+def obter_explainer(caminho_modelo: str = MODEL_PATH):
+    """
+    TreeExplainer do classificador, construído uma vez por versão do modelo.
+
+    A floresta vem dos arrays do modelo compacto (`ModeloCompacto.arvores_shap`): o
+    pipeline `.joblib` não é carregado. Os valores SHAP são os mesmos do explainer
+    construído sobre o `RandomForestClassifier`.
+    """
+    with _trava:
+        return _construir_explainer(caminho_modelo, assinatura_arquivo(caminho_modelo))
+
+
+@lru_cache(maxsize=1)
+def _calcular_importancias(caminho_modelo, assinatura_modelo):
+    modelo = obter_modelo_compacto(caminho_modelo)
+    if modelo is None:
+        return None
+
+    importances = np.asarray(modelo.importancias)
+    feature_names = modelo.nomes_features
+    if len(feature_names) != len(importances):
+        return None
+
+    df_imp = pd.DataFrame({"Feature_Raw": feature_names, "Importância": importances})
+    df_imp['Feature'] = df_imp['Feature_Raw'].apply(traduzir_nome_feature)
+    return df_imp.sort_values("Importância", ascending=False)
+
+
+def importancia_variaveis(caminho_modelo: str = MODEL_PATH) -> Optional[pd.DataFrame]:
+    """
+    Tabela de importância das variáveis (Gini) com nomes traduzidos.
+
+    Returns:
+        pd.DataFrame: Colunas 'Feature_Raw', 'Importância' e 'Feature', ordenada
+        da mais para a menos importante. None se o modelo não puder ser lido.
+    """
+    with _trava:
+        return _calcular_importancias(caminho_modelo, assinatura_arquivo(caminho_modelo))
@@ -1,17 +1,18 @@
 import streamlit as st
 import pandas as pd
-import joblib
-import plotly.express as px
 from utils import sidebar_navegacao
-from fpdf import FPDF
+from inference import agregar_shap_por_variavel, inferir, sem_colunas_resultado, validar_lote, pontuar_lote
+from model_registry import carregar_metadata, obter_explainer, obter_modelo_compacto
 import datetime
-import shap
+import os
+import tempfile
+
+from data_export import FORMATOS, exportar
 
 from constants import (
     DICT_SIM_NAO, DICT_GENERO, DICT_FREQ_CALORICA, DICT_TRANSPORTE,
     DICT_FCVC_NUM, DICT_CH2O_NUM, DICT_FAF_NUM, DICT_TUE_NUM,
-    DICT_RESULTADO_PDF, CORES_OBESIDADE,
-    DICT_COLUNAS_PT
+    DICT_RESULTADO_PDF, CORES_OBESIDADE
 )
 
 # ============================================================================
@@ -28,25 +29,11 @@ sidebar_navegacao()
 # ============================================================================
 # 2. CARREGAMENTO DOS ATIVOS (MODELO + METADATA)
 # ============================================================================
-@st.cache_resource
-def load_assets():
-    # Carrega o Modelo
-    try:
-        model = joblib.load('saved_model/modelo_obesidade.joblib')
-    except FileNotFoundError:
-        return None, None
-        
-    # Carrega o Metadata (Manual de Instruções)
-    try:
-        meta = joblib.load('saved_model/model_metadata.joblib')
-    except FileNotFoundError:
-        meta = None
-        
-    return model, meta
-
-pipeline, metadata = load_assets()
+# Modelo compacto (arrays em mmap, compartilhados entre processos); o pipeline sklearn
+# só é carregado pelo explainer, quando o SHAP é calculado
+modelo, metadata = obter_modelo_compacto(), carregar_metadata()
 
-if not pipeline:
+if not modelo:
     st.error("Erro crítico: Modelo (modelo_obesidade.joblib) não encontrado.")
     st.stop()
 
@@ -88,6 +75,8 @@ def gerar_sugestoes(riscos_identificados):
 # FUNÇÃO: GERADOR DE PDF COMPLETO
 # ============================================================================
 def create_pdf(paciente_dados, resultado_final, probs_df, riscos, protecoes, sugestoes_lista):
+    from fpdf import FPDF
+
     class PDF(FPDF):
         def header(self):
             self.set_font('Arial', 'B', 16)
@@ -329,47 +318,17 @@ if submit_button:
             st.stop()
 
     try:
-        # --- PREDIÇÃO ---
-        predicao_en = pipeline.predict(dados_entrada)[0]
+        # --- PREDIÇÃO + SHAP (uma única passada pelo pipeline) ---
+        resultado = inferir(modelo, dados_entrada, explainer=obter_explainer())
+        predicao_en = resultado.rotulos[0]
         predicao_pt = DICT_RESULTADO_PDF.get(predicao_en, predicao_en)
-        probs = pipeline.predict_proba(dados_entrada)[0]
-        df_probs = pd.DataFrame({'Classe': pipeline.classes_, 'Probabilidade': probs})
+        df_probs = pd.DataFrame({'Classe': resultado.classes, 'Probabilidade': resultado.probabilidades[0]})
         df_probs['Nome_PT'] = df_probs['Classe'].map(DICT_RESULTADO_PDF)
         df_probs = df_probs.sort_values('Probabilidade', ascending=True)
 
-        # --- CÁLCULO DO SHAP ---
-        model = pipeline.named_steps['classifier']
-        preprocessor = pipeline.named_steps['preprocessor']
-        X_transformed = preprocessor.transform(dados_entrada)
-        explainer = shap.TreeExplainer(model)
-        shap_vals = explainer(X_transformed, check_additivity=False)
-        class_idx = list(pipeline.classes_).index(predicao_en)
-        
-        if len(shap_vals.shape) == 3: shap_values_class = shap_vals[0, :, class_idx].values
-        else: shap_values_class = shap_vals[0].values
-
-        # Nomes
-        feature_names = []
-        if hasattr(preprocessor, 'transformers_'):
-            for trans in preprocessor.transformers_:
-                if trans[0] != 'remainder':
-                    if hasattr(trans[1], 'get_feature_names_out'):
-                        feature_names.extend(trans[1].get_feature_names_out(trans[2]))
-                    else:
-                        feature_names.extend(trans[2])
-
-        df_shap = pd.DataFrame({'Feature': feature_names, 'Impacto': shap_values_class})
-        
-        def limpar_nome(nome_tecnico):
-            for col_code, col_name in DICT_COLUNAS_PT.items():
-                if col_code in nome_tecnico:
-                    return col_name 
-            return nome_tecnico
-
-        df_shap['Nome Amigável'] = df_shap['Feature'].apply(limpar_nome)
-        
-        # Agrupamento e Ordenação
-        df_shap_grouped = df_shap.groupby('Nome Amigável')['Impacto'].sum().reset_index()
+        # Agrupamento (mapa coluna -> variável calculado uma vez por modelo) e Ordenação
+        impactos = agregar_shap_por_variavel(resultado.shap_values[:1], resultado.feature_names).iloc[0]
+        df_shap_grouped = impactos.sort_index().rename_axis('Nome Amigável').reset_index(name='Impacto')
         df_shap_grouped['Abs_Impacto'] = df_shap_grouped['Impacto'].abs()
         df_shap_grouped = df_shap_grouped.sort_values('Abs_Impacto', ascending=False)
 
@@ -377,8 +336,8 @@ if submit_button:
         top_riscos = df_shap_grouped[df_shap_grouped['Impacto'] > 0].head(5)
         top_protecoes = df_shap_grouped[df_shap_grouped['Impacto'] < 0].head(5)
 
-        fatores_risco = [f"{row['Nome Amigável']} (+{row['Impacto']:.1%})" for _, row in top_riscos.iterrows()]
-        fatores_protecao = [f"{row['Nome Amigável']} ({row['Impacto']:.1%})" for _, row in top_protecoes.iterrows()]
+        fatores_risco = [f"{nome} (+{impacto:.1%})" for nome, impacto in zip(top_riscos['Nome Amigável'], top_riscos['Impacto'])]
+        fatores_protecao = [f"{nome} ({impacto:.1%})" for nome, impacto in zip(top_protecoes['Nome Amigável'], top_protecoes['Impacto'])]
 
         # --- GERAÇÃO DE SUGESTÕES  ---
         lista_riscos_amigaveis = top_riscos['Nome Amigável'].tolist()
@@ -414,7 +373,9 @@ if submit_button:
 # 6. EXIBIÇÃO DOS RESULTADOS (PERSISTENTE)
 # ============================================================================
 if st.session_state.get('diagnostico_realizado'):
-    
+    # Importado só aqui: os gráficos aparecem apenas depois do diagnóstico
+    import plotly.express as px
+
     res = st.session_state['resultado_dados']
     
     st.markdown("###")
@@ -505,4 +466,81 @@ if st.session_state.get('diagnostico_realizado'):
                 f"**Nota de Leitura:** Fatores com impacto inferior a **{limite_corte:.1%}** "
                 f"foram ocultados para simplificar a visualização.\n\n"
                 f"Variáveis ocultas: *{nomes_formatados}*."
-            )
\ No newline at end of file
+            )
+
+# ============================================================================
+# 7. DIAGNÓSTICO EM LOTE (CSV / EXCEL)
+# ============================================================================
+st.markdown("---")
+st.header("Diagnóstico em Lote")
+st.markdown("Envie uma planilha com vários pacientes para classificá-los de uma só vez.")
+
+with st.expander("Formato esperado do arquivo"):
+    colunas_lote = metadata['features_expected'] if metadata else []
+    st.markdown(
+        "O arquivo deve conter as colunas abaixo, com os mesmos códigos da base de treino "
+        "(ex: `Male`/`Female`, `yes`/`no`, `Sometimes`):"
+    )
+    st.code(", ".join(colunas_lote))
+
+arquivo_lote = st.file_uploader("Arquivo de pacientes", type=["csv", "xlsx"], key="arquivo_lote")
+calcular_fatores = st.checkbox(
+    "Calcular fatores de risco/proteção (SHAP)", value=True,
+    help="A explicação é a etapa mais cara. Desmarque para pontuar grandes volumes mais rápido."
+)
+
+if arquivo_lote is not None and st.button("Processar Lote", type="primary"):
+    if not metadata:
+        st.error("Erro de Validação: metadados do modelo (model_metadata.joblib) não encontrados.")
+        st.stop()
+
+    try:
+        if arquivo_lote.name.lower().endswith(".xlsx"):
+            df_lote = pd.read_excel(arquivo_lote)
+        else:
+            df_lote = pd.read_csv(arquivo_lote)
+        dados_lote, linhas_validas, status_lote = validar_lote(
+            df_lote, metadata['features_expected'], metadata.get('numeric_features'), modelo.categorias
+        )
+    except Exception as e:
+        st.error(f"Erro ao ler o arquivo: {e}")
+        st.stop()
+
+    barra = st.progress(0.0, text="Pontuando pacientes...")
+    explainer_lote = obter_explainer() if calcular_fatores else None
+    df_resultado = pontuar_lote(
+        modelo, dados_lote[linhas_validas], explainer=explainer_lote,
+        tamanho_bloco=200 if calcular_fatores else 5000,
+        progresso=lambda frac: barra.progress(frac, text=f"Pontuando pacientes... {frac:.0%}")
+    )
+    barra.empty()
+
+    df_saida = sem_colunas_resultado(df_lote).join(df_resultado)
+    df_saida['Status'] = status_lote
+    st.session_state['resultado_lote'] = df_saida
+
+if 'resultado_lote' in st.session_state:
+    df_saida = st.session_state['resultado_lote']
+    qtd_validas = int((df_saida['Status'] == 'OK').sum())
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Pacientes no Arquivo", f"{len(df_saida)}", border=True)
+    k2.metric("Pontuados", f"{qtd_validas}", border=True)
+    k3.metric("Linhas Inválidas", f"{len(df_saida) - qtd_validas}", border=True)
+
+    st.dataframe(df_saida.head(100), use_container_width=True)
+    if len(df_saida) > 100:
+        st.caption(f"Exibindo 100 de {len(df_saida)} linhas. O arquivo completo está disponível para download.")
+
+    # O CSV só é gerado quando pedido (e não a cada rerun), gravado em disco como na exportação do Dashboard
+    if st.button("Gerar arquivo de resultados"):
+        extensao, mime = FORMATOS['CSV']
+        with tempfile.TemporaryDirectory() as pasta:
+            destino = os.path.join(pasta, "diagnosticos_lote" + extensao)
+            with st.spinner("Gerando arquivo..."):
+                exportar([df_saida], 'CSV', destino)
+            with open(destino, "rb") as arquivo:
+                st.download_button(
+                    "Baixar Resultados (CSV)", data=arquivo, file_name="diagnosticos_lote" + extensao, mime=mime,
+                    type="primary", on_click="ignore"
+                )
@@ -1,15 +1,18 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import joblib
-import io
 import os
+import tempfile
 
 from utils import sidebar_topo, sidebar_rodape 
-from constants import (
-    DICT_FCVC_TEXT, DICT_CH2O_TEXT, DICT_FAF_TEXT, DICT_TUE_TEXT,
-    DICT_TRADUCAO_GERAL, DICT_COLUNAS_PT, CORES_OBESIDADE, ORDEM_OBESIDADE
-)
+from model_registry import importancia_variaveis
+from dashboard_data import DATA_PATH
+from data_export import FORMATOS, exportar
+from query_engine import obter_consultas
+from scatter_render import MODOS_DISPERSAO, figura_dispersao
+from constants import CORES_OBESIDADE, ORDEM_OBESIDADE
+
+# Linhas por página na pré-visualização dos dados brutos
+LINHAS_POR_PAGINA = 100
 
 # ============================================================================
 # 1. CONFIGURAÇÃO E ESTILIZAÇÃO DA PÁGINA
@@ -25,45 +28,14 @@ st.markdown("Explore os dados históricos de forma dinâmica. Utilize os **filtr
 # ============================================================================
 # 2. CARREGAMENTO E PRÉ-PROCESSAMENTO DE DADOS
 # ============================================================================
-@st.cache_data
-def load_data():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(base_dir, 'data', 'obesity.csv')
-    
-    try:
-        df = pd.read_csv(file_path)
-        if 'NObeyesdad' in df.columns:
-            df.rename(columns={'NObeyesdad': 'Obesity'}, inplace=True)
-        elif 'Obesity' in df.columns:
-            df.rename(columns={'Obesity': 'Obesity'}, inplace=True)
-        return df
-    except Exception as e:
-        st.error(f"Erro crítico ao carregar dados em '{file_path}': {e}")
-        return None
-
-df_raw = load_data()
-
-# --- APLICAÇÃO DAS TRANSFORMAÇÕES ---
-if df_raw is not None:
-    df = df_raw.copy()
-    
-    cols_to_round = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
-    
-    if 'NCP' in df.columns:
-        df['NCP'] = pd.to_numeric(df['NCP'], errors='coerce').fillna(1).round().astype(int)
-
-    for col in cols_to_round:
-        if col in df.columns and col != 'NCP':
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round().astype(int)
-
-    if 'FCVC' in df.columns: df['FCVC'] = df['FCVC'].replace(DICT_FCVC_TEXT)
-    if 'CH2O' in df.columns: df['CH2O'] = df['CH2O'].replace(DICT_CH2O_TEXT)
-    if 'FAF' in df.columns:  df['FAF']  = df['FAF'].replace(DICT_FAF_TEXT)
-    if 'TUE' in df.columns:  df['TUE']  = df['TUE'].replace(DICT_TUE_TEXT)
-
-    df.replace(DICT_TRADUCAO_GERAL, inplace=True)
-    df.rename(columns=DICT_COLUNAS_PT, inplace=True)
-    
+try:
+    # Backend pandas (frame em memória) ou DuckDB (SQL sobre o Parquet), ver query_engine.py
+    consultas = obter_consultas()
+except Exception as e:
+    st.error(f"Erro crítico ao carregar dados em '{DATA_PATH}': {e}")
+    consultas = None
+
+if consultas is not None:
     # ============================================================================
     # 3. BARRA LATERAL DE FILTROS
     # ============================================================================
@@ -71,83 +43,85 @@ if df_raw is not None:
     st.sidebar.markdown("Use os grupos abaixo para filtrar a base de dados.")
 
     with st.sidebar.expander("Dados Pessoais e Físicos", expanded=True):
-        obesidade_filtro = st.multiselect("Nível de Obesidade", options=df['Nível de Obesidade'].unique(), default=df['Nível de Obesidade'].unique())
-        genero_filtro = st.multiselect("Gênero", options=df['Gênero'].unique(), default=df['Gênero'].unique())
+        obesidade_filtro = st.multiselect("Nível de Obesidade", options=consultas.opcoes('Nível de Obesidade'), default=consultas.opcoes('Nível de Obesidade'))
+        genero_filtro = st.multiselect("Gênero", options=consultas.opcoes('Gênero'), default=consultas.opcoes('Gênero'))
         
-        min_age, max_age = int(df['Idade'].min()), int(df['Idade'].max())
+        min_age, max_age = map(int, consultas.intervalo('Idade'))
         if min_age == max_age: max_age += 1
         idade_filtro = st.slider("Faixa Etária", min_age, max_age, (min_age, max_age))
 
-        min_height, max_height = float(df['Altura'].min()), float(df['Altura'].max())
+        min_height, max_height = map(float, consultas.intervalo('Altura'))
         if min_height == max_height: max_height += 0.01
         altura_filtro = st.slider("Altura (m)", min_height, max_height, (min_height, max_height))
 
-        min_weight, max_weight = float(df['Peso'].min()), float(df['Peso'].max())
+        min_weight, max_weight = map(float, consultas.intervalo('Peso'))
         if min_weight == max_weight: max_weight += 1.0
         peso_filtro = st.slider("Peso (kg)", min_weight, max_weight, (min_weight, max_weight))
         
-        hist_filtro = st.multiselect("Histórico Familiar", options=df['Histórico Familiar'].unique(), default=df['Histórico Familiar'].unique())
+        hist_filtro = st.multiselect("Histórico Familiar", options=consultas.opcoes('Histórico Familiar'), default=consultas.opcoes('Histórico Familiar'))
 
     with st.sidebar.expander("Hábitos Alimentares", expanded=False):
-        favc_filtro = st.multiselect("Alimentos Calóricos", options=df['Consumo Calórico'].unique(), default=df['Consumo Calórico'].unique())
+        favc_filtro = st.multiselect("Alimentos Calóricos", options=consultas.opcoes('Consumo Calórico'), default=consultas.opcoes('Consumo Calórico'))
         fcvc_order = ["Nunca", "Às vezes", "Sempre"]
-        fcvc_options = [x for x in fcvc_order if x in df['Consumo de Vegetais'].unique()]
+        fcvc_options = [x for x in fcvc_order if x in consultas.opcoes('Consumo de Vegetais')]
         fcvc_filtro = st.multiselect("Consumo de Vegetais", options=fcvc_options, default=fcvc_options)
-        ncp_options = sorted(df['Refeições por Dia'].unique().astype(int))
+        ncp_options = sorted(int(v) for v in consultas.opcoes('Refeições por Dia'))
         ncp_filtro = st.multiselect("Refeições por Dia", options=ncp_options, default=ncp_options)
-        caec_filtro = st.multiselect("Comer entre Refeições", options=df['Comer entre Refeições'].unique(), default=df['Comer entre Refeições'].unique())
+        caec_filtro = st.multiselect("Comer entre Refeições", options=consultas.opcoes('Comer entre Refeições'), default=consultas.opcoes('Comer entre Refeições'))
         ch2o_order = ["Menos de 1L", "Entre 1L e 2L", "Mais de 2L"]
-        ch2o_options = [x for x in ch2o_order if x in df['Consumo de Água'].unique()]
+        ch2o_options = [x for x in ch2o_order if x in consultas.opcoes('Consumo de Água')]
         ch2o_filtro = st.multiselect("Consumo de Água", options=ch2o_options, default=ch2o_options)
-        scc_filtro = st.multiselect("Monitora Calorias?", options=df['Monitora Calorias'].unique(), default=df['Monitora Calorias'].unique())
-        calc_filtro = st.multiselect("Consumo de Álcool", options=df['Consumo de Álcool'].unique(), default=df['Consumo de Álcool'].unique())
+        scc_filtro = st.multiselect("Monitora Calorias?", options=consultas.opcoes('Monitora Calorias'), default=consultas.opcoes('Monitora Calorias'))
+        calc_filtro = st.multiselect("Consumo de Álcool", options=consultas.opcoes('Consumo de Álcool'), default=consultas.opcoes('Consumo de Álcool'))
 
     with st.sidebar.expander("Estilo de Vida", expanded=False):
-        smoke_filtro = st.multiselect("Fumante", options=df['Fumante'].unique(), default=df['Fumante'].unique())
+        smoke_filtro = st.multiselect("Fumante", options=consultas.opcoes('Fumante'), default=consultas.opcoes('Fumante'))
         faf_order = ["Nenhuma", "1 a 2 dias/sem", "3 a 4 dias/sem", "5 ou mais dias/sem"]
-        faf_options = [x for x in faf_order if x in df['Atividade Física'].unique()]
+        faf_options = [x for x in faf_order if x in consultas.opcoes('Atividade Física')]
         faf_filtro = st.multiselect("Atividade Física", options=faf_options, default=faf_options)
         tue_order = ["0 a 2 horas", "3 a 5 horas", "Mais de 5 horas"]
-        tue_options = [x for x in tue_order if x in df['Tempo em Tecnologia'].unique()]
+        tue_options = [x for x in tue_order if x in consultas.opcoes('Tempo em Tecnologia')]
         tue_filtro = st.multiselect("Tempo em Tecnologia", options=tue_options, default=tue_options)
-        transp_filtro = st.multiselect("Transporte", options=df['Transporte'].unique(), default=df['Transporte'].unique())
+        transp_filtro = st.multiselect("Transporte", options=consultas.opcoes('Transporte'), default=consultas.opcoes('Transporte'))
 
     # -------------------------------------------------------------------------
     # CHAMADA DO RODAPÉ (APÓS OS FILTROS)
     # -------------------------------------------------------------------------
     sidebar_rodape()
 
-    filtros_query = []
-    filtros_query.append("`Nível de Obesidade` in @obesidade_filtro")
-    filtros_query.append("`Gênero` in @genero_filtro")
-    filtros_query.append("Idade >= @idade_filtro[0] and Idade <= @idade_filtro[1]")
-    filtros_query.append("Altura >= @altura_filtro[0] and Altura <= @altura_filtro[1]")
-    filtros_query.append("Peso >= @peso_filtro[0] and Peso <= @peso_filtro[1]")
-    filtros_query.append("`Histórico Familiar` in @hist_filtro")
-    filtros_query.append("`Consumo Calórico` in @favc_filtro")
-    filtros_query.append("`Consumo de Vegetais` in @fcvc_filtro")
-    filtros_query.append("`Refeições por Dia` in @ncp_filtro")
-    filtros_query.append("`Comer entre Refeições` in @caec_filtro")
-    filtros_query.append("`Consumo de Água` in @ch2o_filtro")
-    filtros_query.append("`Monitora Calorias` in @scc_filtro")
-    filtros_query.append("`Consumo de Álcool` in @calc_filtro")
-    filtros_query.append("`Fumante` in @smoke_filtro")
-    filtros_query.append("`Atividade Física` in @faf_filtro")
-    filtros_query.append("`Tempo em Tecnologia` in @tue_filtro")
-    filtros_query.append("`Transporte` in @transp_filtro")
-
-    query_final = " & ".join(filtros_query)
-    df_filtered = df.query(query_final)
+    filtros = {
+        'Nível de Obesidade': obesidade_filtro,
+        'Gênero': genero_filtro,
+        'Idade': idade_filtro,
+        'Altura': altura_filtro,
+        'Peso': peso_filtro,
+        'Histórico Familiar': hist_filtro,
+        'Consumo Calórico': favc_filtro,
+        'Consumo de Vegetais': fcvc_filtro,
+        'Refeições por Dia': ncp_filtro,
+        'Comer entre Refeições': caec_filtro,
+        'Consumo de Água': ch2o_filtro,
+        'Monitora Calorias': scc_filtro,
+        'Consumo de Álcool': calc_filtro,
+        'Fumante': smoke_filtro,
+        'Atividade Física': faf_filtro,
+        'Tempo em Tecnologia': tue_filtro,
+        'Transporte': transp_filtro,
+    }
+
+    selecao = consultas.selecionar(filtros)
+    # Linhas para os gráficos por linha (no DuckDB, amostra da seleção se ela for muito grande)
+    df_filtered = selecao.linhas()
 
     st.markdown("### Resumo da Seleção")
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
-    if len(df_filtered) > 0:
-        total_pacientes = len(df_filtered)
-        media_idade = int(df_filtered['Idade'].mean())
-        qtd_obesos = len(df_filtered[df_filtered['Nível de Obesidade'].astype(str).str.contains("Obesidade")])
-        perc_obesidade = (qtd_obesos / total_pacientes * 100)
-        media_peso = df_filtered['Peso'].mean()
+    resumo = selecao.resumo()
+    if resumo is not None:
+        total_pacientes = resumo['total']
+        media_idade = int(resumo['media_idade'])
+        perc_obesidade = resumo['perc_obesidade']
+        media_peso = resumo['media_peso']
 
         kpi1.metric("Pacientes Analisados", f"{total_pacientes}", border=True)
         kpi2.metric("Média de Idade", f"{media_idade:} anos", border=True)
@@ -159,6 +133,9 @@ if df_raw is not None:
         kpi3.metric("Taxa de Obesidade", "0.0%", border=True)
         kpi4.metric("Peso Médio", "0.0 kg", border=True)
         st.warning("Nenhum paciente encontrado. Ajuste os filtros.")
+    if len(df_filtered) < selecao.total:
+        st.caption(f"Gráficos por paciente (dispersão, histogramas e violinos) usam uma amostra de "
+                   f"{len(df_filtered):,} dos {selecao.total:,} pacientes selecionados.".replace(',', '.'))
     
     st.markdown("---")
 
@@ -171,8 +148,8 @@ if df_raw is not None:
         st.subheader("A. Distribuição Total de Pacientes")
         st.caption("Visão geral da proporção de cada nível de obesidade no grupo selecionado.")
         fig_pie = px.pie(
-            df_filtered, 
-            names='Nível de Obesidade', 
+            selecao.contagens(['Nível de Obesidade']),
+            names='Nível de Obesidade', values='Quantidade',
             color='Nível de Obesidade',
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE},
             color_discrete_map=CORES_OBESIDADE,
@@ -191,7 +168,8 @@ if df_raw is not None:
         st.subheader("B. Distribuição por Gênero")
         st.caption("Compara a quantidade de homens e mulheres em cada categoria de peso.") 
         fig_gender = px.histogram(
-            df_filtered, x='Nível de Obesidade', color='Gênero', 
+            selecao.contagens(['Nível de Obesidade', 'Gênero']),
+            x='Nível de Obesidade', y='Quantidade', histfunc='sum', color='Gênero',
             barmode='group', text_auto=True,
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE},
             color_discrete_map={'Masculino': '#3366CC', 'Feminino': '#FF9900'}
@@ -226,7 +204,9 @@ if df_raw is not None:
         st.subheader("D. Impacto do Histórico Familiar")
         st.caption("Analisa se ter parentes com obesidade influencia o nível de peso atual.") 
         fig_family = px.histogram(
-            df_filtered, x='Histórico Familiar', color='Nível de Obesidade', barmode='group', text_auto=True,
+            selecao.contagens(['Histórico Familiar', 'Nível de Obesidade']),
+            x='Histórico Familiar', y='Quantidade', histfunc='sum', color='Nível de Obesidade',
+            barmode='group', text_auto=True,
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE},
             color_discrete_map=CORES_OBESIDADE
         )
@@ -241,14 +221,16 @@ if df_raw is not None:
 
         st.subheader("E. Relação Peso x Altura")
         st.caption("Visualização de dispersão. Cada ponto é uma pessoa. Note como as cores se agrupam (IMC).") 
-        fig_scatter = px.scatter(
-            df_filtered, x='Altura', y='Peso', color='Nível de Obesidade',
+        modo_scatter = st.radio("Exibição", MODOS_DISPERSAO, horizontal=True, key="modo_scatter")
+        fig_scatter, legenda_scatter = figura_dispersao(
+            df_filtered, x='Altura', y='Peso', color='Nível de Obesidade', modo=modo_scatter,
             hover_data=['Gênero'],
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE},
             color_discrete_map=CORES_OBESIDADE,
             height=600
         )
         st.plotly_chart(fig_scatter, use_container_width=True)
+        st.caption(legenda_scatter)
 
     # --- ABA 2: COMPORTAMENTO ---
     with tab2:
@@ -261,7 +243,8 @@ if df_raw is not None:
         )
         st.caption(f"Mostra a proporção (%) de cada nível de obesidade dentro das categorias de '{fator_risco}'.") 
         fig_bar_stack = px.histogram(
-            df_filtered, x=fator_risco, color='Nível de Obesidade', barnorm='percent',
+            selecao.contagens([fator_risco, 'Nível de Obesidade']),
+            x=fator_risco, y='Quantidade', histfunc='sum', color='Nível de Obesidade', barnorm='percent',
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE},
             color_discrete_map=CORES_OBESIDADE, height=500
         )
@@ -293,7 +276,9 @@ if df_raw is not None:
             "3 a 4 dias/sem": "#5cb85c", "5 ou mais dias/sem": "#2e7d32"
         }
         fig_stack_faf = px.histogram(
-            df_filtered, x='Nível de Obesidade', color='Atividade Física', barnorm='percent', text_auto='.0f',
+            selecao.contagens(['Nível de Obesidade', 'Atividade Física']),
+            x='Nível de Obesidade', y='Quantidade', histfunc='sum', color='Atividade Física',
+            barnorm='percent', text_auto='.0f',
             category_orders={'Nível de Obesidade': ORDEM_OBESIDADE, 'Atividade Física': ordem_atividade},
             color_discrete_map=mapa_cores_atividade
         )
@@ -322,7 +307,6 @@ if df_raw is not None:
             "Atividade Física": 3, "Tempo em Tecnologia": 2, "Consumo de Álcool": 3
         }
 
-        df_heatmap = df_filtered.copy()
         mapa_numerico = {
             "Não": 0, "Sim": 1, "no": 0, "yes": 1,
             "Nunca": 0, "Às vezes": 1, "Frequentemente": 2, "Sempre": 3, "Always": 3,
@@ -331,15 +315,11 @@ if df_raw is not None:
             "0 a 2 horas": 0, "3 a 5 horas": 1, "Mais de 5 horas": 2,
             "Sometimes": 1, "Frequently": 2
         }
-        df_heatmap.replace(mapa_numerico, inplace=True)
-        cols_validas = [c for c in comport_cols_map.values() if pd.api.types.is_numeric_dtype(df_heatmap[c])]
-        
-        if cols_validas:
-            for col in cols_validas:
-                max_val = limites_maximos.get(col, 1)
-                df_heatmap[col] = (df_heatmap[col] / max_val)
+        # Média de cada hábito por nível, em uma passada pelas contagens da seleção
+        medias_habitos = selecao.medias("Nível de Obesidade", list(comport_cols_map.values()), mapa_numerico)
 
-            df_heatmap_grouped = df_heatmap.groupby("Nível de Obesidade")[cols_validas].mean()
+        if medias_habitos is not None:
+            df_heatmap_grouped = medias_habitos / [limites_maximos.get(col, 1) for col in medias_habitos.columns]
             ordem_existente = [o for o in ORDEM_OBESIDADE if o in df_heatmap_grouped.index]
             df_heatmap_grouped = df_heatmap_grouped.reindex(ordem_existente)
 
@@ -355,47 +335,8 @@ if df_raw is not None:
         st.markdown("### E. Importância das Variáveis no Modelo Preditivo")
         st.caption("Quais perguntas tiveram mais peso matemático para o modelo aprender a classificar a obesidade.") 
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            model_path = os.path.join(base_dir, 'saved_model', 'modelo_obesidade.joblib')
-            
-            model = joblib.load(model_path)
-            rf = model.named_steps["classifier"]
-            importances = rf.feature_importances_
-            preprocessor = model.named_steps["preprocessor"]
-            feature_names = []
-
-            if hasattr(preprocessor, 'transformers_'):
-                num_features = preprocessor.transformers_[0][2]
-                feature_names.extend(num_features)
-                if hasattr(preprocessor.transformers_[1][1], 'named_steps'):
-                    ohe = preprocessor.transformers_[1][1].named_steps["onehot"]
-                    ohe_features = ohe.get_feature_names_out(preprocessor.transformers_[1][2])
-                    feature_names.extend(ohe_features)
-                ordinal_features = preprocessor.transformers_[2][2]
-                feature_names.extend(ordinal_features)
-
-            if len(feature_names) == len(importances):
-                df_imp = pd.DataFrame({"Feature_Raw": feature_names, "Importância": importances})
-
-                def traduzir_nome_feature(nome_raw):
-                    nome_limpo = nome_raw.split("__")[-1] if "__" in nome_raw else nome_raw
-                    
-                    if nome_limpo in DICT_COLUNAS_PT:
-                        return DICT_COLUNAS_PT[nome_limpo]
-                    
-                    for col_eng, col_pt in DICT_COLUNAS_PT.items():
-                        if col_eng in nome_limpo:
-                            sufixo = nome_limpo.replace(col_eng, "").replace("_", " ").strip()
-                            if sufixo:
-                                sufixo_trad = DICT_TRADUCAO_GERAL.get(sufixo.strip(), sufixo)
-                                return f"{col_pt} ({sufixo_trad})"
-                            return col_pt
-                            
-                    return nome_limpo
-
-                df_imp['Feature'] = df_imp['Feature_Raw'].apply(traduzir_nome_feature)
-                df_imp = df_imp.sort_values("Importância", ascending=False)
-
+            df_imp = importancia_variaveis()
+            if df_imp is not None:
                 fig_imp = px.bar(
                     df_imp, x="Importância", y="Feature", orientation="h", 
                     color="Importância", color_continuous_scale="Viridis"
@@ -421,8 +362,6 @@ if df_raw is not None:
     with tab3:
         st.markdown("### Heatmap de Correlação")
         st.caption("Mostra se duas variáveis crescem juntas (vermelho) ou se opõem (azul). Foco: Veja a linha 'Nível de Obesidade'.") 
-        df_corr = df_filtered.copy()
-        
         mapa_obesidade_num = {k: i for i, k in enumerate(ORDEM_OBESIDADE)}
         
         mapa_conversao_corr = {
@@ -434,17 +373,9 @@ if df_raw is not None:
             "Transporte Público": 0, "Caminhada": 1, "Carro": 2, "Moto": 3, "Bicicleta": 4
         }
         
-        df_corr['Nível de Obesidade'] = df_corr['Nível de Obesidade'].replace(mapa_obesidade_num)
-        df_corr.replace(mapa_conversao_corr, inplace=True)
-
-        df_num = df_corr.select_dtypes(include=['int64', 'float64', 'int32'])
-
-        if df_num.shape[1] >= 2:
-            corr_matrix = df_num.corr()
-            if 'Nível de Obesidade' in corr_matrix.columns:
-                cols_ordenadas = corr_matrix.sort_values('Nível de Obesidade', ascending=False).index
-                corr_matrix = corr_matrix[cols_ordenadas].reindex(cols_ordenadas)
+        corr_matrix = selecao.correlacao(mapa_obesidade_num, mapa_conversao_corr)
 
+        if corr_matrix is not None:
             fig_corr = px.imshow(corr_matrix, text_auto='.2f', aspect="auto", color_continuous_scale="RdBu_r", zmin=-1, zmax=1)
             st.plotly_chart(fig_corr, use_container_width=True)
         else:
@@ -459,15 +390,18 @@ if df_raw is not None:
         with c3: cor_legenda = st.selectbox("Segmentação", colunas_disponiveis, index=colunas_disponiveis.index('Nível de Obesidade') if 'Nível de Obesidade' in colunas_disponiveis else 0)
         
         tipo_grafico = st.radio("Tipo de Gráfico", ["Dispersão", "Histograma", "Box Plot", "Violino"], horizontal=True)
+        if tipo_grafico == "Dispersão":
+            modo_custom = st.radio("Exibição", MODOS_DISPERSAO, horizontal=True, key="modo_custom")
         mapa_cores_dinamico = CORES_OBESIDADE if cor_legenda == 'Nível de Obesidade' else None
 
         st.caption("Use os controles acima para cruzar variáveis livremente.") 
 
         try:
             fig_custom = None
+            legenda_custom = None
             if tipo_grafico == "Dispersão": 
-                fig_custom = px.scatter(
-                    df_filtered, x=eixo_x, y=eixo_y, color=cor_legenda,
+                fig_custom, legenda_custom = figura_dispersao(
+                    df_filtered, x=eixo_x, y=eixo_y, color=cor_legenda, modo=modo_custom,
                     color_discrete_map=mapa_cores_dinamico,
                     category_orders={'Nível de Obesidade': ORDEM_OBESIDADE}
                 )
@@ -498,22 +432,40 @@ if df_raw is not None:
             if fig_custom:
                 fig_custom.update_layout(height=500, margin=dict(t=20))
                 st.plotly_chart(fig_custom, use_container_width=True)
+                if legenda_custom:
+                    st.caption(legenda_custom)
         except Exception as e:
             st.error(f"Não foi possível gerar o gráfico: {e}")
 
         # Exportação
         st.markdown("---")
         with st.expander("Ver e Baixar Dados Brutos"):
-            st.dataframe(df_filtered)
-            col_csv, col_xlsx = st.columns(2)
-            
-            csv = df_filtered.to_csv(index=False).encode('utf-8')
-            col_csv.download_button("Baixar CSV", data=csv, file_name="dados.csv", mime="text/csv", type="primary")
-            
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df_filtered.to_excel(writer, index=False)
-            col_xlsx.download_button("Baixar Excel", data=buffer, file_name="dados.xlsx", mime="application/vnd.ms-excel")
+            # Pré-visualização paginada: o navegador recebe uma página por vez
+            n_paginas = max(1, -(-selecao.total // LINHAS_POR_PAGINA))
+            pagina = st.number_input("Página", min_value=1, max_value=n_paginas, value=1, step=1)
+            inicio = (pagina - 1) * LINHAS_POR_PAGINA
+            st.dataframe(selecao.pagina(inicio, LINHAS_POR_PAGINA))
+            st.caption(f"Linhas {min(inicio + 1, selecao.total):,} a {min(inicio + LINHAS_POR_PAGINA, selecao.total):,} "
+                       f"de {selecao.total:,}.".replace(',', '.'))
+
+            # O arquivo só é gerado quando pedido, bloco a bloco, em disco
+            col_formato, col_gerar = st.columns(2)
+            formato = col_formato.radio("Formato", list(FORMATOS), horizontal=True)
+            if col_gerar.button("Gerar arquivo", type="primary"):
+                extensao, mime = FORMATOS[formato]
+                with tempfile.TemporaryDirectory() as pasta:
+                    destino = os.path.join(pasta, "dados" + extensao)
+                    try:
+                        with st.spinner("Gerando arquivo..."):
+                            exportar(selecao.blocos(), formato, destino)
+                    except ValueError as e:
+                        st.warning(str(e))
+                    else:
+                        with open(destino, "rb") as arquivo:
+                            col_gerar.download_button(
+                                f"Baixar {formato}", data=arquivo, file_name="dados" + extensao, mime=mime,
+                                on_click="ignore"
+                            )
 
 else:
     st.warning("Aguardando carregamento dos dados...")
\ No newline at end of file
@@ -1,12 +1,8 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import plotly.express as px
-import plotly.graph_objects as go
-import os
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, precision_score, recall_score, f1_score
 from utils import sidebar_topo, sidebar_rodape
+from evaluation import DATA_PATH, LABELS_ORDENADAS, ORIGEM_INDISPONIVEL, obter_relatorio
 
 # ============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -25,47 +21,28 @@ Os dados apresentados referem-se ao **Conjunto de Teste (20% dos dados)**, que o
 # ============================================================================
 # 2. CARREGAMENTO E PREPARAÇÃO
 # ============================================================================
-@st.cache_data
-def load_and_prep_data():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(base_dir, 'data', 'obesity.csv')
-    
-    try:
-        df = pd.read_csv(file_path)
-            
-        if 'NObeyesdad' in df.columns:
-            df.rename(columns={'NObeyesdad': 'Obesity'}, inplace=True)
-        elif 'Obesity' in df.columns:
-            df.rename(columns={'Obesity': 'Obesity'}, inplace=True)
-            
-        cols_to_round = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
-        for col in cols_to_round:
-            if col in df.columns:
-                df[col] = df[col].round().astype(int)
-                
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return None
-
+# Relatório salvo em saved_model/, reaproveitado enquanto modelo e dados não mudarem
+relatorio, erro_dados = None, None
 try:
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    model_path = os.path.join(base_dir, 'saved_model', 'modelo_obesidade.joblib')
-    pipeline = joblib.load(model_path)
-except:
+    relatorio = obter_relatorio(recalcular=st.session_state.pop('recalcular_avaliacao', False))
+except Exception as e:
+    erro_dados = e
+
+if erro_dados is not None:
+    st.error(f"Erro ao carregar dados em '{DATA_PATH}': {erro_dados}")
+elif relatorio is None:
     st.error("Erro ao carregar o modelo. Verifique o caminho 'saved_model/modelo_obesidade.joblib'")
     st.stop()
 
-df = load_and_prep_data()
+if relatorio is not None and relatorio['origem_teste'] == ORIGEM_INDISPONIVEL:
+    # Sem as linhas de teste do treino, qualquer métrica misturaria dados de treino no teste
+    st.warning("**Sem conjunto de teste reproduzível.** A base de dados foi substituída desde o treinamento "
+               "(ou o modelo não traz as linhas de teste nos metadados), então as métricas não são exibidas: "
+               "um novo split incluiria pacientes usados no treino. Treine o modelo novamente com "
+               "`python train.py` para avaliar na base atual.")
+    sidebar_rodape()
 
-if df is not None:
-    X = df.drop('Obesity', axis=1)
-    y = df['Obesity']
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    
-    y_pred = pipeline.predict(X_test)
-    
+elif relatorio is not None:
     # ============================================================================
     # 3. MÉTRICAS GERAIS (LINHA DE TOPO)
     # ============================================================================
@@ -73,10 +50,8 @@ if df is not None:
     st.caption("Visão geral do desempenho do modelo em dados desconhecidos.")
     c1, c2, c3, c4 = st.columns(4)
     
-    acc = accuracy_score(y_test, y_pred)
-    prec = precision_score(y_test, y_pred, average='weighted')
-    rec = recall_score(y_test, y_pred, average='weighted')
-    f1 = f1_score(y_test, y_pred, average='weighted')
+    metricas = relatorio['metricas']
+    acc, prec, rec, f1 = metricas['acuracia'], metricas['precisao'], metricas['recall'], metricas['f1']
     
     c1.metric("Acurácia Global", f"{acc:.1%}", help="Porcentagem de acertos totais do modelo.")
     c2.metric("Precisão (Média)", f"{prec:.1%}", help="Quando o modelo diz que é X, o quanto ele acerta?")
@@ -91,11 +66,7 @@ if df is not None:
     st.subheader("Matriz de Confusão")
     st.caption("**Como ler:** O eixo Y mostra o que a pessoa *realmente* tem. O eixo X mostra o que o modelo *disse* que ela tinha. Quanto mais azul na diagonal principal, melhor (acertos).")
     
-    labels_ordenadas = [
-        'Insufficient_Weight', 'Normal_Weight', 
-        'Overweight_Level_I', 'Overweight_Level_II',
-        'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
-    ]
+    labels_ordenadas = LABELS_ORDENADAS
     
     dict_labels_curtos = {
         'Insufficient_Weight': 'Abaixo', 'Normal_Weight': 'Normal',
@@ -103,7 +74,7 @@ if df is not None:
         'Obesity_Type_I': 'Obes. I', 'Obesity_Type_II': 'Obes. II', 'Obesity_Type_III': 'Obes. III'
     }
     
-    cm = confusion_matrix(y_test, y_pred, labels=labels_ordenadas)
+    cm = relatorio['matriz_confusao']
     
     fig_cm = px.imshow(
         cm,
@@ -125,7 +96,7 @@ if df is not None:
     st.subheader("Relatório Detalhado por Classe")
     st.caption("**Precision:** Confiança do acerto. **Recall:** Capacidade de detecção. **Support:** Quantas pessoas desse tipo existiam no teste.")
     
-    report_dict = classification_report(y_test, y_pred, output_dict=True)
+    report_dict = relatorio['classification_report']
     df_report = pd.DataFrame(report_dict).transpose()
     
     df_report = df_report.loc[labels_ordenadas]
@@ -142,6 +113,11 @@ if df is not None:
     
     st.info("**Nota:** O modelo apresenta excelente performance nas classes extremas (Abaixo do Peso e Obesidade III), com ligeira confusão entre os níveis de Sobrepeso, o que é esperado devido à proximidade dos limites de IMC.")
 
+    st.caption(f"Avaliação gerada em {relatorio['gerado_em'].replace('T', ' ')} com {relatorio['n_teste']} pacientes de teste.")
+    if st.button("Recalcular avaliação", help="Refaz a avaliação no conjunto de teste e atualiza o relatório salvo."):
+        st.session_state['recalcular_avaliacao'] = True
+        st.rerun()
+
     sidebar_rodape()
 
 else:
@@ -0,0 +1,525 @@
+"""
+Consultas do Dashboard: filtros e agregações com dois backends intercambiáveis.
+
+- `pandas` (padrão): o frame de exibição fica em memória no processo e as
+  consultas usam o motor de filtros e o cubo de contagens (`dashboard_data`).
+- `duckdb` (opcional, `pip install duckdb`): os mesmos filtros e agregações
+  viram SQL sobre os arquivos Parquet do dataset (`data_store`), executado por
+  um DuckDB embutido. A base não é carregada no Python: só chegam os
+  resultados agregados (contagens, médias, correlações) e, para os gráficos
+  que precisam de linhas (dispersão, histogramas, violinos, tabela), uma
+  amostra de até `LIMITE_LINHAS` linhas da seleção. O DuckDB lê o Parquet por
+  partes e usa todos os núcleos na varredura, então a base pode ser maior
+  que a memória.
+
+O backend é escolhido pela variável de ambiente `HEALTHANALYTICS_CONSULTAS`
+(`pandas` ou `duckdb`). Sem o pacote `duckdb`, o Dashboard volta ao pandas.
+
+Os dois backends devolvem os mesmos resultados. No DuckDB, cada coluna de
+exibição é calculada em SQL como um "código" (valor bruto, escala
+arredondada) e traduzida para o rótulo em PT depois da agregação, passando os
+códigos distintos pelo próprio `preparar_frame_exibicao`.
+"""
+import importlib.util
+import os
+import threading
+import warnings
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from constants import DICT_COLUNAS_PT
+from count_cube import COLUNA_CONTAGEM, media_ponderada_contagens
+from dashboard_data import (
+    COLUNAS_FILTRO_CATEGORICAS, COLUNAS_FILTRO_NUMERICAS, DATA_PATH, obter_dados_dashboard, preparar_frame_exibicao
+)
+from data_store import ARQUIVO_BASE, diretorio_dataset, garantir_dataset, versao_dataset
+
+VARIAVEL_BACKEND = 'HEALTHANALYTICS_CONSULTAS'
+BACKENDS = ('pandas', 'duckdb')
+
+# Linhas entregues aos gráficos por linha no backend DuckDB (amostra da seleção acima disso)
+LIMITE_LINHAS = 50_000
+
+# Linhas por bloco ao percorrer a seleção inteira (exportação)
+TAMANHO_BLOCO = 50_000
+
+COLUNA_OBESIDADE = 'Nível de Obesidade'
+# Níveis contados na "Taxa de Obesidade" (rótulos que contêm o termo)
+TERMO_OBESIDADE = 'Obesidade'
+
+_trava = threading.Lock()
+
+
+def backend_configurado() -> str:
+    """Backend pedido em `HEALTHANALYTICS_CONSULTAS` (padrão: pandas)."""
+    backend = os.environ.get(VARIAVEL_BACKEND, 'pandas').strip().lower()
+    return backend if backend in BACKENDS else 'pandas'
+
+
+def duckdb_disponivel() -> bool:
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def _ordenar_por_obesidade(corr_matrix: pd.DataFrame) -> pd.DataFrame:
+    if COLUNA_OBESIDADE in corr_matrix.columns:
+        cols_ordenadas = corr_matrix.sort_values(COLUNA_OBESIDADE, ascending=False).index
+        corr_matrix = corr_matrix[cols_ordenadas].reindex(cols_ordenadas)
+    return corr_matrix
+
+
+# ==============================================================================
+# BACKEND PANDAS (FRAME EM MEMÓRIA)
+# ==============================================================================
+class ConsultasPandas:
+    """Consultas sobre o frame de exibição em memória, com o motor de filtros e o cubo da mesma versão."""
+
+    nome = 'pandas'
+
+    def __init__(self, df: pd.DataFrame, motor, cubo):
+        self.df = df
+        self.motor = motor
+        self.cubo = cubo
+
+    def opcoes(self, col: str) -> list:
+        """Valores distintos da coluna, na ordem de aparição (opções dos multiselects)."""
+        return list(self.df[col].unique())
+
+    def intervalo(self, col: str) -> Tuple[float, float]:
+        return self.df[col].min(), self.df[col].max()
+
+    def selecionar(self, filtros: Dict[str, Tuple]) -> 'SelecaoPandas':
+        return SelecaoPandas(self, filtros)
+
+
+class SelecaoPandas:
+    """Linhas selecionadas pelos filtros (máscara do motor) e suas agregações."""
+
+    def __init__(self, consultas: ConsultasPandas, filtros: Dict[str, Tuple]):
+        self._consultas = consultas
+        self._filtros = filtros
+        self._mascara = None
+        cubo, motor = consultas.cubo, consultas.motor
+        intervalos = [col for col, valor in filtros.items()
+                      if col not in cubo.dimensoes and motor.mascara_coluna(col, valor) is not None]
+        # Contagens por célula do cubo: os gráficos de contagem/proporção e os indicadores usam
+        # só estas somas. Sem filtro de intervalo ativo, saem das células (custo por célula, não
+        # por linha) e a máscara de linhas só é montada se algum gráfico pedir as linhas.
+        self._por_celulas = not intervalos
+        if intervalos:
+            self._por_celula = cubo.contagens_celulas(self.mascara)
+        else:
+            self._por_celula = cubo.contagens_filtros(
+                {col: valor for col, valor in filtros.items() if col in cubo.dimensoes})
+        self.total = int(self._por_celula.sum())
+        self._linhas = None
+        self._posicoes_selecionadas = None
+
+    @property
+    def mascara(self) -> np.ndarray:
+        """Linhas selecionadas pelos filtros (montada na primeira leitura)."""
+        if self._mascara is None:
+            self._mascara = self._consultas.motor.mascara(self._filtros)
+        return self._mascara
+
+    def linhas(self) -> pd.DataFrame:
+        """Linhas da seleção no formato de exibição (todas, neste backend)."""
+        if self._linhas is None:
+            self._linhas = self._consultas.df[self.mascara]
+        return self._linhas
+
+    def _posicoes(self) -> np.ndarray:
+        if self._posicoes_selecionadas is None:
+            self._posicoes_selecionadas = np.flatnonzero(self.mascara)
+        return self._posicoes_selecionadas
+
+    def pagina(self, inicio: int, tamanho: int) -> pd.DataFrame:
+        """Linhas `inicio` a `inicio + tamanho` da seleção (pré-visualização paginada)."""
+        return self._consultas.df.iloc[self._posicoes()[inicio:inicio + tamanho]]
+
+    def blocos(self, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[pd.DataFrame]:
+        """Seleção inteira em blocos de até `tamanho_bloco` linhas, na ordem da base."""
+        posicoes = self._posicoes()
+        # Seleção vazia: um bloco vazio, para a exportação ainda levar o cabeçalho
+        for inicio in range(0, max(len(posicoes), 1), tamanho_bloco):
+            yield self._consultas.df.iloc[posicoes[inicio:inicio + tamanho_bloco]]
+
+    def _mascara_linhas(self) -> Optional[np.ndarray]:
+        """Máscara para as células cortadas por um filtro de intervalo (None se a seleção vem das células)."""
+        return None if self._por_celulas else self.mascara
+
+    def resumo(self) -> Optional[dict]:
+        """Indicadores da seleção (None se estiver vazia)."""
+        if self.total == 0:
+            return None
+        cubo = self._consultas.cubo
+        por_nivel = self.contagens([COLUNA_OBESIDADE])
+        qtd_obesos = por_nivel.loc[por_nivel[COLUNA_OBESIDADE].astype(str).str.contains(TERMO_OBESIDADE),
+                                   COLUNA_CONTAGEM].sum()
+        medias = cubo.medias_medidas(['Idade', 'Peso'], self._mascara_linhas(), self._por_celula)
+        return {
+            'total': self.total,
+            'media_idade': medias['Idade'],
+            'perc_obesidade': qtd_obesos / self.total * 100,
+            'media_peso': medias['Peso'],
+        }
+
+    def contagens(self, colunas: List[str]) -> pd.DataFrame:
+        return self._consultas.cubo.contagens(colunas, por_celula=self._por_celula)
+
+    def media_ponderada(self, grupo: str, coluna: str, valores: dict) -> Optional[pd.Series]:
+        return self._consultas.cubo.media_ponderada(grupo, coluna, valores, por_celula=self._por_celula)
+
+    def medias(self, grupo: str, colunas: List[str], valores: dict) -> Optional[pd.DataFrame]:
+        return self._consultas.cubo.medias(grupo, colunas, valores, por_celula=self._por_celula)
+
+    def correlacao(self, mapa_obesidade: dict, mapa_conversao: dict) -> Optional[pd.DataFrame]:
+        """
+        Correlação entre as colunas numéricas após converter os rótulos em números.
+
+        A matriz sai das estatísticas por célula do cubo: as linhas só são lidas nas
+        células cortadas por um filtro de intervalo.
+
+        Returns:
+            pd.DataFrame | None: Matriz ordenada pela correlação com o nível de obesidade,
+            ou None com menos de duas colunas numéricas.
+        """
+        cubo = self._consultas.cubo
+        # Mesmo efeito do `replace` do nível de obesidade seguido do `replace` geral
+        conversao_obesidade = {**mapa_conversao,
+                               **{k: mapa_conversao.get(v, v) for k, v in mapa_obesidade.items()}}
+        valores = {col: mapa_conversao for col in cubo.dimensoes}
+        valores[COLUNA_OBESIDADE] = conversao_obesidade
+
+        colunas = [col for col in self._consultas.df.columns if col in cubo.dimensoes or col in cubo.medidas]
+        corr_matrix = cubo.correlacao(colunas, valores, self._mascara_linhas(), self._por_celula)
+        return None if corr_matrix is None else _ordenar_por_obesidade(corr_matrix)
+
+
+# ==============================================================================
+# BACKEND DUCKDB (SQL SOBRE O PARQUET)
+# ==============================================================================
+# Escalas arredondadas como em `preparar_frame_exibicao` (valor de preenchimento para ausentes)
+ESCALAS_PREENCHIMENTO = {'NCP': 1, 'FCVC': 0, 'CH2O': 0, 'FAF': 0, 'TUE': 0}
+
+COLUNAS_BRUTAS = {pt: bruta for bruta, pt in DICT_COLUNAS_PT.items()}
+
+
+def _citar(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+
+class ConsultasDuckDB:
+    """
+    Consultas SQL sobre os arquivos Parquet de uma versão do dataset.
+
+    Na criação, lê apenas os códigos distintos das colunas categóricas (ordem de
+    aparição e rótulos em PT) e os limites das numéricas.
+
+    Args:
+        arquivos (List[str]): Base e lotes, na ordem de leitura do `data_store`.
+    """
+
+    nome = 'duckdb'
+
+    def __init__(self, arquivos: List[str]):
+        import duckdb
+
+        self._con = duckdb.connect()
+        partes = [
+            f"SELECT * EXCLUDE (file_row_number), {i} AS _arquivo, file_row_number AS _linha "
+            f"FROM read_parquet('{arquivo.replace(chr(39), chr(39) * 2)}', file_row_number=true)"
+            for i, arquivo in enumerate(arquivos)
+        ]
+        self._con.execute(f"CREATE VIEW pacientes AS {' UNION ALL '.join(partes)}")
+        self.colunas_brutas = [
+            nome for nome, in self._con.execute(
+                "SELECT column_name FROM (DESCRIBE pacientes) WHERE column_name NOT IN ('_arquivo', '_linha')"
+            ).fetchall()
+        ]
+        self.colunas = [DICT_COLUNAS_PT.get(col, col) for col in self.colunas_brutas]
+        self._trava = threading.Lock()
+
+        # Por coluna categórica: códigos na ordem de aparição e código <-> rótulo
+        self._codigos, self._rotulos, self._codigo_do_rotulo = {}, {}, {}
+        for col in COLUNAS_FILTRO_CATEGORICAS:
+            codigos = [codigo for codigo, in self._executar(
+                f"SELECT {self._expressao(col)} AS codigo FROM pacientes WHERE codigo IS NOT NULL "
+                f"GROUP BY codigo ORDER BY min((_arquivo::BIGINT << 40) + _linha)"
+            ).fetchall()]
+            bruta = COLUNAS_BRUTAS[col]
+            rotulos = preparar_frame_exibicao(pd.DataFrame({bruta: pd.Series(codigos, dtype=object)}))[col]
+            self._codigos[col] = codigos
+            self._rotulos[col] = dict(zip(codigos, rotulos.tolist()))
+            self._codigo_do_rotulo[col] = {rotulo: codigo for codigo, rotulo in self._rotulos[col].items()}
+
+        # Colunas que o frame de exibição guarda como números (ex: Refeições por Dia), não como categorias
+        self._inteiras = {
+            col for col in COLUNAS_FILTRO_CATEGORICAS
+            if self._codigos[col] and pd.api.types.is_integer_dtype(pd.Series(self.opcoes(col)))
+        }
+
+        # Limites das colunas numéricas, em uma varredura (fixos para a versão do dataset)
+        limites = self._executar("SELECT " + ", ".join(
+            f"min({self._expressao(col)}), max({self._expressao(col)})" for col in COLUNAS_FILTRO_NUMERICAS
+        ) + " FROM pacientes").fetchone()
+        self._intervalos = {col: limites[2 * i:2 * i + 2] for i, col in enumerate(COLUNAS_FILTRO_NUMERICAS)}
+
+    def _executar(self, sql: str, parametros: Optional[list] = None):
+        # Um cursor por consulta: a conexão é compartilhada entre as sessões do Streamlit
+        with self._trava:
+            cursor = self._con.cursor()
+        return cursor.execute(sql, parametros or [])
+
+    def _expressao(self, col: str) -> str:
+        """Expressão SQL do código da coluna de exibição `col`."""
+        bruta = COLUNAS_BRUTAS.get(col, col)
+        if bruta in ESCALAS_PREENCHIMENTO:
+            # round_even: mesmo arredondamento (metade para o par) do pandas
+            return f"CAST(round_even(coalesce({_citar(bruta)}, {ESCALAS_PREENCHIMENTO[bruta]}), 0) AS BIGINT)"
+        return _citar(bruta)
+
+    def opcoes(self, col: str) -> list:
+        return [self._rotulos[col][codigo] for codigo in self._codigos[col]]
+
+    def intervalo(self, col: str) -> Tuple[float, float]:
+        return self._intervalos[col]
+
+    def selecionar(self, filtros: Dict[str, Tuple]) -> 'SelecaoDuckDB':
+        return SelecaoDuckDB(self, filtros)
+
+    def codigos(self, col: str, rotulos) -> list:
+        mapa = self._codigo_do_rotulo[col]
+        return [mapa[rotulo] for rotulo in rotulos if rotulo in mapa]
+
+    def rotulo(self, col: str, codigo):
+        return self._rotulos[col].get(codigo, codigo)
+
+
+class SelecaoDuckDB:
+    """Cláusula WHERE dos filtros e as agregações executadas no DuckDB."""
+
+    def __init__(self, consultas: ConsultasDuckDB, filtros: Dict[str, Tuple]):
+        self._consultas = consultas
+        condicoes, self._parametros = [], []
+        for col, valor in filtros.items():
+            expressao = consultas._expressao(col)
+            if col in consultas._codigos:
+                codigos = consultas.codigos(col, valor)
+                if not codigos:
+                    condicoes.append("FALSE")
+                    continue
+                condicoes.append(f"{expressao} IN ({', '.join('?' * len(codigos))})")
+                self._parametros.extend(codigos)
+            else:
+                condicoes.append(f"{expressao} BETWEEN ? AND ?")
+                self._parametros.extend([float(valor[0]), float(valor[1])])
+        self._where = " AND ".join(condicoes) or "TRUE"
+        self.total = self._executar("SELECT count(*) FROM pacientes WHERE {where}").fetchone()[0]
+        self._linhas = None
+
+    def _executar(self, sql: str, parametros_extra: Optional[list] = None):
+        return self._consultas._executar(sql.format(where=self._where), self._parametros + (parametros_extra or []))
+
+    def linhas(self) -> pd.DataFrame:
+        """Linhas da seleção no formato de exibição (amostra de `LIMITE_LINHAS` se a seleção for maior)."""
+        if self._linhas is None:
+            colunas = ', '.join(_citar(col) for col in self._consultas.colunas_brutas)
+            amostra = f" USING SAMPLE reservoir({LIMITE_LINHAS} ROWS) REPEATABLE (42)" if self.total > LIMITE_LINHAS else ""
+            bruto = self._executar(
+                f"SELECT {colunas} FROM (SELECT * FROM pacientes WHERE {{where}}){amostra} ORDER BY _arquivo, _linha"
+            ).df()
+            self._linhas = preparar_frame_exibicao(bruto)
+        return self._linhas
+
+    def _consulta_linhas(self, sufixo: str = "") -> str:
+        colunas = ', '.join(_citar(col) for col in self._consultas.colunas_brutas)
+        return f"SELECT {colunas} FROM pacientes WHERE {{where}} ORDER BY _arquivo, _linha{sufixo}"
+
+    def pagina(self, inicio: int, tamanho: int) -> pd.DataFrame:
+        """Linhas `inicio` a `inicio + tamanho` da seleção completa (sem amostra)."""
+        bruto = self._executar(self._consulta_linhas(" LIMIT ? OFFSET ?"), [int(tamanho), int(inicio)]).df()
+        return preparar_frame_exibicao(bruto)
+
+    def blocos(self, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[pd.DataFrame]:
+        """Seleção inteira (sem amostra) em blocos lidos do DuckDB à medida que são consumidos."""
+        cursor = self._executar(self._consulta_linhas())
+        leitor = cursor.fetch_record_batch(tamanho_bloco)
+        vazia = True
+        for lote in leitor:
+            if lote.num_rows:
+                vazia = False
+                yield preparar_frame_exibicao(lote.to_pandas())
+        if vazia:
+            yield preparar_frame_exibicao(leitor.schema.empty_table().to_pandas())
+
+    def _mascara_linhas(self) -> Optional[np.ndarray]:
+        """Máscara para as células cortadas por um filtro de intervalo (None se a seleção vem das células)."""
+        return None if self._por_celulas else self.mascara
+
+    def resumo(self) -> Optional[dict]:
+        if self.total == 0:
+            return None
+        consultas = self._consultas
+        obesos = [codigo for codigo in consultas._codigos[COLUNA_OBESIDADE]
+                  if TERMO_OBESIDADE in str(consultas.rotulo(COLUNA_OBESIDADE, codigo))]
+        condicao_obesos = (f"{consultas._expressao(COLUNA_OBESIDADE)} IN ({', '.join('?' * len(obesos))})"
+                           if obesos else "FALSE")
+        media_idade, qtd_obesos, media_peso = self._consultas._executar(
+            f"SELECT avg({consultas._expressao('Idade')}), count(*) FILTER (WHERE {condicao_obesos}), "
+            f"avg({consultas._expressao('Peso')}) FROM pacientes WHERE {self._where}",
+            obesos + self._parametros
+        ).fetchone()
+        return {
+            'total': self.total,
+            'media_idade': media_idade,
+            'perc_obesidade': qtd_obesos / self.total * 100,
+            'media_peso': media_peso,
+        }
+
+    def contagens(self, colunas: List[str]) -> pd.DataFrame:
+        """Mesma tabela de `CuboContagens.contagens`: combinações com contagem positiva, na ordem de aparição."""
+        consultas = self._consultas
+        expressoes = ', '.join(f"{consultas._expressao(col)} AS c{i}" for i, col in enumerate(colunas))
+        nao_nulos = ' AND '.join(f"c{i} IS NOT NULL" for i in range(len(colunas))) or "TRUE"
+        grupos = self._executar(
+            f"SELECT * FROM (SELECT {expressoes}, count(*) AS n FROM pacientes WHERE {{where}} GROUP BY ALL) "
+            f"WHERE {nao_nulos}"
+        ).fetchall()
+
+        posicoes = [{codigo: i for i, codigo in enumerate(consultas._codigos[col])} for col in colunas]
+        grupos.sort(key=lambda linha: tuple(pos[codigo] for pos, codigo in zip(posicoes, linha)))
+        resultado = {
+            col: np.array([consultas.rotulo(col, linha[i]) for linha in grupos], dtype=object)
+            for i, col in enumerate(colunas)
+        }
+        df_contagens = pd.DataFrame(resultado)
+        df_contagens[COLUNA_CONTAGEM] = np.array([linha[-1] for linha in grupos], dtype=np.int64)
+        return df_contagens
+
+    def media_ponderada(self, grupo: str, coluna: str, valores: dict) -> Optional[pd.Series]:
+        return media_ponderada_contagens(self.contagens([grupo, coluna]), grupo, coluna, valores)
+
+    def medias(self, grupo: str, colunas: List[str], valores: dict) -> Optional[pd.DataFrame]:
+        """Mesmo resultado de `CuboContagens.medias`, com as contagens de todas as colunas em uma varredura."""
+        if not colunas:
+            return None
+        consultas = self._consultas
+        conjuntos = ', '.join(f"(g, c{i})" for i in range(len(colunas)))
+        expressoes = ', '.join(f"{consultas._expressao(col)} AS c{i}" for i, col in enumerate(colunas))
+        indicadores = ', '.join(f"GROUPING(c{i})" for i in range(len(colunas)))
+        k = len(colunas)
+        grupos = [
+            (linha[0], linha[1:k + 1], linha[k + 1:2 * k + 1], linha[-1]) for linha in self._executar(
+                f"SELECT g, {', '.join(f'c{i}' for i in range(k))}, {indicadores}, count(*) "
+                f"FROM (SELECT {consultas._expressao(grupo)} AS g, {expressoes} FROM pacientes WHERE {{where}}) "
+                f"GROUP BY GROUPING SETS ({conjuntos})"
+            ).fetchall()
+        ]
+
+        # Uma tabela de contagens (grupo x coluna) por coluna, como em `contagens([grupo, col])`
+        posicoes_grupo = {codigo: i for i, codigo in enumerate(consultas._codigos[grupo])}
+        medias = {}
+        for i, col in enumerate(colunas):
+            posicoes = {codigo: j for j, codigo in enumerate(consultas._codigos[col])}
+            linhas = sorted(
+                ((g, codigos[i], n) for g, codigos, agrupado, n in grupos
+                 if agrupado[i] == 0 and g is not None and codigos[i] is not None),
+                key=lambda linha: (posicoes_grupo[linha[0]], posicoes[linha[1]])
+            )
+            tabela = pd.DataFrame({
+                grupo: np.array([consultas.rotulo(grupo, g) for g, _, _ in linhas], dtype=object),
+                col: np.array([consultas.rotulo(col, c) for _, c, _ in linhas], dtype=object),
+                COLUNA_CONTAGEM: np.array([n for _, _, n in linhas], dtype=np.int64),
+            })
+            media = media_ponderada_contagens(tabela, grupo, col, valores)
+            if media is not None:
+                medias[col] = media
+        return pd.DataFrame(medias) if medias else None
+
+    def correlacao(self, mapa_obesidade: dict, mapa_conversao: dict) -> Optional[pd.DataFrame]:
+        """Mesma matriz de `SelecaoPandas.correlacao`, calculada com `corr` no SQL."""
+        consultas = self._consultas
+        expressoes, parametros, nomes = [], [], []
+        for col in consultas.colunas:
+            if col not in consultas._codigos or col in consultas._inteiras:
+                # Numéricas (Idade, Altura, Peso) e inteiras (Refeições por Dia) entram como estão
+                expressoes.append(consultas._expressao(col))
+                nomes.append(col)
+                continue
+
+            # Categóricas: entram se todos os rótulos presentes na seleção virarem números
+            presentes = [codigo for codigo, in self._executar(
+                f"SELECT DISTINCT {consultas._expressao(col)} FROM pacientes WHERE {{where}} "
+                f"AND {consultas._expressao(col)} IS NOT NULL"
+            ).fetchall()]
+            numeros = {}
+            for codigo in presentes:
+                valor = consultas.rotulo(col, codigo)
+                if col == COLUNA_OBESIDADE:
+                    valor = mapa_obesidade.get(valor, valor)
+                valor = mapa_conversao.get(valor, valor)
+                if isinstance(valor, (bool, np.bool_)) or not isinstance(valor, (int, float, np.number)):
+                    break
+                numeros[codigo] = valor
+            else:
+                if presentes:
+                    casos = ' '.join('WHEN ? THEN ?' for _ in numeros)
+                    expressoes.append(f"CASE {consultas._expressao(col)} {casos} END")
+                    parametros.extend(v for par in numeros.items() for v in par)
+                    nomes.append(col)
+        if len(nomes) < 2:
+            return None
+
+        pares = [(i, j) for i in range(len(nomes)) for j in range(i, len(nomes))]
+        # Cada expressão aparece em vários pares: parâmetros repetidos na ordem de uso
+        offsets, posicao = [], 0
+        for expressao in expressoes:
+            offsets.append((posicao, expressao.count('?')))
+            posicao += expressao.count('?')
+        selecao, parametros_sql = [], []
+        for i, j in pares:
+            selecao.append(f"corr({expressoes[i]}, {expressoes[j]})")
+            for k in (i, j):
+                inicio, n = offsets[k]
+                parametros_sql.extend(parametros[inicio:inicio + n])
+        valores = self._consultas._executar(
+            f"SELECT {', '.join(selecao)} FROM pacientes WHERE {self._where}", parametros_sql + self._parametros
+        ).fetchone()
+
+        matriz = np.full((len(nomes), len(nomes)), np.nan)
+        for (i, j), valor in zip(pares, valores):
+            matriz[i, j] = matriz[j, i] = np.nan if valor is None else valor
+        return _ordenar_por_obesidade(pd.DataFrame(matriz, index=nomes, columns=nomes))
+
+
+@lru_cache(maxsize=1)
+def _consultas_duckdb(caminho: str, versao) -> ConsultasDuckDB:
+    diretorio = diretorio_dataset(caminho)
+    return ConsultasDuckDB([os.path.join(diretorio, nome) for nome in (ARQUIVO_BASE, *versao[1])])
+
+
+def obter_consultas(caminho: str = DATA_PATH, backend: Optional[str] = None):
+    """
+    Consultas do Dashboard no backend configurado, para a versão atual do dataset.
+
+    Args:
+        caminho (str): CSV de origem do dataset.
+        backend (str, optional): 'pandas' ou 'duckdb'. None = `HEALTHANALYTICS_CONSULTAS`.
+
+    Returns:
+        ConsultasPandas | ConsultasDuckDB: Objeto com `opcoes`, `intervalo` e `selecionar`.
+
+    Raises:
+        FileNotFoundError: Se o arquivo de dados não existir.
+    """
+    backend = backend or backend_configurado()
+    if backend == 'duckdb':
+        if duckdb_disponivel():
+            garantir_dataset(caminho)
+            with _trava:
+                return _consultas_duckdb(caminho, versao_dataset(caminho))
+        warnings.warn("Backend 'duckdb' pedido, mas o pacote duckdb não está instalado; usando pandas.")
+    return ConsultasPandas(*obter_dados_dashboard(caminho))
@@ -0,0 +1,147 @@
+"""
+Renderização de gráficos de dispersão grandes no Dashboard.
+
+Um `px.scatter` em SVG cria um elemento no navegador por ponto e trava a
+página com dezenas de milhares de pacientes. Aqui o modo de desenho é
+escolhido pelo volume filtrado:
+
+- até `LIMITE_SVG` pontos: SVG, como antes;
+- até `LIMITE_PONTOS`: todos os pontos em WebGL (`scattergl`);
+- acima disso: amostra estratificada de `LIMITE_PONTOS` pontos em WebGL, com
+  um mínimo garantido por classe (classes raras continuam visíveis);
+- modo "amostra estratificada": no máximo `LIMITE_SVG` pontos, para uma
+  visão leve mesmo em bases pequenas;
+- modo "densidade": grade 2D de contagens, que usa todas as linhas.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+LIMITE_SVG = 5_000
+LIMITE_PONTOS = 50_000
+MINIMO_POR_CLASSE = 500
+# Colunas de segmentação com mais valores distintos que isso não são tratadas como classes
+MAXIMO_ESTRATOS = 50
+BINS_DENSIDADE = 60
+
+MODO_AUTOMATICO = "Automático"
+MODO_AMOSTRA = "Amostra estratificada"
+MODO_DENSIDADE = "Densidade"
+MODOS_DISPERSAO = [MODO_AUTOMATICO, MODO_AMOSTRA, MODO_DENSIDADE]
+
+
+def amostra_estratificada(df: pd.DataFrame, coluna_classe: Optional[str], n_max: int,
+                          minimo_por_classe: int = MINIMO_POR_CLASSE, semente: int = 42) -> pd.DataFrame:
+    """
+    Sorteia até `n_max` linhas preservando as classes de `coluna_classe`.
+
+    Cada classe recebe primeiro `min(tamanho, minimo_por_classe)` linhas e o restante
+    é dividido na proporção do tamanho das classes. A semente fixa mantém a mesma
+    amostra entre reruns, e as linhas sorteadas ficam na ordem original.
+
+    Args:
+        df (pd.DataFrame): Linhas filtradas.
+        coluna_classe (str | None): Coluna de estratificação; None (ou muitos valores
+            distintos) sorteia de forma uniforme.
+        n_max (int): Número máximo de linhas na amostra.
+        minimo_por_classe (int): Linhas garantidas para cada classe.
+        semente (int): Semente do sorteio.
+
+    Returns:
+        pd.DataFrame: Amostra (ou o próprio `df`, se já couber em `n_max`).
+    """
+    if len(df) <= n_max:
+        return df
+
+    rng = np.random.default_rng(semente)
+    codigos = np.zeros(len(df), dtype=np.int64)
+    if coluna_classe is not None:
+        cod, categorias = pd.factorize(df[coluna_classe], sort=False)
+        if len(categorias) <= MAXIMO_ESTRATOS:
+            codigos = cod + 1  # -1 (ausente) vira uma classe própria
+
+    tamanhos = np.bincount(codigos)
+    garantidos = np.minimum(tamanhos, minimo_por_classe)
+    if garantidos.sum() > n_max:
+        garantidos = np.floor(garantidos * n_max / garantidos.sum()).astype(np.int64)
+
+    sobra = tamanhos - garantidos
+    vagas = n_max - garantidos.sum()
+    extras = np.floor(sobra * vagas / max(sobra.sum(), 1)).astype(np.int64)
+    cotas = garantidos + np.minimum(extras, sobra)
+
+    ordem = np.argsort(codigos, kind='stable')
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    escolhidas = [
+        rng.choice(ordem[inicio:inicio + tamanho], size=cota, replace=False)
+        for inicio, tamanho, cota in zip(inicios, tamanhos, cotas) if cota > 0
+    ]
+    posicoes = np.sort(np.concatenate(escolhidas)) if escolhidas else np.empty(0, dtype=np.int64)
+    return df.iloc[posicoes]
+
+
+def _discretizar_eixo(serie: pd.Series, bins: int):
+    """Códigos de célula e rótulos de um eixo: intervalos iguais (numérico) ou categorias."""
+    if pd.api.types.is_numeric_dtype(serie) and not isinstance(serie.dtype, pd.CategoricalDtype):
+        valores = serie.to_numpy(dtype=float)
+        bordas = np.histogram_bin_edges(valores, bins=bins)
+        codigos = np.clip(np.searchsorted(bordas, valores, side='right') - 1, 0, len(bordas) - 2)
+        return codigos, (bordas[:-1] + bordas[1:]) / 2
+    codigos, categorias = pd.factorize(serie, sort=True)
+    return codigos, [str(c) for c in categorias]
+
+
+def figura_densidade(df: pd.DataFrame, x: str, y: str, bins: int = BINS_DENSIDADE, height=None):
+    """
+    Mapa de densidade de `x` por `y` com as contagens calculadas no servidor.
+
+    Diferente do `px.density_heatmap` (que envia todas as linhas para o navegador
+    agrupar), apenas a grade de contagens é serializada.
+    """
+    dados = df[[x, y]].dropna()
+    cod_x, rotulos_x = _discretizar_eixo(dados[x], bins)
+    cod_y, rotulos_y = _discretizar_eixo(dados[y], bins)
+    grade = np.bincount(cod_y * len(rotulos_x) + cod_x, minlength=len(rotulos_x) * len(rotulos_y))
+
+    fig = px.imshow(
+        grade.reshape(len(rotulos_y), len(rotulos_x)), x=rotulos_x, y=rotulos_y,
+        origin='lower', aspect='auto', color_continuous_scale="Blues",
+        labels=dict(x=x, y=y, color="Pacientes"), height=height
+    )
+    return fig
+
+
+def figura_dispersao(df: pd.DataFrame, x: str, y: str, color: Optional[str] = None,
+                     modo: str = MODO_AUTOMATICO, **kwargs) -> Tuple[object, str]:
+    """
+    Monta a dispersão de `x` por `y` no modo de desenho adequado ao volume.
+
+    Args:
+        df (pd.DataFrame): Linhas filtradas.
+        x, y (str): Colunas dos eixos.
+        color (str | None): Coluna de cor, usada também como estrato da amostra.
+        modo (str): Um de `MODOS_DISPERSAO`.
+        **kwargs: Repassados ao `px.scatter` (no modo densidade, apenas `height` é usado).
+
+    Returns:
+        Tuple: (figura Plotly, legenda com quantos pontos são exibidos do total).
+    """
+    total = len(df)
+
+    if modo == MODO_DENSIDADE:
+        fig = figura_densidade(df, x, y, height=kwargs.get('height'))
+        return fig, f"Densidade de {total:,} pontos em grade de até {BINS_DENSIDADE}x{BINS_DENSIDADE}.".replace(',', '.')
+
+    limite = LIMITE_SVG if modo == MODO_AMOSTRA else LIMITE_PONTOS
+    df_plot = amostra_estratificada(df, color, limite)
+    render_mode = 'svg' if len(df_plot) <= LIMITE_SVG else 'webgl'
+
+    fig = px.scatter(df_plot, x=x, y=y, color=color, render_mode=render_mode, **kwargs)
+    legenda = f"Exibindo {len(df_plot):,} de {total:,} pontos".replace(',', '.')
+    if len(df_plot) < total:
+        legenda += " (amostra estratificada)"
+    if render_mode == 'webgl':
+        legenda += " · WebGL"
+    return fig, legenda + "."
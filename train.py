@@ -0,0 +1,315 @@
+"""
+Treinamento do modelo de obesidade (sem notebook).
+
+Reúne a configuração e as funções de treino do `notebooks/1_criando_modelo.ipynb`
+em um módulo importável com linha de comando; os gráficos de documentação e
+suas traduções ficam no notebook. A Random Forest é treinada com `n_jobs` em
+todos os núcleos e os folds da validação cruzada rodam em paralelo. Ao final,
+o modelo, os metadados e as estatísticas de tempo e vazão são gravados em
+`saved_model/`.
+
+Uso:
+    python train.py
+    python train.py --dados outra_base.csv --saida /tmp/modelo --n-jobs 8 --cv 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from compact_model import (ModeloCompacto, casos_paridade, diretorio_versao, exportar_modelo,
+                           remover_versoes_antigas, verificar_paridade)
+from data_store import arredondar_escalas, fingerprint_dataset, ler_dados, versao_dataset
+from model_registry import hash_arquivo
+
+
+# ==============================================================================
+# CONFIGURAÇÃO DO PROJETO (CONSTANTES)
+# ==============================================================================
+class Config:
+    """Centraliza constantes, caminhos e configurações do projeto."""
+
+    # Caminhos
+    BASE_DIR = Path(__file__).resolve().parent
+    DATA_PATH = BASE_DIR / 'data' / 'obesity.csv'
+    OUTPUT_MODEL_DIR = BASE_DIR / 'saved_model'
+
+    # Colunas
+    TARGET_COL = 'Obesity'
+    CLASSES = [
+        'Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Overweight_Level_II',
+        'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
+    ]
+
+    # Definição de Features
+    NUMERIC_FEATURES = ['Age', 'Height', 'Weight', 'FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
+    ONE_HOT_FEATURES = ['Gender', 'family_history', 'FAVC', 'SMOKE', 'SCC', 'MTRANS']
+    ORDINAL_FEATURES = ['CAEC', 'CALC']
+
+    # Ordem das Categorias Ordinais
+    ORDER_CAEC = ['no', 'Sometimes', 'Frequently', 'Always']
+    ORDER_CALC = ['no', 'Sometimes', 'Frequently', 'Always']
+
+    # Split e modelo
+    TEST_SIZE = 0.2
+    RANDOM_STATE = 42
+    N_ESTIMATORS = 100
+
+
+# ==============================================================================
+# FUNÇÕES AUXILIARES (CORE)
+# ==============================================================================
+def carregar_e_limpar_dados(caminho_arquivo: Path, lotes=None) -> pd.DataFrame:
+    """
+    Carrega o dataset (pelo Parquet derivado do CSV) e aplica limpezas iniciais (arredondamento).
+
+    Args:
+        caminho_arquivo (Path): Caminho para o CSV.
+        lotes (Sequence[str], optional): Lotes anexados a incluir (ex: os de `versao_dataset`).
+            None = todos os lotes anexados até agora.
+
+    Returns:
+        pd.DataFrame: DataFrame limpo.
+
+    Raises:
+        FileNotFoundError: Se o CSV não existir.
+    """
+    df = ler_dados(caminho_csv=str(caminho_arquivo), lotes=lotes)
+
+    # Arredonda colunas numéricas que possuem ruído decimal
+    df = arredondar_escalas(df)
+
+    print(f"Dados carregados. Shape: {df.shape}")
+    return df
+
+
+def construir_pipeline(n_jobs: int = None) -> Pipeline:
+    """
+    Constrói o pipeline de pré-processamento e modelagem.
+
+    Args:
+        n_jobs (int): Núcleos usados pela Random Forest (-1 = todos). None = 1 núcleo.
+
+    Returns:
+        Pipeline: Objeto Scikit-Learn pronto para treino.
+    """
+    # 1. Transformadores Específicos
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+
+    ordinal_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('ordinal_encoder', OrdinalEncoder(
+            categories=[Config.ORDER_CAEC, Config.ORDER_CALC],
+            handle_unknown='use_encoded_value',
+            unknown_value=-1
+        ))
+    ])
+
+    one_hot_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+    ])
+
+    # 2. Pré-processador Geral (ColumnTransformer)
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, Config.NUMERIC_FEATURES),
+            ('cat_onehot', one_hot_transformer, Config.ONE_HOT_FEATURES),
+            ('cat_ordinal', ordinal_transformer, Config.ORDINAL_FEATURES)
+        ],
+        remainder='passthrough'
+    )
+
+    # 3. Pipeline Final com Random Forest
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(
+            n_estimators=Config.N_ESTIMATORS, random_state=Config.RANDOM_STATE, n_jobs=n_jobs
+        ))
+    ])
+
+
+def verificar_modelo_compacto(pipeline, X: pd.DataFrame):
+    """
+    Exige que o modelo compacto reproduza o `predict_proba` do pipeline bit a bit.
+
+    Exporta o pipeline para uma pasta temporária e compara as probabilidades nas
+    linhas de `X` e nos casos extremos de `casos_paridade` (valores ausentes e
+    categorias desconhecidas). Roda antes de gravar qualquer artefato, para que um
+    treino divergente não substitua o modelo em uso.
+
+    Raises:
+        RuntimeError: Se alguma probabilidade (ou classe prevista) divergir.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        diretorio = exportar_modelo(pipeline, os.path.join(pasta, 'modelo_compacto'))
+        modelo = ModeloCompacto(diretorio, mmap=False)
+        erro = verificar_paridade(pipeline, modelo, casos_paridade(X, modelo))
+    if erro:
+        raise RuntimeError(f"Modelo compacto diverge do pipeline: {erro}")
+
+
+def salvar_modelo(pipeline, X_train, X_test, caminho_dados: Path = Config.DATA_PATH,
+                  estatisticas: dict = None, diretorio_saida: Path = Config.OUTPUT_MODEL_DIR,
+                  versao_dados=None):
+    """
+    Salva o modelo treinado e seus metadados essenciais.
+
+    Os metadados incluem as linhas do conjunto de teste (posição na base, CSV
+    seguido dos lotes), os lotes lidos e o fingerprint da versão da base usada,
+    para que a avaliação releia essa mesma versão (mesmo com lotes anexados
+    depois) e selecione exatamente as mesmas linhas em vez de refazer o split.
+
+    Args:
+        pipeline: Pipeline treinado.
+        X_train, X_test (pd.DataFrame): Partições usadas no treino e no teste.
+        caminho_dados (Path): CSV de origem (para o fingerprint).
+        estatisticas (dict): Tempos e vazões do treinamento (opcional, ver `treinar`).
+        diretorio_saida (Path): Pasta de destino dos `.joblib` (e de `modelo_compacto/`).
+        versao_dados (Tuple, optional): Versão da base lida no treino (ver `treinar`).
+            None = versão atual de `caminho_dados`.
+
+    Raises:
+        RuntimeError: Se o modelo compacto divergir do pipeline (ver `verificar_modelo_compacto`).
+    """
+    diretorio_saida = Path(diretorio_saida)
+    diretorio_saida.mkdir(parents=True, exist_ok=True)
+    versao_dados = versao_dados or versao_dataset(str(caminho_dados))
+    verificar_modelo_compacto(pipeline, pd.concat([X_train, X_test]))
+
+    # Salva Pipeline
+    path_model = diretorio_saida / 'modelo_obesidade.joblib'
+    joblib.dump(pipeline, path_model)
+
+    # Salva Metadados
+    model_metadata = {
+        'features_expected': X_train.columns.tolist(),
+        'numeric_features': Config.NUMERIC_FEATURES,
+        'one_hot_features': Config.ONE_HOT_FEATURES,
+        'ordinal_features': Config.ORDINAL_FEATURES,
+        'classes': pipeline.classes_.tolist(),
+        'test_indices': X_test.index.tolist(),
+        'dataset_fingerprint': fingerprint_dataset(versao_dados),
+        'dataset_batches': list(versao_dados[1]),
+        'dataset_rows': len(X_train) + len(X_test)
+    }
+    if estatisticas is not None:
+        model_metadata['training_stats'] = estatisticas
+    path_meta = diretorio_saida / 'model_metadata.joblib'
+    joblib.dump(model_metadata, path_meta)
+
+    # Modelo compacto (arrays .npy abertos em mmap pelo app), uma pasta por versão do .joblib
+    hash_modelo = hash_arquivo(str(path_model))
+    raiz_compacto = diretorio_saida / 'modelo_compacto'
+    path_compacto = diretorio_versao(str(raiz_compacto), hash_modelo)
+    try:
+        exportar_modelo(pipeline, path_compacto, hash_modelo)
+    except FileExistsError:
+        pass  # Mesmo .joblib de um treino anterior: a exportação já existe
+    remover_versoes_antigas(str(raiz_compacto), manter=path_compacto)
+
+    print(f"\nModelo salvo em: {path_model}")
+    print(f"Metadados salvos em: {path_meta}")
+    print(f"Modelo compacto salvo em: {path_compacto}")
+
+
+# ==============================================================================
+# TREINAMENTO
+# ==============================================================================
+def dividir_treino_teste(X: pd.DataFrame, y: pd.Series):
+    """Split estratificado usado no treino e na avaliação (`Config.TEST_SIZE`, `Config.RANDOM_STATE`)."""
+    return train_test_split(X, y, test_size=Config.TEST_SIZE, random_state=Config.RANDOM_STATE, stratify=y)
+
+
+def treinar(caminho_dados: Path = Config.DATA_PATH, n_jobs: int = -1, cv: int = 5):
+    """
+    Executa split, treinamento, avaliação e validação cruzada.
+
+    A floresta é treinada com `n_jobs` núcleos. Na validação cruzada, o paralelismo
+    fica nos folds (cada fold treina com 1 núcleo) para não disputar CPU. Depois do
+    treino o classificador volta para `n_jobs=None`: o modelo salvo prediz em uma
+    única thread, que é o mais rápido para as poucas linhas por chamada do app.
+
+    Args:
+        caminho_dados (Path): CSV de treino.
+        n_jobs (int): Núcleos para o treino e para os folds (-1 = todos).
+        cv (int): Número de folds da validação cruzada (0 desativa).
+
+    Returns:
+        Tuple: (pipeline, X_train, X_test, y_train, y_test, estatisticas, versao), com `versao`
+        a versão da base lida (`data_store.versao_dataset`), para o fingerprint dos metadados.
+    """
+    # Versão fixada antes da leitura: um lote anexado durante o treino não entra nos dados nem no fingerprint
+    versao = versao_dataset(str(caminho_dados))
+    df = carregar_e_limpar_dados(caminho_dados, versao[1])
+    X = df.drop(Config.TARGET_COL, axis=1)
+    y = df[Config.TARGET_COL]
+    X_train, X_test, y_train, y_test = dividir_treino_teste(X, y)
+
+    nucleos = joblib.cpu_count() if n_jobs is None or n_jobs < 0 else n_jobs
+    estatisticas = {'linhas_treino': len(X_train), 'linhas_teste': len(X_test), 'n_jobs': nucleos}
+
+    print(f"\nIniciando treinamento do Pipeline ({nucleos} núcleos)...")
+    pipeline = construir_pipeline(n_jobs=n_jobs)
+    inicio = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    estatisticas['tempo_treino_s'] = time.perf_counter() - inicio
+    estatisticas['linhas_por_s_treino'] = len(X_train) / estatisticas['tempo_treino_s']
+    pipeline.named_steps['classifier'].set_params(n_jobs=None)
+    print(f"Modelo treinado em {estatisticas['tempo_treino_s']:.2f}s.")
+
+    inicio = time.perf_counter()
+    estatisticas['acuracia_teste'] = pipeline.score(X_test, y_test)
+    estatisticas['tempo_predicao_teste_s'] = time.perf_counter() - inicio
+    estatisticas['linhas_por_s_predicao'] = len(X_test) / estatisticas['tempo_predicao_teste_s']
+    print(f"\nAcurácia no Teste: {estatisticas['acuracia_teste']:.2%}")
+
+    if cv:
+        inicio = time.perf_counter()
+        cv_scores = cross_val_score(construir_pipeline(n_jobs=None), X, y, cv=cv, scoring='accuracy', n_jobs=n_jobs)
+        estatisticas['tempo_cv_s'] = time.perf_counter() - inicio
+        estatisticas['cv_media'] = cv_scores.mean()
+        estatisticas['cv_desvio'] = cv_scores.std()
+        print(f"Cross-Validation (Média): {cv_scores.mean():.2%} (+/- {cv_scores.std():.2%}) "
+              f"em {estatisticas['tempo_cv_s']:.2f}s")
+
+    return pipeline, X_train, X_test, y_train, y_test, estatisticas, versao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Treina o pipeline de obesidade e grava modelo, metadados e estatísticas.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--dados', type=Path, default=Config.DATA_PATH, help="CSV de treino")
+    parser.add_argument('--saida', type=Path, default=Config.OUTPUT_MODEL_DIR, help="Pasta dos artefatos")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Núcleos usados (-1 = todos)")
+    parser.add_argument('--cv', type=int, default=5, help="Folds da validação cruzada (0 desativa)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.dados):
+        parser.error(f"Arquivo de dados não encontrado: {args.dados}")
+
+    pipeline, X_train, X_test, _, _, estatisticas, versao = treinar(args.dados, args.n_jobs, args.cv)
+    salvar_modelo(pipeline, X_train, X_test, args.dados, estatisticas, args.saida, versao)
+
+    print("\nEstatísticas:")
+    for chave, valor in estatisticas.items():
+        print(f"  {chave}: {valor:,.4f}" if isinstance(valor, float) else f"  {chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
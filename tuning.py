@@ -0,0 +1,225 @@
+"""
+Busca de hiperparâmetros da Random Forest com successive halving.
+
+O `construir_pipeline()` usa 100 árvores sem limite de profundidade. Aqui o
+`HalvingRandomSearchCV` sorteia configurações de árvores, profundidade,
+`max_features` e `min_samples_leaf` e vai eliminando as piores enquanto
+aumenta o número de linhas de treino de cada rodada (os folds rodam em
+processos paralelos). As melhores configurações são retreinadas no conjunto
+de treino e medidas em F1, latência de uma linha, latência de um lote e
+tamanho do `.joblib`. O resultado é a fronteira de Pareto entre essas medidas
+e a recomendação da menor floresta que mantém o F1 do modelo atual.
+
+Enquanto a versão da base usada no treino do modelo salvo puder ser relida
+(`evaluation.lotes_treino`), a busca usa essa versão e o F1 é medido nas
+linhas de teste gravadas nos metadados: o mesmo conjunto de teste da página
+de Performance. Caso contrário (outra base, CSV substituído), o split é feito
+sobre a base atual e o script avisa que o teste não é o da página.
+
+Uso:
+    python tuning.py
+    python tuning.py --candidatos 120 --finalistas 15 --csv tuning.csv
+"""
+import argparse
+import io
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import f1_score
+from sklearn.model_selection import HalvingRandomSearchCV
+
+from data_store import versao_dataset
+from evaluation import lotes_treino, selecionar_teste
+from model_registry import carregar_metadata
+from train import Config, carregar_e_limpar_dados, construir_pipeline, dividir_treino_teste
+
+ESPACO_BUSCA = {
+    'classifier__n_estimators': [10, 25, 50, 100, 200, 300],
+    'classifier__max_depth': [None, 6, 10, 14, 20],
+    'classifier__max_features': ['sqrt', 'log2', 0.5, None],
+    'classifier__min_samples_leaf': [1, 2, 4, 8],
+}
+
+# Medidas da fronteira: (coluna, True se maior é melhor)
+OBJETIVOS = [('f1', True), ('latencia_1_ms', False), ('latencia_lote_ms', False), ('tamanho_kb', False)]
+
+TAMANHO_LOTE = 1000
+REPETICOES_LATENCIA = 50
+
+
+def buscar(X_train, y_train, n_candidatos: int = 60, n_jobs: int = -1, cv: int = 5,
+           fator: int = 3, semente: int = Config.RANDOM_STATE) -> HalvingRandomSearchCV:
+    """
+    Executa o successive halving (recurso: número de linhas de treino).
+
+    Returns:
+        HalvingRandomSearchCV: Busca ajustada (ver `cv_results_`).
+    """
+    busca = HalvingRandomSearchCV(
+        construir_pipeline(n_jobs=None), ESPACO_BUSCA, n_candidates=n_candidatos,
+        factor=fator, cv=cv, scoring='f1_weighted', n_jobs=n_jobs,
+        random_state=semente, refit=False
+    )
+    return busca.fit(X_train, y_train)
+
+
+def finalistas(busca: HalvingRandomSearchCV, quantidade: int) -> list:
+    """Configurações distintas com melhor F1 médio, priorizando as rodadas com mais dados."""
+    resultados = pd.DataFrame(busca.cv_results_)
+    resultados = resultados.sort_values(['iter', 'mean_test_score'], ascending=[False, False])
+    vistos, escolhidos = set(), []
+    for params in resultados['params']:
+        chave = tuple(sorted(params.items(), key=lambda item: item[0]))
+        if chave not in vistos:
+            vistos.add(chave)
+            escolhidos.append(params)
+        if len(escolhidos) == quantidade:
+            break
+    return escolhidos
+
+
+def medir_modelo(pipeline, X_test, y_test) -> dict:
+    """F1 ponderado, latência (1 linha e lote) e tamanho serializado de um pipeline treinado."""
+    f1 = f1_score(y_test, pipeline.predict(X_test), average='weighted')
+
+    linha = X_test.iloc[[0]]
+    tempos = []
+    for _ in range(REPETICOES_LATENCIA):
+        inicio = time.perf_counter()
+        pipeline.predict_proba(linha)
+        tempos.append(time.perf_counter() - inicio)
+
+    lote = X_test.sample(TAMANHO_LOTE, replace=True, random_state=0)
+    tempos_lote = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        pipeline.predict_proba(lote)
+        tempos_lote.append(time.perf_counter() - inicio)
+
+    buffer = io.BytesIO()
+    joblib.dump(pipeline, buffer)
+
+    return {
+        'f1': f1,
+        'latencia_1_ms': np.median(tempos) * 1000,
+        'latencia_lote_ms': np.median(tempos_lote) * 1000,
+        'tamanho_kb': buffer.tell() / 1024,
+    }
+
+
+def fronteira_pareto(df: pd.DataFrame, objetivos=OBJETIVOS) -> pd.Series:
+    """Máscara das linhas não dominadas (nenhuma outra é melhor ou igual em tudo e melhor em algo)."""
+    valores = np.column_stack([df[col].to_numpy() * (-1 if maior else 1) for col, maior in objetivos])
+    nao_dominadas = np.ones(len(df), dtype=bool)
+    for i in range(len(df)):
+        domina_i = np.all(valores <= valores[i], axis=1) & np.any(valores < valores[i], axis=1)
+        nao_dominadas[i] = not domina_i.any()
+    return pd.Series(nao_dominadas, index=df.index)
+
+
+def avaliar_finalistas(configuracoes: list, X_train, y_train, X_test, y_test) -> pd.DataFrame:
+    """Retreina cada configuração (e o modelo atual como referência) e mede todas as dimensões."""
+    linhas = []
+    for params in [{}] + configuracoes:
+        pipeline = construir_pipeline(n_jobs=None).set_params(**params)
+        pipeline.fit(X_train, y_train)
+        clf = pipeline.named_steps['classifier']
+        linhas.append({
+            'referencia': not params,
+            'n_estimators': clf.n_estimators,
+            # Texto em vez de None para não virar NaN no DataFrame
+            'max_depth': 'None' if clf.max_depth is None else clf.max_depth,
+            'max_features': 'None' if clf.max_features is None else clf.max_features,
+            'min_samples_leaf': clf.min_samples_leaf,
+            **medir_modelo(pipeline, X_test, y_test),
+        })
+    resultado = pd.DataFrame(linhas)
+    resultado['pareto'] = fronteira_pareto(resultado)
+    return resultado
+
+
+def recomendar(resultado: pd.DataFrame, tolerancia_f1: float = 0.0):
+    """Menor floresta (tamanho em disco) cujo F1 não fica abaixo do modelo atual menos a tolerância."""
+    f1_referencia = resultado.loc[resultado['referencia'], 'f1'].iloc[0]
+    aceitaveis = resultado[resultado['f1'] >= f1_referencia - tolerancia_f1]
+    return aceitaveis.sort_values(['tamanho_kb', 'latencia_1_ms']).iloc[0]
+
+
+def particionar(caminho_dados, metadata: dict = None):
+    """
+    Treino e teste da busca, com o conjunto de teste da página de Performance quando possível.
+
+    Args:
+        caminho_dados: CSV da base.
+        metadata (dict): Metadados do modelo salvo (com 'test_indices' e o fingerprint da base).
+
+    Returns:
+        Tuple: (X_train, X_test, y_train, y_test, mesmo_teste), com `mesmo_teste` True se o
+        teste são as linhas gravadas no treino do modelo salvo, na versão da base daquele treino.
+    """
+    lotes = lotes_treino(metadata, versao_dataset(str(caminho_dados)))
+    df = carregar_e_limpar_dados(caminho_dados, lotes)
+    X = df.drop(Config.TARGET_COL, axis=1)
+    y = df[Config.TARGET_COL]
+    X_train, X_test, y_train, y_test = dividir_treino_teste(X, y)
+    teste = selecionar_teste(df, metadata) if lotes is not None else None
+    if teste is None:
+        return X_train, X_test, y_train, y_test, False
+    if X_test.index.tolist() == metadata['test_indices']:
+        # Mesmo split do treino (e mesma ordem do treino: a referência retreinada é o modelo salvo)
+        return X_train, X_test, y_train, y_test, True
+
+    X_test, y_test = teste
+    return X.drop(X_test.index), X_test, y.drop(y_test.index), y_test, True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Busca hiperparâmetros da Random Forest e mostra a fronteira F1 x latência x tamanho.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--dados', default=Config.DATA_PATH, help="CSV de treino")
+    parser.add_argument('--candidatos', type=int, default=60, help="Configurações sorteadas na 1ª rodada")
+    parser.add_argument('--finalistas', type=int, default=12, help="Configurações retreinadas e medidas")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos paralelos da busca (-1 = todos)")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--tolerancia-f1', type=float, default=0.0,
+                        help="Perda de F1 aceita na recomendação (ex: 0.005 = 0.5 p.p.)")
+    parser.add_argument('--csv', help="Grava a tabela completa neste arquivo")
+    args = parser.parse_args(argv)
+
+    X_train, X_test, y_train, y_test, mesmo_teste = particionar(args.dados, carregar_metadata())
+    if mesmo_teste:
+        print(f"Teste: as {len(X_test)} linhas de teste do modelo salvo (as mesmas da página de Performance).")
+    else:
+        print(f"Aviso: a base não é a do treino do modelo salvo; o teste ({len(X_test)} linhas) vem de um "
+              f"novo split e difere do conjunto da página de Performance.")
+
+    inicio = time.perf_counter()
+    busca = buscar(X_train, y_train, args.candidatos, args.n_jobs, args.cv)
+    print(f"Successive halving: {len(busca.cv_results_['params'])} ajustes em {busca.n_iterations_} rodadas "
+          f"({time.perf_counter() - inicio:.1f}s)")
+
+    resultado = avaliar_finalistas(finalistas(busca, args.finalistas), X_train, y_train, X_test, y_test)
+    if args.csv:
+        resultado.to_csv(args.csv, index=False)
+
+    colunas = ['referencia', 'n_estimators', 'max_depth', 'max_features', 'min_samples_leaf',
+               'f1', 'latencia_1_ms', 'latencia_lote_ms', 'tamanho_kb']
+    with pd.option_context('display.width', 160, 'display.float_format', '{:.4f}'.format):
+        print("\nModelo atual (referência):")
+        print(resultado.loc[resultado['referencia'], colunas[1:]].to_string(index=False))
+        print("\nFronteira de Pareto (F1 x latência x tamanho):")
+        print(resultado.loc[resultado['pareto'], colunas].sort_values('tamanho_kb').to_string(index=False))
+
+    escolhido = recomendar(resultado, args.tolerancia_f1)
+    print(f"\nRecomendado: n_estimators={escolhido['n_estimators']}, max_depth={escolhido['max_depth']}, "
+          f"max_features={escolhido['max_features']}, min_samples_leaf={escolhido['min_samples_leaf']} "
+          f"(F1 {escolhido['f1']:.4f}, {escolhido['tamanho_kb']:.0f} KB, {escolhido['latencia_1_ms']:.2f} ms/linha)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Aquecimento do container antes de aceitar tráfego.
+
+Em vez de `streamlit run HealthAnalytics.py` direto, o container executa este
+script: ele importa as bibliotecas pesadas das páginas e preenche os caches
+de processo (modelo, explainer, relatório de avaliação, frame/filtros/cubo do
+Dashboard) e só então inicia o servidor Streamlit *no mesmo processo*. Como
+as páginas rodam nesse processo e importam os mesmos módulos, elas encontram
+tudo já carregado: o primeiro usuário recebe a latência de um app aquecido.
+
+Ao terminar o aquecimento, o script grava um arquivo de prontidão (JSON com o
+tempo de cada etapa), usado pelo HEALTHCHECK do Dockerfile junto com o
+`/_stcore/health`. Falhas em uma etapa (ex: modelo ausente) são registradas no
+arquivo e não impedem o servidor de subir; a página correspondente mostra o erro.
+
+A etapa `explainer` carrega o pipeline `.joblib` e o `shap` em cada réplica
+(~135 MB de memória exclusiva por processo, ver "Aquecimento do Container" em
+docs/technical.md), por isso só roda com `HEALTHANALYTICS_AQUECER_EXPLAINER=1`.
+Por padrão ela é pulada e só as réplicas que calcularem SHAP pagam esse custo,
+no primeiro uso.
+
+Uso:
+    python warmup.py --server.port=8501 --server.address=0.0.0.0
+    python warmup.py --somente-aquecer          # mede o aquecimento sem subir o servidor
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, 'HealthAnalytics.py')
+ARQUIVO_PRONTO = os.path.join(tempfile.gettempdir(), 'healthanalytics_pronto.json')
+VARIAVEL_EXPLAINER = 'HEALTHANALYTICS_AQUECER_EXPLAINER'
+
+
+# ==============================================================================
+# ETAPAS DO AQUECIMENTO
+# ==============================================================================
+def _bibliotecas():
+    # Importadas sob demanda pelas páginas (ver "Importações sob Demanda" em docs/technical.md)
+    import fpdf  # noqa: F401
+    import pandas.io.formats.style  # noqa: F401  (matplotlib, tabela da página de Performance)
+    import plotly.express  # noqa: F401
+
+
+def _modelo():
+    from model_registry import carregar_metadata, importancia_variaveis, obter_modelo_compacto
+
+    if obter_modelo_compacto() is None:
+        raise FileNotFoundError("Modelo não encontrado em saved_model/")
+    carregar_metadata()
+    importancia_variaveis()
+
+
+def _explainer():
+    from evaluation import carregar_dados_avaliacao
+    from inference import inferir
+    from model_registry import carregar_metadata, obter_explainer, obter_modelo_compacto
+
+    # Uma inferência completa (predição + SHAP) também aquece os caminhos da primeira chamada
+    metadata = carregar_metadata()
+    linha = carregar_dados_avaliacao(colunas=metadata['features_expected']).head(1)
+    inferir(obter_modelo_compacto(), linha, explainer=obter_explainer())
+
+
+def _relatorio():
+    from evaluation import obter_relatorio
+
+    obter_relatorio()
+
+
+def _dashboard():
+    from query_engine import obter_consultas
+
+    # Frame/motor/cubo (pandas) ou conexão DuckDB, conforme HEALTHANALYTICS_CONSULTAS
+    obter_consultas()
+
+
+ETAPAS = [
+    ('bibliotecas', _bibliotecas),
+    ('modelo', _modelo),
+    ('explainer', _explainer),
+    ('relatorio', _relatorio),
+    ('dashboard', _dashboard),
+]
+
+
+def aquecer_explainer() -> bool:
+    """Se a etapa `explainer` roda, conforme `HEALTHANALYTICS_AQUECER_EXPLAINER` (padrão: não)."""
+    return os.environ.get(VARIAVEL_EXPLAINER, '0').strip().lower() in ('1', 'true', 'sim')
+
+
+def aquecer(log=sys.stderr) -> dict:
+    """
+    Executa as etapas do aquecimento no processo atual.
+
+    Args:
+        log: Destino das mensagens de progresso.
+
+    Returns:
+        dict: Por etapa executada, {'segundos': float, 'erro': str | None}.
+    """
+    resultado = {}
+    for nome, etapa in ETAPAS:
+        if nome == 'explainer' and not aquecer_explainer():
+            print(f"[warmup] {nome}: desativada (ative com {VARIAVEL_EXPLAINER}=1)", file=log, flush=True)
+            continue
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            etapa()
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=log)
+        resultado[nome] = {'segundos': round(time.perf_counter() - inicio, 3), 'erro': erro}
+        print(f"[warmup] {nome}: {resultado[nome]['segundos']:.2f}s" + (f" (falhou: {erro})" if erro else ""),
+              file=log, flush=True)
+    return resultado
+
+
+def marcar_pronto(resultado: dict, caminho: str = ARQUIVO_PRONTO):
+    """Grava o arquivo de prontidão de forma atômica (o healthcheck nunca lê um JSON pela metade)."""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid(), 'etapas': resultado}, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aquece os caches do app e inicia o Streamlit no mesmo processo. "
+                    "Argumentos desconhecidos (ex: --server.port=8501) são repassados ao `streamlit run`.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--arquivo-pronto', default=ARQUIVO_PRONTO, help="Arquivo gravado ao fim do aquecimento")
+    parser.add_argument('--somente-aquecer', action='store_true', help="Não inicia o servidor")
+    args, argumentos_streamlit = parser.parse_known_args(argv)
+
+    # Um arquivo de uma execução anterior do container não pode indicar prontidão
+    if os.path.exists(args.arquivo_pronto):
+        os.remove(args.arquivo_pronto)
+
+    inicio = time.perf_counter()
+    resultado = aquecer()
+    marcar_pronto(resultado, args.arquivo_pronto)
+    print(f"[warmup] concluído em {time.perf_counter() - inicio:.1f}s", file=sys.stderr, flush=True)
+
+    if args.somente_aquecer:
+        return
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ['streamlit', 'run', APP_PATH, *argumentos_streamlit]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()